@@ -0,0 +1,2 @@
+# This file makes Python treat the 'benchmarks' directory as a package.
+# Run a benchmark with e.g. `python -m benchmarks.bench_read_sol`.
@@ -0,0 +1,97 @@
+"""
+Compares opening a save by decoding it with opening it from the persistent decode cache.
+
+Usage: python -m benchmarks.bench_decode_cache [--check] [--sizes 1000 100000] [--history 1000] [--repeat 5]
+
+For every synthetic save (AMF0 and AMF3) the file is written to a temporary folder and read
+with read_sol: without a cache (a full decode), lazily (indexing only), and from a warm
+DecodeCache (hashing the bytes and unpickling the entry). The cache entry size is reported
+next to the file size. --check only verifies that documents loaded from the cache encode to
+the same bytes as the file and save an edit like a freshly decoded document does.
+"""
+import argparse
+import gc
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sol_cache import DecodeCache
+from sol_handler import AMF0, AMF3, encode_sol, read_sol, write_sol
+from benchmarks.synthetic import make_save_data
+
+
+def _best(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        document = func()
+        timings.append(time.perf_counter() - start)
+        if hasattr(document, 'release'):
+            document.release()
+        del document
+    return min(timings)
+
+
+def check(path, cache):
+    """Returns None when the cached document matches the file, else a message."""
+    blob = path.read_bytes()
+    read_sol(path, cache=cache)
+    document = read_sol(path, cache=cache)
+    if cache.hits != 1:
+        return "the second read was not a cache hit"
+    if encode_sol(document, document.sol_name, document.amf_version) != blob:
+        return "cached document encodes differently"
+    saved = []
+    for edited in (read_sol(path), document): # Saved from a decoded and from the cached document
+        edited['gold'] = 12345
+        path.write_bytes(blob)
+        write_sol(path, edited, backups=0)
+        saved.append(path.read_bytes())
+    if saved[0] != saved[1]:
+        return "cached document saves differently from a decoded one"
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--check', action='store_true', help="Only check that cached documents encode identically.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000])
+    parser.add_argument('--history', type=int, default=1000, help="Days in the per-day number lists (default 1000).")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    failures = 0
+    if not args.check:
+        print(f"{'parts':>8} {'amf':>4} {'file MB':>8} {'entry MB':>9} {'decode ms':>10} {'lazy ms':>8} "
+              f"{'cached ms':>10} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as folder:
+        for size in args.sizes:
+            for amf_version in (AMF0, AMF3):
+                data = make_save_data(size, num_weapons=max(50, size // 50), history_days=args.history)
+                path = Path(folder) / f"save_{size}_{amf_version}.sol"
+                path.write_bytes(encode_sol(data, 'savegame', amf_version))
+                del data
+                cache = DecodeCache(Path(folder) / f"cache_{size}_{amf_version}")
+                if args.check:
+                    problem = check(path, cache)
+                    print(f"{size} parts, AMF{amf_version}: {'ok' if problem is None else f'FAIL: {problem}'}")
+                    failures += problem is not None
+                    continue
+                decode_s = _best(lambda: read_sol(path), args.repeat)
+                lazy_s = _best(lambda: read_sol(path, lazy=True), args.repeat)
+                read_sol(path, cache=cache) # Warms the cache
+                cached_s = _best(lambda: read_sol(path, cache=cache), args.repeat)
+                print(f"{size:>8} {amf_version:>4} {path.stat().st_size / 1e6:>8.2f} {cache.size_bytes() / 1e6:>9.2f} "
+                      f"{decode_s * 1000:>10.2f} {lazy_s * 1000:>8.2f} {cached_s * 1000:>10.2f} "
+                      f"{decode_s / cached_s:>7.1f}x")
+    if failures:
+        print(f"{failures} check(s) failed.")
+        sys.exit(1)
+    if args.check:
+        print("Cached documents encode identically.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Measures the save history (sol_history) over a session of auto-saves with small edits.
+
+Usage: python -m benchmarks.bench_history [--check] [--sizes 1000 100000] [--saves 300] [--history 300]
+
+For every synthetic save (AMF0 and AMF3) each auto-save changes the gold and one part count
+and snapshots the result, like the editor does before every write. Reported per case: the
+bytes of all versions together, the disk use of the history folder, the number of keyframes,
+the mean and worst snapshot time, and the mean and worst time to restore a version (the
+history keeps at most one delta per version, so this does not grow with the session).
+--check only verifies that every version restores to the bytes it was taken from.
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sol_handler import AMF0, AMF3, decode_sol, encode_sol
+from sol_history import SaveHistory
+from benchmarks.synthetic import make_save_data
+
+
+def run_session(folder, size, amf_version, saves, history_days):
+    """Snapshots `saves` edited versions; returns (history, {key: bytes}, snapshot seconds)."""
+    rng = random.Random(size)
+    document = decode_sol(encode_sol(make_save_data(size, history_days=history_days), 'savegame', amf_version))
+    history = SaveHistory(Path(folder) / f"history_{size}_{amf_version}", limit=saves)
+    versions = {}
+    timings = []
+    for index in range(saves):
+        document['gold'] = index
+        parts = document['parts']
+        parts[rng.randrange(len(parts))][1] = rng.randrange(100)
+        document.mark_dirty('parts')
+        blob = encode_sol(document, 'savegame', amf_version)
+        start = time.perf_counter()
+        snapshot = history.snapshot(blob, 'auto-save')
+        timings.append(time.perf_counter() - start)
+        versions[snapshot.key] = blob
+    return history, versions, timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--check', action='store_true', help="Only check that every version restores exactly.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000])
+    parser.add_argument('--saves', type=int, default=300)
+    parser.add_argument('--history', type=int, default=300, help="Days in the per-day number lists (default 300).")
+    args = parser.parse_args(argv)
+
+    failures = 0
+    if not args.check:
+        print(f"{'parts':>8} {'amf':>4} {'saves MB':>9} {'disk MB':>8} {'keyframes':>9} {'snap ms':>8} "
+              f"{'max':>7} {'restore ms':>10} {'max':>7}")
+    with tempfile.TemporaryDirectory() as folder:
+        for size in args.sizes:
+            for amf_version in (AMF0, AMF3):
+                history, versions, timings = run_session(folder, size, amf_version, args.saves, args.history)
+                snapshots = history.snapshots()
+                restore_timings = []
+                bad = 0
+                for snapshot in snapshots:
+                    start = time.perf_counter()
+                    data = history.restore_bytes(snapshot)
+                    restore_timings.append(time.perf_counter() - start)
+                    bad += data != versions[snapshot.key]
+                if args.check:
+                    print(f"{size} parts, AMF{amf_version}: "
+                          f"{'ok' if not bad else f'FAIL: {bad} version(s) restore differently'}")
+                    failures += bool(bad)
+                    continue
+                keyframes = sum(1 for snapshot in snapshots if snapshot.stored and not snapshot.base)
+                print(f"{size:>8} {amf_version:>4} {sum(map(len, versions.values())) / 1e6:>9.2f} "
+                      f"{history.size_bytes() / 1e6:>8.2f} {keyframes:>9} "
+                      f"{sum(timings) / len(timings) * 1000:>8.2f} {max(timings) * 1000:>7.2f} "
+                      f"{sum(restore_timings) / len(restore_timings) * 1000:>10.2f} {max(restore_timings) * 1000:>7.2f}")
+    if failures:
+        print(f"{failures} check(s) failed.")
+        sys.exit(1)
+    if args.check:
+        print("Every version restores exactly.")
+
+
+if __name__ == '__main__':
+    main()
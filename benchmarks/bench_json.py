@@ -0,0 +1,120 @@
+"""
+Measures JSON export/import throughput and peak memory, and checks the JSON -> SOL round trip.
+
+Usage: python -m benchmarks.bench_json [--check] [--sizes 1000 100000] [--repeat 3] [--memory]
+
+For every synthetic save (AMF0 and AMF3) the streaming exporter is timed in indented and
+compact mode against the previous json.dump(indent=4) of the whole document, and the
+streaming importer against json.load. Throughput is MB of JSON text per second. --memory
+adds the tracemalloc peak of each run (slower, so off by default). --check only verifies
+that exporting, importing and encoding again gives the same bytes as encoding the original.
+"""
+import argparse
+import io
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from sol_handler import AMF0, AMF3, encode_sol, read_sol
+from sol_json import export_json, import_json
+from benchmarks.synthetic import write_synthetic_save
+
+
+def check_round_trip(document):
+    """Returns None when the exported and re-imported document encodes like the original, else a message."""
+    for compact in (False, True):
+        text = io.StringIO()
+        export_json(document, text, compact=compact)
+        imported = import_json(io.StringIO(text.getvalue()))
+        expected = encode_sol(document, document.sol_name, document.amf_version)
+        actual = encode_sol(imported, imported.sol_name, imported.amf_version)
+        if actual != expected:
+            return f"{'compact' if compact else 'indented'} export differs ({len(actual)} vs {len(expected)} bytes)"
+    return None
+
+
+def _legacy_export(document, path):
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=4)
+
+
+def _legacy_import(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _measure(func, repeat, memory):
+    """(best seconds, peak bytes or None)."""
+    best = min(_timed(func) for _ in range(repeat))
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return best, peak
+
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def run_benchmark(sizes, repeat, memory):
+    print(f"{'parts':>8} {'amf':>4} {'case':>16} {'JSON MB':>8} {'ms':>9} {'MB/s':>8}" + (f" {'peak MB':>8}" if memory else ""))
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            for amf_version in (AMF0, AMF3):
+                path = Path(tmp) / f'synthetic_{size}_amf{amf_version}.sol'
+                write_synthetic_save(path, num_parts=size, amf_version=amf_version)
+                document = read_sol(path)
+                indented, compact, legacy = (Path(tmp) / name for name in ('indented.json', 'compact.json', 'legacy.json'))
+                cases = [
+                    ('export_legacy', legacy, lambda: _legacy_export(document, legacy)),
+                    ('export_indented', indented, lambda: export_json(document, indented)),
+                    ('export_compact', compact, lambda: export_json(document, compact, compact=True)),
+                    ('import_legacy', legacy, lambda: _legacy_import(legacy)),
+                    ('import_indented', indented, lambda: import_json(indented)),
+                    ('import_compact', compact, lambda: import_json(compact)),
+                ]
+                for case, json_path, func in cases:
+                    seconds, peak = _measure(func, repeat, memory)
+                    megabytes = json_path.stat().st_size / 1e6
+                    line = f"{size:>8} {amf_version:>4} {case:>16} {megabytes:>8.2f} {seconds * 1000:>9.2f} {megabytes / seconds:>8.1f}"
+                    print(line + (f" {peak / 1e6:>8.2f}" if memory else ""))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--check', action='store_true', help="Only run the round-trip checks.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--memory', action='store_true', help="Also report the tracemalloc peak of each case.")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        failures = 0
+        with tempfile.TemporaryDirectory() as tmp:
+            for size in args.sizes:
+                for amf_version in (AMF0, AMF3):
+                    path = Path(tmp) / f'synthetic_{size}_amf{amf_version}.sol'
+                    write_synthetic_save(path, num_parts=size, amf_version=amf_version)
+                    problem = check_round_trip(read_sol(path))
+                    print(f"{path.name}: {'ok' if problem is None else f'FAIL: {problem}'}")
+                    failures += problem is not None
+        if failures:
+            print(f"{failures} round trip(s) failed.")
+            sys.exit(1)
+        print("All JSON round trips encode identically.")
+        return
+    run_benchmark(args.sizes, args.repeat, args.memory)
+
+
+if __name__ == '__main__':
+    main()
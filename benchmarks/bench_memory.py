@@ -0,0 +1,92 @@
+"""
+Measures the memory held by a decoded save, plain lists and dicts against the compact model.
+
+Usage: python -m benchmarks.bench_memory [--check] [--sizes 1000 100000] [--history 1000] [--repeat 3]
+
+For every synthetic save (AMF0 and AMF3) the document is decoded with decode_sol(compact=False),
+the previous representation, and with the default compact model (interned AMF0 keys and
+ScalarArray number lists, see sol_compact). Reported per case: the tracemalloc size of the
+decoded document (what stays allocated after decoding), the peak while decoding, and the
+decode time. --history sets the length of the per-day number lists in the save. --check only
+verifies that both representations encode to the same bytes.
+"""
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+
+from sol_handler import AMF0, AMF3, decode_sol, encode_sol
+from benchmarks.synthetic import make_save_data
+
+
+def measure(blob, compact, repeat):
+    """(retained bytes, peak bytes, best decode seconds)."""
+    best = min(_timed_decode(blob, compact) for _ in range(repeat))
+    gc.collect()
+    tracemalloc.start()
+    try:
+        document = decode_sol(blob, compact=compact)
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del document
+    return retained, peak, best
+
+
+def _timed_decode(blob, compact):
+    gc.collect()
+    start = time.perf_counter()
+    decode_sol(blob, compact=compact)
+    return time.perf_counter() - start
+
+
+def check(blob):
+    """Returns None when the compact and the plain document encode identically, else a message."""
+    plain = decode_sol(blob, compact=False)
+    compact = decode_sol(blob)
+    expected = encode_sol(plain, plain.sol_name, plain.amf_version)
+    actual = encode_sol(compact, compact.sol_name, compact.amf_version)
+    if actual != expected:
+        return f"compact document encodes differently ({len(actual)} vs {len(expected)} bytes)"
+    if compact != plain:
+        return "compact document does not compare equal to the plain one"
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--check', action='store_true', help="Only check that both representations encode alike.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000])
+    parser.add_argument('--history', type=int, default=1000, help="Days in the per-day number lists (default 1000).")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    failures = 0
+    if not args.check:
+        print(f"{'parts':>8} {'amf':>4} {'model':>8} {'held MB':>8} {'peak MB':>8} {'decode ms':>10}")
+    for size in args.sizes:
+        for amf_version in (AMF0, AMF3):
+            data = make_save_data(size, num_weapons=max(50, size // 50), history_days=args.history)
+            blob = encode_sol(data, 'savegame', amf_version)
+            del data
+            if args.check:
+                problem = check(blob)
+                print(f"{size} parts, AMF{amf_version}: {'ok' if problem is None else f'FAIL: {problem}'}")
+                failures += problem is not None
+                continue
+            results = {}
+            for model, compact in (('plain', False), ('compact', True)):
+                retained, peak, seconds = results[model] = measure(blob, compact, args.repeat)
+                print(f"{size:>8} {amf_version:>4} {model:>8} {retained / 1e6:>8.2f} {peak / 1e6:>8.2f} {seconds * 1000:>10.2f}")
+            print(f"{'':>8} {'':>4} {'ratio':>8} {results['compact'][0] / results['plain'][0]:>8.2f} "
+                  f"{results['compact'][1] / results['plain'][1]:>8.2f} {results['compact'][2] / results['plain'][2]:>10.2f}")
+    if failures:
+        print(f"{failures} check(s) failed.")
+        sys.exit(1)
+    if args.check:
+        print("Compact and plain documents encode identically.")
+
+
+if __name__ == '__main__':
+    main()
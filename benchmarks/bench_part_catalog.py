@@ -0,0 +1,90 @@
+"""
+Compares 'Add All Parts' using the cached part catalog with the original per-click generator.
+
+Usage: python -m benchmarks.bench_part_catalog [--catalog-sizes 1000 10000 100000 250000] [--saves 8] [--repeat 3]
+
+For every catalog size a save is generated whose parts use 10 categories with ids up to
+size / 10 (about half of them present, unsorted), then the complete parts list is built
+for --saves such saves. The first call of the catalog version pays for building the
+catalog; the "warm" column shows the following saves.
+"""
+import argparse
+import gc
+import random
+import re
+import time
+
+from part_catalog import KNOWN_PART_CATEGORIES, all_parts, all_parts_many, catalog
+
+_LEGACY_PART_NAME = re.compile(r'part_([a-zA-Z0-9_]+)_([a-zA-Z0-9]+)$')
+
+
+def legacy_all_parts(existing_parts):
+    """The generator as it was in SolEditorApp.add_all_parts_tags: regex per name, nested loops, full sort."""
+    existing_parts_dict = {}
+    for part_entry in existing_parts:
+        if isinstance(part_entry, list) and len(part_entry) >= 2:
+            existing_parts_dict[str(part_entry[0])] = part_entry[1]
+    categories = set()
+    ids = set()
+    for partname in existing_parts_dict:
+        m = _LEGACY_PART_NAME.match(partname)
+        if m:
+            categories.add(m.group(1))
+            ids.add(m.group(2))
+    final_categories = categories if categories else KNOWN_PART_CATEGORIES
+    max_id_num = max({int(id_str) for id_str in ids if id_str.isdigit()}, default=0)
+    all_parts_list = [[pname, 999] for pname in existing_parts_dict]
+    for cat in sorted(final_categories):
+        for i in range(1, max(max_id_num + 1, 51)):
+            pname_num = f'part_{cat}_{i}'
+            if pname_num not in existing_parts_dict:
+                all_parts_list.append([pname_num, 999])
+    return sorted(all_parts_list, key=lambda x: x[0])
+
+
+def make_parts(catalog_size, seed):
+    rng = random.Random(seed)
+    categories = sorted(KNOWN_PART_CATEGORIES)
+    max_id = max(1, catalog_size // len(categories))
+    parts = [[f'part_{cat}_{i}', rng.randint(0, 20)] for cat in categories for i in range(1, max_id + 1)
+             if rng.random() < 0.5]
+    parts.append([f'part_{categories[0]}_{max_id}', 1]) # Pins the highest id
+    rng.shuffle(parts)
+    return parts
+
+
+def _timed(func):
+    gc.collect()
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--catalog-sizes', type=int, nargs='+', default=[1000, 10000, 100000, 250000])
+    parser.add_argument('--saves', type=int, default=8, help="Saves processed per measurement.")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"{'parts':>8} {'saves':>6} {'legacy ms':>10} {'catalog ms':>11} {'warm ms/save':>13} {'speedup':>8}")
+    for size in args.catalog_sizes:
+        saves = [make_parts(size, seed) for seed in range(args.saves)]
+        legacy_best = catalog_best = warm_best = float('inf')
+        for _ in range(args.repeat):
+            catalog.cache_clear()
+            legacy_s, expected = _timed(lambda: [legacy_all_parts(parts) for parts in saves])
+            catalog_s, result = _timed(lambda: all_parts_many(saves))
+            warm_s, _ = _timed(lambda: all_parts(saves[0]))
+            if result != expected:
+                raise SystemExit(f"[ERROR] Results differ from the legacy generator for catalog size {size}.")
+            legacy_best = min(legacy_best, legacy_s)
+            catalog_best = min(catalog_best, catalog_s)
+            warm_best = min(warm_best, warm_s)
+        print(f"{len(expected[0]):>8} {args.saves:>6} {legacy_best * 1000:>10.1f} "
+              f"{catalog_best * 1000:>11.1f} {warm_best * 1000:>13.2f} {legacy_best / catalog_best:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Compares the batch operations of PartsTable with the same edits on the [name, count] lists.
+
+Usage: python -m benchmarks.bench_parts_table [--check] [--sizes 10000 100000 250000] [--repeat 5]
+
+Per size, a shuffled parts list over the 10 known categories is generated and each edit is
+timed on the list of lists (as the editor did it) and on a PartsTable: setting every
+count, merging in the catalog, dropping one category, and 1000 lookups by name (hash index
+and bisect). The conversions in and out of the table are timed separately. --check only
+verifies that a table built from a save's parts encodes to the same bytes.
+"""
+import argparse
+import copy
+import gc
+import random
+import re
+import sys
+import time
+
+from part_catalog import KNOWN_PART_CATEGORIES, PartsTable, catalog
+from sol_handler import AMF0, AMF3, decode_sol, encode_sol
+from benchmarks.synthetic import make_save_data
+
+_PART_NAME = re.compile(r'part_([a-zA-Z0-9_]+)_([a-zA-Z0-9]+)$')
+DROPPED_CATEGORY = 'shield_paint'
+
+
+def make_parts(size, seed=0):
+    rng = random.Random(seed)
+    categories = sorted(KNOWN_PART_CATEGORIES)
+    per_category = max(1, size // len(categories))
+    parts = [[f'part_{cat}_{i}', rng.randint(0, 99)] for cat in categories for i in range(1, 2 * per_category + 1)
+             if rng.random() < 0.5]
+    rng.shuffle(parts)
+    return parts, catalog(KNOWN_PART_CATEGORIES, 2 * per_category + 1)
+
+
+# --- The list-of-lists versions ---
+def list_set_counts(parts, count):
+    for entry in parts:
+        entry[1] = count
+    return parts
+
+
+def list_merge(parts, part_catalog, count):
+    existing = {entry[0]: entry[1] for entry in parts}
+    merged = [[name, value] for name, value in existing.items()]
+    merged.extend([name, count] for name in part_catalog.names if name not in existing)
+    return sorted(merged, key=lambda entry: entry[0])
+
+
+def list_drop_category(parts, category):
+    return [entry for entry in parts if not ((m := _PART_NAME.match(entry[0])) and m.group(1) == category)]
+
+
+def list_lookups(parts, names):
+    index = {entry[0]: entry for entry in parts} # Built per batch: the list has no index of its own
+    return [index[name][1] for name in names]
+
+
+def _best(func, setup, repeat):
+    timings = []
+    for _ in range(repeat):
+        state = setup()
+        gc.collect()
+        start = time.perf_counter()
+        func(state)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run_benchmark(sizes, repeat):
+    print(f"{'parts':>8} {'operation':>16} {'lists ms':>9} {'table ms':>9} {'speedup':>8}")
+    for size in sizes:
+        parts, part_catalog = make_parts(size)
+        table = PartsTable.from_rows(parts)
+        names = random.Random(1).sample(table.names, min(1000, len(table)))
+        cases = [
+            ('set_all_counts', lambda p: list_set_counts(p, 50), lambda t: t.set_all_counts(50)),
+            ('merge_catalog', lambda p: list_merge(p, part_catalog, 999), lambda t: t.merge_catalog(part_catalog)),
+            ('drop_category', lambda p: list_drop_category(p, DROPPED_CATEGORY),
+             lambda t: t.filter_categories([DROPPED_CATEGORY], keep=False)),
+            ('lookup_index', lambda p: list_lookups(p, names), lambda t: [t.get(name) for name in names]),
+            ('lookup_bisect', lambda p: list_lookups(p, names), lambda t: [t.counts[t.find(name)] for name in names]),
+        ]
+        for name, list_func, table_func in cases:
+            lists_s = _best(list_func, lambda: copy.deepcopy(parts), repeat)
+            table_s = _best(table_func, table.copy, repeat)
+            print(f"{len(parts):>8} {name:>16} {lists_s * 1000:>9.2f} {table_s * 1000:>9.2f} {lists_s / table_s:>7.1f}x")
+        from_s = _best(PartsTable.from_rows, lambda: parts, repeat)
+        to_s = _best(PartsTable.to_rows, lambda: table, repeat)
+        print(f"{len(parts):>8} {'from_rows':>16} {'':>9} {from_s * 1000:>9.2f}")
+        print(f"{len(parts):>8} {'to_rows':>16} {'':>9} {to_s * 1000:>9.2f}")
+
+
+def check(sizes):
+    """Returns the number of saves whose parts do not encode identically after a table round trip."""
+    failures = 0
+    for size in sizes:
+        for amf_version in (AMF0, AMF3):
+            blob = encode_sol(make_save_data(size), 'savegame', amf_version)
+            expected = encode_sol(decode_sol(blob), 'savegame', amf_version)
+            document = decode_sol(blob)
+            document['parts'] = PartsTable.from_rows(document['parts']).to_rows()
+            ok = encode_sol(document, 'savegame', amf_version) == expected
+            print(f"{size} parts, AMF{amf_version}: {'ok' if ok else 'FAIL: encodes differently'}")
+            failures += not ok
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--check', action='store_true', help="Only check that table round trips encode identically.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 250000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.check:
+        failures = check(args.sizes)
+        if failures:
+            print(f"{failures} check(s) failed.")
+            sys.exit(1)
+        print("All parts tables encode identically.")
+        return
+    run_benchmark(args.sizes, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
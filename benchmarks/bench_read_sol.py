@@ -0,0 +1,67 @@
+"""
+Compares load time and peak memory of the read_sol backends on synthetic saves.
+
+Usage: python -m benchmarks.bench_read_sol [--sizes 1000 10000 100000] [--repeat 5] [--amf 0|3]
+"""
+import argparse
+import gc
+import importlib.util
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from sol_handler import SOL_BACKENDS, read_sol
+from benchmarks.synthetic import write_synthetic_save
+
+
+def _available_backends():
+    backends = []
+    for backend in SOL_BACKENDS:
+        if backend == 'pyamf':
+            if importlib.util.find_spec('pyamf') is None:
+                print("[INFO] pyamf is not installed; skipping the pyamf backend.")
+                continue
+        backends.append(backend)
+    return backends
+
+
+def measure(path, backend, repeat):
+    """Returns (best load time in seconds, peak traced memory in bytes)."""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        read_sol(path, backend=backend)
+        timings.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    result = read_sol(path, backend=backend)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return min(timings), peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help="Number of [name, count] entries in the synthetic 'parts' list.")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--amf', type=int, choices=(0, 3), default=0, help="AMF version of the synthetic saves.")
+    args = parser.parse_args(argv)
+
+    backends = _available_backends()
+    print(f"{'parts':>8} {'file KB':>9} {'backend':>8} {'load ms':>9} {'peak KB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = Path(tmp) / f'synthetic_{size}.sol'
+            file_size = write_synthetic_save(path, num_parts=size, amf_version=args.amf)
+            for backend in backends:
+                best, peak = measure(path, backend, args.repeat)
+                print(f"{size:>8} {file_size / 1024:>9.1f} {backend:>8} {best * 1000:>9.2f} {peak / 1024:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
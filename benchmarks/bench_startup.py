@@ -0,0 +1,94 @@
+"""
+Measures editor startup: interpreter start, imports and the time until the first window is drawn.
+
+Usage: python -m benchmarks.bench_startup [--repeat 5] [--top 15] [--module main]
+
+Every run starts a fresh interpreter from the project folder. The import breakdown comes from
+`python -X importtime -c "import main"` (the slowest modules are listed by cumulative time);
+the first-window time is taken by a child process that creates SolEditorApp and draws one
+frame, which needs a display and is skipped without one.
+"""
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+FIRST_WINDOW_CODE = """
+import os, time
+start = time.perf_counter()
+import tkinter as tk
+from gui import SolEditorApp
+try:
+    root = tk.Tk()
+except tk.TclError as e:
+    print('no-display', e)
+    os._exit(0)
+app = SolEditorApp(root)
+root.update() # First frame, plus the idle callbacks queued by __init__ (the folder search is handed to a thread)
+print(time.perf_counter() - start)
+os._exit(0) # Skip on_close: nothing to save, and worker threads may still be scanning
+"""
+
+
+def _run(code, importtime=False):
+    """(wall seconds, stdout, stderr) of `python -c code` in a fresh interpreter."""
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', code]
+    start = time.perf_counter()
+    result = subprocess.run(command, capture_output=True, text=True, cwd=PROJECT_DIR)
+    elapsed = time.perf_counter() - start
+    if result.returncode:
+        raise RuntimeError(f"{' '.join(command)} failed:\n{result.stderr}")
+    return elapsed, result.stdout, result.stderr
+
+
+def parse_importtime(stderr):
+    """[(module, self µs, cumulative µs, depth)] from -X importtime output, in import order."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2 # ' main', '   gui', '     gui.app'
+        imports.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return imports
+
+
+def measure(module, repeat):
+    interpreter = min(_run('pass')[0] for _ in range(repeat))
+    imported = min(_run(f'import {module}')[0] for _ in range(repeat))
+    # The run with the smallest total is the least disturbed one
+    breakdowns = [parse_importtime(_run(f'import {module}', importtime=True)[2]) for _ in range(repeat)]
+    breakdown = min(breakdowns, key=lambda imports: sum(c for _, _, c, depth in imports if depth == 0))
+    first_window = None
+    outputs = [_run(FIRST_WINDOW_CODE)[1].strip() for _ in range(repeat)]
+    if not outputs[0].startswith('no-display'):
+        first_window = min(float(output) for output in outputs)
+    return interpreter, imported, breakdown, first_window
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help="Slowest imports to list.")
+    parser.add_argument('--module', default='main', help="Module to import (default: main, the editor's entry point).")
+    args = parser.parse_args(argv)
+
+    interpreter, imported, breakdown, first_window = measure(args.module, args.repeat)
+    total_us = sum(cumulative for _, _, cumulative, depth in breakdown if depth == 0)
+    print(f"{'interpreter start':<24} {interpreter * 1000:>9.1f} ms")
+    print(f"{'import ' + args.module:<24} {(imported - interpreter) * 1000:>9.1f} ms "
+          f"(-X importtime: {total_us / 1000:.1f} ms for {len(breakdown)} modules)")
+    if first_window is None:
+        print(f"{'first window':<24} {'skipped: no display':>12}")
+    else:
+        print(f"{'first window':<24} {first_window * 1000:>9.1f} ms (imports, SolEditorApp and one update())")
+    print(f"\nSlowest imports{'':<15} {'self ms':>9} {'cumul. ms':>10}")
+    for name, self_us, cumulative_us, depth in sorted(breakdown, key=lambda entry: -entry[2])[:args.top]:
+        print(f"  {'  ' * min(depth, 4)}{name:<{28 - 2 * min(depth, 4)}} {self_us / 1000:>9.2f} {cumulative_us / 1000:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Compares the time to first paint of the data tree: eager population of every node vs the
+virtualized LazyTreeModel (eagerly decoded data and memory-mapped lazy documents).
+
+Usage: python -m benchmarks.bench_tree_paint [--sizes 1000 10000 100000] [--repeat 3] [--stub]
+
+A real ttk.Treeview is used (and update_idletasks() is included in the timing) when a display
+is available; otherwise, or with --stub, an in-memory stand-in is used, which only measures the
+Python side and the number of rows inserted.
+"""
+import argparse
+import gc
+import tempfile
+import time
+from pathlib import Path
+
+from sol_handler import read_sol
+from gui.tree_model import LazyTreeModel
+from benchmarks.stub_treeview import StubTreeview
+from benchmarks.synthetic import write_synthetic_save
+
+
+def populate_eager(tree, data, parent=""):
+    """The pre-virtualization population: inserts every node of every nested container."""
+    if isinstance(data, dict):
+        for key, value in sorted(data.items()):
+            item_id = tree.insert(parent, "end", text=str(key), open=False)
+            if isinstance(value, (dict, list)):
+                populate_eager(tree, value, item_id)
+                tree.item(item_id, values=("(complex type)",))
+            else:
+                tree.item(item_id, values=(str(value),))
+    elif isinstance(data, list):
+        for i, item_value in enumerate(data):
+            item_id = tree.insert(parent, "end", text=f"[{i}]", open=False)
+            if isinstance(item_value, (dict, list)):
+                populate_eager(tree, item_value, item_id)
+                tree.item(item_id, values=("(complex type)",))
+            else:
+                tree.item(item_id, values=(str(item_value),))
+
+
+def populate_virtual(tree, data):
+    model = LazyTreeModel(tree)
+    if hasattr(data, 'is_loaded'):
+        for key in sorted(data.keys()):
+            if data.is_loaded(key):
+                model.populate({key: data[key]}, "")
+            else:
+                model.add_deferred("", data, key)
+    else:
+        model.populate(data, "")
+
+
+def _row_count(tree, parent=""):
+    children = tree.get_children(parent)
+    return len(children) + sum(_row_count(tree, child) for child in children)
+
+
+class _TreeFactory:
+    def __init__(self, use_stub):
+        self.root = None
+        if not use_stub:
+            try:
+                import tkinter as tk
+                from tkinter import ttk
+                self.root = tk.Tk()
+                self.root.withdraw()
+                self._ttk = ttk
+            except Exception as e:
+                print(f"[INFO] No display available ({e}); using the stub Treeview.")
+                self.root = None
+
+    @property
+    def kind(self):
+        return "ttk" if self.root else "stub"
+
+    def new(self):
+        if self.root:
+            tree = self._ttk.Treeview(self.root, columns=("Value",))
+            tree.pack()
+            return tree
+        return StubTreeview()
+
+    def dispose(self, tree):
+        if self.root:
+            tree.destroy()
+
+
+def time_first_paint(factory, path, mode, repeat):
+    """Returns (best seconds from reading the file to an idle tree, rows inserted)."""
+    timings, rows = [], 0
+    for _ in range(repeat):
+        gc.collect()
+        tree = factory.new()
+        start = time.perf_counter()
+        data = read_sol(path, lazy=(mode == 'lazy'))
+        if mode == 'eager':
+            populate_eager(tree, data)
+        else:
+            populate_virtual(tree, data)
+        tree.update_idletasks()
+        timings.append(time.perf_counter() - start)
+        rows = _row_count(tree)
+        if hasattr(data, 'release'):
+            data.release()
+        factory.dispose(tree)
+    return min(timings), rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--stub', action='store_true', help="Always use the in-memory Treeview stand-in.")
+    args = parser.parse_args(argv)
+
+    factory = _TreeFactory(args.stub)
+    print(f"[INFO] Treeview: {factory.kind}")
+    print(f"{'parts':>8} {'mode':>8} {'paint ms':>10} {'rows':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = Path(tmp) / f'synthetic_{size}.sol'
+            write_synthetic_save(path, num_parts=size)
+            for mode in ('eager', 'virtual', 'lazy'):
+                best, rows = time_first_paint(factory, path, mode, args.repeat)
+                print(f"{size:>8} {mode:>8} {best * 1000:>10.2f} {rows:>9}")
+    if factory.root:
+        factory.root.destroy()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Checks byte-for-byte round trips of unmodified saves and times incremental vs full saves.
+
+Usage: python -m benchmarks.bench_write_sol [--check] [--sizes 1000 100000] [files.sol ...]
+
+--check writes every synthetic save (AMF0 and AMF3, eager and lazy loading) and every
+given .sol file back without edits and fails if a single byte differs.
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sol_handler import AMF0, AMF3, decode_sol, encode_sol, read_sol, write_sol
+from benchmarks.synthetic import write_synthetic_save
+
+
+def check_round_trip(path, lazy):
+    """Returns None when saving an unmodified document reproduces the file, else a message."""
+    original = Path(path).read_bytes()
+    with tempfile.TemporaryDirectory() as tmp:
+        copy = Path(tmp) / Path(path).name
+        shutil.copyfile(path, copy)
+        document = read_sol(copy, lazy=lazy)
+        # A fresh target: saving over the identical source would be skipped by write_sol
+        target = copy.with_name('round_trip.sol')
+        write_sol(target, document, backups=0)
+        written = target.read_bytes()
+        if hasattr(document, 'release'):
+            document.release()
+    if written != original:
+        first = next((i for i, (a, b) in enumerate(zip(written, original)) if a != b), min(len(written), len(original)))
+        return f"differs from byte {first} ({len(written)} vs {len(original)} bytes)"
+    return None
+
+
+def run_checks(paths, sizes):
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        targets = list(paths)
+        for size in sizes:
+            for amf_version in (AMF0, AMF3):
+                path = Path(tmp) / f'synthetic_{size}_amf{amf_version}.sol'
+                write_synthetic_save(path, num_parts=size, amf_version=amf_version)
+                targets.append(path)
+        for path in targets:
+            for lazy in (False, True):
+                problem = check_round_trip(path, lazy)
+                status = "ok" if problem is None else f"FAIL: {problem}"
+                print(f"[{'lazy' if lazy else 'eager'}] {Path(path).name}: {status}")
+                failures += problem is not None
+    return failures
+
+
+def time_saves(sizes, repeat):
+    print(f"{'parts':>8} {'amf':>4} {'full ms':>9} {'1 key ms':>9} {'parts ms':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            for amf_version in (AMF0, AMF3):
+                path = Path(tmp) / f'synthetic_{size}.sol'
+                write_synthetic_save(path, num_parts=size, amf_version=amf_version)
+                document = read_sol(path)
+                full = _best(repeat, lambda: encode_sol(dict(document), document.sol_name, amf_version))
+
+                def edit_gold():
+                    document['gold'] += 1
+
+                def edit_parts():
+                    document['parts'][0][1] += 1
+                    document.mark_dirty('parts')
+
+                def save_after(edit):
+                    edit()
+                    write_sol(path, document, backups=0)
+                scalar = _best(repeat, lambda: save_after(edit_gold))
+                parts = _best(repeat, lambda: save_after(edit_parts))
+                assert decode_sol(path.read_bytes()) == document
+                print(f"{size:>8} {amf_version:>4} {full * 1000:>9.2f} {scalar * 1000:>9.2f} {parts * 1000:>9.2f}")
+
+
+def _best(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('files', nargs='*', help="Real .sol files to include in --check (they are copied, never modified).")
+    parser.add_argument('--check', action='store_true', help="Only run the byte-for-byte round-trip checks.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.check or args.files:
+        failures = run_checks(args.files, args.sizes)
+        if failures:
+            print(f"{failures} round trip(s) failed.")
+            sys.exit(1)
+        print("All round trips are byte-for-byte identical.")
+        return
+    time_saves(args.sizes, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+In-memory stand-in for ttk.Treeview so tree population can be timed without a display.
+"""
+import itertools
+
+
+class StubTreeview:
+    """Implements the subset of the ttk.Treeview item API used by the editor and counts inserts."""
+
+    def __init__(self):
+        self._items = {'': {'text': '', 'values': (), 'open': True, 'parent': None, 'children': []}}
+        self._ids = itertools.count(1)
+        self.insert_count = 0
+
+    def insert(self, parent, index, iid=None, text='', values=(), open=False, **kw):
+        iid = iid or f'I{next(self._ids):03X}'
+        self._items[iid] = {'text': text, 'values': tuple(values), 'open': open, 'parent': parent, 'children': []}
+        siblings = self._items[parent]['children']
+        if index == 'end':
+            siblings.append(iid)
+        else:
+            siblings.insert(index, iid)
+        self.insert_count += 1
+        return iid
+
+    def item(self, iid, option=None, **kw):
+        item = self._items[iid]
+        if kw:
+            for key, value in kw.items():
+                item[key] = tuple(value) if key == 'values' else value
+            return None
+        if option is not None:
+            return item.get(option)
+        return dict(item)
+
+    def delete(self, *iids):
+        for iid in iids:
+            if iid not in self._items:
+                continue
+            for child in list(self._items[iid]['children']):
+                self.delete(child)
+            self._items[self._items[iid]['parent']]['children'].remove(iid)
+            del self._items[iid]
+
+    def get_children(self, iid=''):
+        return tuple(self._items[iid]['children'])
+
+    def parent(self, iid):
+        return self._items[iid]['parent'] or ''
+
+    def exists(self, iid):
+        return iid in self._items
+
+    def update_idletasks(self):
+        pass
@@ -0,0 +1,203 @@
+"""
+Times the whole load/edit/save pipeline on synthetic saves and writes machine-readable results.
+
+Usage: python -m benchmarks.suite [--sizes 1000 10000 100000] [--amf 0 3] [--repeat 5]
+                                  [--stub] [--output results.json] [--compare previous.json]
+
+Cases per save size and AMF version:
+  load              read the file into memory
+  decode            decode_sol on the bytes in memory
+  lazy_index        read_sol(lazy=True): memory-map and index the top-level keys
+  populate_eager    insert every node into a Treeview (the pre-virtualization behaviour)
+  populate_virtual  LazyTreeModel first paint (top level plus placeholders)
+  expand_parts      open the 'parts' node in the virtual tree
+  update_value      set one nested value through sol_edits.set_path
+  add_all_parts     compute the 'Add All' parts list
+  search_index      build the search index of the whole document
+  search_prefix     prefix search for a part name in that index
+  search_regex      regex search in that index
+  export_json       sol_json.export_json in compact mode, into memory
+  import_json       sol_json.import_json of that text
+  save_incremental  write_sol after a single-value update
+  save_full         write_sol with every key dirty
+
+A real ttk.Treeview is used when a display is available, otherwise (or with --stub) an
+in-memory stand-in. Results are written as JSON together with the git commit, Python
+version and platform; --compare prints the ratio against an earlier results file.
+"""
+import argparse
+import gc
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sol_handler import AMF0, decode_sol, read_sol, write_sol
+from sol_edits import all_parts, set_path
+from sol_index import PREFIX, REGEX, SearchIndex
+from sol_json import export_json, import_json
+from gui.tree_model import LazyTreeModel
+from benchmarks.bench_tree_paint import _TreeFactory, populate_eager
+from benchmarks.synthetic import write_synthetic_save
+
+SCHEMA_VERSION = 1
+
+
+def time_case(func, repeat, setup=None):
+    """Runs setup() (untimed) and func(state) `repeat` times; returns the list of timings in seconds."""
+    timings = []
+    for _ in range(repeat):
+        state = setup() if setup is not None else None
+        gc.collect()
+        start = time.perf_counter()
+        func(state)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_cases(path, factory, repeat, eager_limit):
+    """Yields (case name, timings) for one synthetic save."""
+    raw = path.read_bytes()
+    yield 'load', time_case(lambda _: path.read_bytes(), repeat)
+    yield 'decode', time_case(lambda _: decode_sol(raw), repeat)
+    yield 'lazy_index', time_case(lambda _: read_sol(path, lazy=True).release(), repeat)
+
+    document = decode_sol(raw)
+    num_parts = len(document['parts'])
+
+    def with_tree(populate):
+        def run(tree):
+            populate(tree)
+            tree.update_idletasks()
+        return run
+
+    trees = []
+
+    def new_tree():
+        tree = factory.new()
+        trees.append(tree)
+        return tree
+
+    if num_parts <= eager_limit:
+        yield 'populate_eager', time_case(with_tree(lambda tree: populate_eager(tree, document)), repeat, new_tree)
+    yield 'populate_virtual', time_case(with_tree(lambda tree: LazyTreeModel(tree).populate(document)), repeat, new_tree)
+
+    def painted_tree():
+        tree = new_tree()
+        model = LazyTreeModel(tree)
+        model.populate(document)
+        parts_item = next(item for item in tree.get_children() if tree.item(item, "text") == 'parts')
+        return model, parts_item
+    yield 'expand_parts', time_case(lambda state: state[0].expand(state[1]), repeat, painted_tree)
+    for tree in trees:
+        factory.dispose(tree)
+
+    middle = num_parts // 2
+    counter = iter(range(10**9))
+    yield 'update_value', time_case(lambda _: set_path(document, ['parts', middle, 1], next(counter)), repeat)
+    yield 'add_all_parts', time_case(lambda _: all_parts(document['parts']), repeat)
+    yield 'search_index', time_case(lambda _: SearchIndex.build(document), repeat)
+    index = SearchIndex.build(document)
+    yield 'search_prefix', time_case(lambda _: index.search('part_sword_grip_1', PREFIX), repeat)
+    yield 'search_regex', time_case(lambda _: index.search(r'grip_\d+7$', REGEX), repeat)
+    yield 'export_json', time_case(lambda _: export_json(document, io.StringIO(), compact=True), repeat)
+    exported = io.StringIO()
+    export_json(document, exported, compact=True)
+    yield 'import_json', time_case(lambda _: import_json(io.StringIO(exported.getvalue())), repeat)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        target = Path(tmp) / path.name
+        target.write_bytes(raw)
+        saved = read_sol(target)
+
+        def edit_one(_=None):
+            set_path(saved, ['parts', middle, 1], next(counter))
+        yield 'save_incremental', time_case(lambda _: write_sol(target, saved, backups=0), repeat, edit_one)
+
+        def edit_all(_=None):
+            edit_one()
+            saved.mark_all_dirty()
+        yield 'save_full', time_case(lambda _: write_sol(target, saved, backups=0), repeat, edit_all)
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                             cwd=Path(__file__).resolve().parent, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def run_suite(sizes, amf_versions, repeat, use_stub=False, eager_limit=100000):
+    factory = _TreeFactory(use_stub)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for amf_version in amf_versions:
+            for size in sizes:
+                path = Path(tmp) / f'synthetic_{size}_amf{amf_version}.sol'
+                file_bytes = write_synthetic_save(path, num_parts=size, amf_version=amf_version)
+                for case, timings in run_cases(path, factory, repeat, eager_limit):
+                    result = {'case': case, 'parts': size, 'amf': amf_version, 'file_bytes': file_bytes,
+                              'runs': len(timings), 'best_s': min(timings), 'median_s': statistics.median(timings)}
+                    results.append(result)
+                    print(f"{case:>17} {size:>8} {amf_version:>4} {result['best_s'] * 1000:>10.3f} {result['median_s'] * 1000:>10.3f}")
+    if factory.root:
+        factory.root.destroy()
+    meta = {
+        'schema': SCHEMA_VERSION,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'treeview': factory.kind,
+        'repeat': repeat,
+    }
+    return {'meta': meta, 'results': results}
+
+
+def compare(current, previous):
+    """Prints current/previous best-time ratios for the cases both runs have in common."""
+    def key(r):
+        return r['case'], r['parts'], r['amf']
+    before = {key(r): r for r in previous['results']}
+    print(f"\nCompared with {previous['meta'].get('commit') or 'unknown commit'} ({previous['meta'].get('timestamp')}):")
+    print(f"{'case':>17} {'parts':>8} {'amf':>4} {'before ms':>10} {'now ms':>10} {'ratio':>7}")
+    for r in current['results']:
+        old = before.get(key(r))
+        if old is None:
+            continue
+        ratio = r['best_s'] / old['best_s'] if old['best_s'] else float('inf')
+        print(f"{r['case']:>17} {r['parts']:>8} {r['amf']:>4} {old['best_s'] * 1000:>10.3f} {r['best_s'] * 1000:>10.3f} {ratio:>7.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help="Number of [name, count] entries in the synthetic 'parts' list.")
+    parser.add_argument('--amf', type=int, nargs='+', choices=(0, 3), default=[AMF0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--stub', action='store_true', help="Always use the in-memory Treeview stand-in.")
+    parser.add_argument('--eager-limit', type=int, default=100000,
+                        help="Skip populate_eager above this many parts (it is very slow on a real Treeview).")
+    parser.add_argument('--output', type=Path, help="Write the results as JSON to this file.")
+    parser.add_argument('--compare', type=Path, help="Earlier --output file to compare against.")
+    args = parser.parse_args(argv)
+
+    print(f"{'case':>17} {'parts':>8} {'amf':>4} {'best ms':>10} {'median ms':>10}")
+    report = run_suite(args.sizes, args.amf, args.repeat, args.stub, args.eager_limit)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"[INFO] Results written to {args.output}")
+    if args.compare:
+        compare(report, json.loads(args.compare.read_text()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Generates synthetic Jacksmith-shaped .sol saves for benchmarking.
+"""
+import random
+
+from sol_handler import AMF0, encode_sol
+
+PART_CATEGORIES = ['sword_grip', 'sword_crossguard', 'sword_pommel',
+                   'arrow_head', 'arrow_fletching',
+                   'mace_shaft', 'mace_head',
+                   'shield_body', 'shield_crest', 'shield_paint']
+DESIGN_CODES = ['AX', 'BW', 'MA', 'PI', 'SH', 'SW']
+
+
+def make_save_data(num_parts=1000, num_weapons=50, seed=0, nest_depth=3, history_days=0):
+    """Builds a dict shaped like a Jacksmith save with `num_parts` [name, count] entries.
+
+    `nest_depth` levels of nested objects are added under 'progress' to exercise deep trees.
+    `history_days` > 0 adds a 'history' object of per-day number lists (ints and floats).
+    """
+    rng = random.Random(seed)
+    per_category = max(1, -(-num_parts // len(PART_CATEGORIES)))
+    parts = []
+    for cat in PART_CATEGORIES:
+        for i in range(1, per_category + 1):
+            if len(parts) == num_parts:
+                break
+            parts.append([f'part_{cat}_{i}', rng.randint(0, 99)])
+    parts.sort(key=lambda x: x[0])
+
+    weapons = []
+    for i in range(num_weapons):
+        weapons.append({
+            'type': rng.choice(DESIGN_CODES),
+            'quality': rng.random() * 100,
+            'name': f'Weapon {i}',
+            'parts': [rng.choice(parts)[0] for _ in range(3)] if parts else [],
+            'sold': rng.random() < 0.5,
+        })
+
+    data = {
+        'gold': rng.randint(0, 10**6),
+        'day': rng.randint(1, 500),
+        'playerName': 'Benchmark',
+        'parts': parts,
+        'newdesigntags': [f'{code}-{i:02}' for code in DESIGN_CODES for i in range(1, 15)],
+        'weapons': weapons,
+        'settings': {'music': 0.8, 'sound': 1.0, 'quality': 'high', 'tutorial': {'done': True, 'step': 12}},
+        'progress': _make_nested(rng, nest_depth),
+    }
+    if history_days:
+        data['history'] = {
+            'gold': [rng.randint(0, 10**6) for _ in range(history_days)],
+            'sold': [rng.randint(0, 40) for _ in range(history_days)],
+            'quality': [rng.random() * 100 for _ in range(history_days)],
+        }
+    return data
+
+
+def _make_nested(rng, depth, width=3):
+    node = {'unlocked': rng.random() < 0.5, 'score': rng.randint(0, 1000), 'label': f'level {depth}'}
+    if depth > 0:
+        for i in range(width):
+            node[f'stage_{i}'] = _make_nested(rng, depth - 1, width)
+    return node
+
+
+def write_synthetic_save(path, num_parts=1000, num_weapons=50, seed=0, amf_version=AMF0, nest_depth=3, history_days=0):
+    """Writes a synthetic save to `path` and returns the number of bytes written."""
+    data = encode_sol(make_save_data(num_parts, num_weapons, seed, nest_depth, history_days), 'savegame', amf_version)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data)
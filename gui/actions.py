@@ -2,14 +2,32 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from pathlib import Path
-import json
+import time
 import traceback # Added import
 
-from sol_handler import read_sol, write_sol, find_jacksmith_sol_folder
+from sol_handler import read_sol, write_sol, write_sol_bytes, find_jacksmith_sol_folder, LazySolDocument, SolDocument
+from sol_cache import default_cache
+from sol_history import HistoryError, history_for
+from sol_diff import diff
+from sol_edits import MISSING, format_path
+from sol_json import export_json, import_json
+from .undo import UndoJournal
+from .doc_cache import file_signature
+from .folder_watcher import scan_folder
+from instrumentation import span
+
+
+class ExternalChangeError(Exception):
+    """Raised by a save that finds the file changed by another program since it was loaded or saved."""
+
 
 class SolEditorActions:
     def __init__(self, app_instance):
         self.app = app_instance
+        self._document_holds = {} # id(document) -> number of background jobs still using it
+        self._detach_when_dropped = set() # ids of cached documents to detach once no job holds them
+        self._disk_signature = None # (mtime, size) of the open file as loaded or last saved by us
+        self._asking_about_change = False
 
     def select_jacksmith_folder(self):
         # Renamed from select_sol_folder_gui_action to match the call from app.py
@@ -34,10 +52,11 @@ class SolEditorActions:
             
             # List .sol files from the currently set self.app.current_sol_folder
             if self.app.current_sol_folder and self.app.current_sol_folder.exists():
-                sol_files_all = self.app.current_sol_folder.glob("*.sol")
-                sol_files = [f for f in sol_files_all if "backup" not in f.name.lower()] # Filter out backups
+                listing = scan_folder(self.app.current_sol_folder) # Backups are filtered out
+                sol_files = sorted(listing)
+                self.app.watcher.watch(self.app.current_sol_folder, listing)
                 if sol_files:
-                    self.app.update_sol_file_list_display([f.name for f in sol_files])
+                    self.app.update_sol_file_list_display(sol_files)
                     self.app.show_feedback("Folder Selected", f"Folder '{self.app.current_sol_folder.name}' selected. Found {len(sol_files)} .sol files (backups excluded).", kind='info')
                 else:
                     self.app.update_sol_file_list_display([])
@@ -70,99 +89,286 @@ class SolEditorActions:
             self.app.show_feedback("Error", f"File {filename} not found.", kind='error')
             return
 
+        # Write pending edits of the current file before switching away from it
+        self.app.autosave.flush('switch')
+
+        # Recently viewed and unchanged on disk: reuse the document and its tree rows
+        cached = self.app.doc_cache.take(sol_path)
+        if cached is not None:
+            self.app.io_worker.cancel_category('load')
+            self._show_document(filename, sol_path, cached.document, cached.signature, cached.tree_state)
+            self.app.clear_progress(f"Switched to {filename} (cached)")
+            return
+
+        # Decoding runs on a worker thread; selecting another file cancels this load.
+        self.app.show_progress(0.0, f"Loading {filename}...")
+        self.app.io_worker.submit(
+            self._read_sol_job, sol_path, self.app.lazy_loading, category='load',
+            on_progress=self.app.show_progress,
+            on_done=lambda result: self._on_sol_loaded(filename, sol_path, *result),
+            on_error=lambda e, details: self._on_sol_load_failed(filename, e, details),
+            on_cancelled=lambda result: self._release_document(result and result[0]),
+        )
+
+    @staticmethod
+    def _read_sol_job(job, sol_path, lazy):
+        message = f"Loading {sol_path.name}..."
+        # Taken before reading, so a write that happens during the read is seen as a later change
+        signature = file_signature(sol_path)
+        document = read_sol(sol_path, lazy=lazy, progress=lambda done, total: job.report(done / total, message),
+                            cache=default_cache())
+        return document, signature
+
+    def _on_sol_loaded(self, filename, sol_path, document, signature):
         try:
-            self.app.current_data = read_sol(sol_path)
-            self.app.current_sol_path = sol_path # Store Path object
-            self.app.populate_data_tree(self.app.current_data)
-            self.app.show_feedback("Loaded", f"File {filename} loaded.", kind='info')
-            self.app.enable_editing_ui()
+            self._show_document(filename, sol_path, document, signature)
+            if isinstance(document, LazySolDocument):
+                self.store_in_decode_cache(document) # A lazy miss was only indexed, not stored
+            self.app.clear_progress(f"Loaded {filename}")
+            self.app.show_feedback("Loaded", f"File {filename} loaded.", kind='info',
+                                   group='loaded', summary="{count} files loaded")
         except Exception as e:
-            print(f"[ERROR] Loading {filename}: {type(e).__name__} - {e}")
-            detailed_traceback = traceback.format_exc()
-            print(detailed_traceback)
-            self.app.show_feedback("Error", f"Could not load file {filename}.\n{e}", kind='error')
-            self.app.current_data = None
-            self.app.current_sol_path = None
-            self.app.clear_data_tree()
-            self.app.disable_editing_ui()
+            self._on_sol_load_failed(filename, e, traceback.format_exc())
+
+    def _show_document(self, filename, sol_path, document, signature, tree_state=None):
+        """Makes `document` the current one, keeping the previous document in the cache."""
+        self.stash_current_document()
+        self.app.current_data = document
+        self.app.current_sol_path = sol_path # Store Path object
+        self._disk_signature = signature
+        if tree_state is not None:
+            self.app.attach_data_tree(tree_state)
+        else:
+            self.app.journal = UndoJournal()
+            self.app.populate_data_tree(self.app.current_data)
+            self.app.search.start(document)
+        self.app.enable_editing_ui()
+
+    def _on_sol_load_failed(self, filename, e, detailed_traceback):
+        print(f"[ERROR] Loading {filename}: {type(e).__name__} - {e}")
+        print(detailed_traceback)
+        self.app.clear_progress(f"Could not load {filename}")
+        self.app.show_feedback("Error", f"Could not load file {filename}.\n{e}", kind='error')
+        self.stash_current_document()
+        self.app.current_data = None
+        self.app.current_sol_path = None
+        self.app.journal = UndoJournal()
+        self.app.clear_data_tree()
+        self.app.disable_editing_ui()
+
+    def stash_current_document(self):
+        """Moves the displayed document and its detached tree rows into the document cache."""
+        document, sol_path = self.app.current_data, self.app.current_sol_path
+        if not isinstance(document, SolDocument) or not isinstance(sol_path, Path):
+            self.release_current_document()
+            return
+        tree_state = self.app.detach_data_tree()
+        if isinstance(document, LazySolDocument):
+            if id(document) in self._document_holds:
+                # A save or export may still be encoding from the mapped bytes; detached by drop_document
+                self._detach_when_dropped.add(id(document))
+            else:
+                document.detach() # Cached copies must not keep the file mapped
+        row_count = tree_state[0].row_count if tree_state else 0
+        # Cleared first so an immediate eviction of this very entry can release it
+        self.app.current_data, self.app.current_sol_path = None, None
+        # Cached under the signature the document matches, so a file changed meanwhile is a miss
+        self.app.doc_cache.put(sol_path, document, tree_state, row_count, self._disk_signature)
+
+    def discard_current_document(self):
+        """Drops the displayed document without caching it, e.g. because the file changed on disk."""
+        self.app.discard_tree_state(self.app.detach_data_tree())
+        self.release_current_document()
+        self.app.current_data, self.app.current_sol_path = None, None
+
+    def on_cached_document_evicted(self, entry):
+        self.app.discard_tree_state(entry.tree_state)
+        self._release_if_unused(entry.document)
+
+    def release_current_document(self):
+        """Releases the memory map of a lazily loaded document before switching files.
+
+        Documents still used by a background save/export are released when that job finishes.
+        """
+        if id(self.app.current_data) not in self._document_holds:
+            self._release_document(self.app.current_data)
+
+    def _release_document(self, document):
+        if isinstance(document, LazySolDocument):
+            try:
+                document.release()
+            except Exception as e:
+                print(f"[WARN] Could not release previous document: {e}")
+
+    def _release_if_unused(self, document):
+        if (id(document) not in self._document_holds and document is not self.app.current_data
+                and not self.app.doc_cache.contains_document(document)):
+            self._release_document(document)
+
+    def hold_document(self, document):
+        self._document_holds[id(document)] = self._document_holds.get(id(document), 0) + 1
+
+    def drop_document(self, document):
+        remaining = self._document_holds.pop(id(document), 1) - 1
+        if remaining:
+            self._document_holds[id(document)] = remaining
+            return
+        if id(document) in self._detach_when_dropped:
+            self._detach_when_dropped.discard(id(document))
+            if self.app.doc_cache.contains_document(document):
+                try:
+                    document.detach()
+                except Exception as e:
+                    print(f"[WARN] Could not detach cached document: {e}")
+        self._release_if_unused(document)
+
+    def store_in_decode_cache(self, document):
+        """Stores the unedited `document` in the decode cache (if enabled) on a worker thread."""
+        if default_cache() is None or document.dirty_keys:
+            return
+        self.hold_document(document)
+        self.app.io_worker.submit(
+            self._decode_cache_job, document,
+            on_done=lambda stored: self.drop_document(document),
+            on_error=lambda e, details: self._on_decode_cache_failed(e, document),
+            on_cancelled=lambda _: self.drop_document(document),
+        )
+
+    @staticmethod
+    def _decode_cache_job(job, document):
+        cache = default_cache()
+        with span('decode_cache.store'):
+            return cache.store(document)
+
+    def _on_decode_cache_failed(self, e, document):
+        # The cache only saves time on the next open; not worth interrupting the user for
+        self.drop_document(document)
+        print(f"[WARN] Could not store the document in the decode cache: {type(e).__name__} - {e}")
+
+    def mark_dirty(self, keys_path):
+        """Tells the document which top-level entry changed so only that one is re-encoded on save."""
+        if keys_path and isinstance(self.app.current_data, SolDocument):
+            self.app.current_data.mark_dirty(keys_path[0])
+
+    def record_edit(self, label, keys_path, old, new):
+        """Bookkeeping of an edit already applied to the document: dirty entry, undo step and search index."""
+        self.mark_dirty(keys_path)
+        self.app.journal.record(label, keys_path, old, new)
+        self.app.search.record(keys_path, old, new)
 
     def update_value(self, item_id, new_value_str):
+        with span('update_value') as s:
+            self._update_value(item_id, new_value_str, s)
+
+    def _update_value(self, item_id, new_value_str, current_span):
         if not self.app.current_data:
             self.app.show_feedback("Error", "No data loaded.", kind='error')
             return
 
+        # Direct reference to the container and key/index of the item, kept by the tree model
+        ref = self.app.tree_model.ref(item_id) if self.app.tree_model else None
         keys_path = self.app.get_keys_for_item(item_id)
-        if not keys_path:
+        if ref is None or not keys_path or self.app.tree_model.is_chunk(item_id):
             self.app.show_feedback("Error", "Could not find item path.", kind='error')
             return
 
-        current_level = self.app.current_data
-        for i, key_text in enumerate(keys_path[:-1]):
-            if isinstance(current_level, dict):
-                current_level = current_level[key_text]
-            elif isinstance(current_level, list):
-                if key_text.startswith("[") and key_text.endswith("]"):
-                    try:
-                        idx = int(key_text[1:-1])
-                        current_level = current_level[idx]
-                    except (ValueError, IndexError) as e:
-                        self.app.show_feedback("Error", f"Error accessing list element '{key_text}': {e}", kind='error')
-                        return
-                else:
-                    self.app.show_feedback("Error", f"Malformed list index '{key_text}' in path.", kind='error')
-                    return
-            else:
-                self.app.show_feedback("Error", f"Cannot traverse path at '{key_text}'. Not a dict or list.", kind='error')
-                return
-        
-        last_key_text = keys_path[-1]
-        original_value = None
-
-        if isinstance(current_level, dict):
-            original_value = current_level[last_key_text]
-        elif isinstance(current_level, list):
-            if last_key_text.startswith("[") and last_key_text.endswith("]"):
-                try:
-                    idx = int(last_key_text[1:-1])
-                    original_value = current_level[idx]
-                except (ValueError, IndexError) as e:
-                    self.app.show_feedback("Error", f"Error accessing list element '{last_key_text}' for original value: {e}", kind='error')
-                    return
-            else:
-                self.app.show_feedback("Error", f"Malformed list index '{last_key_text}' for original value.", kind='error')
-                return
-        else:
-            self.app.show_feedback("Error", "Cannot get original value. Parent is not a dict or list.", kind='error')
+        current_level, last_key = ref
+        try:
+            original_value = current_level[last_key]
+        except (KeyError, IndexError, TypeError) as e:
+            self.app.show_feedback("Error", f"Error accessing '{last_key}' for original value: {e}", kind='error')
             return
 
         try:
             converted_value = self.app._convert_value(new_value_str, original_value)
             
-            if isinstance(current_level, dict):
-                current_level[last_key_text] = converted_value
-            elif isinstance(current_level, list):
-                idx = int(last_key_text[1:-1]) 
-                current_level[idx] = converted_value
+            current_level[last_key] = converted_value
+            self.record_edit(f"Update {format_path(keys_path)}", keys_path, original_value, converted_value)
             
             self.app._update_tree_display(converted_value, item_id) 
-            print(f"[INFO] Value updated for {' -> '.join(map(str, keys_path))} to: {converted_value}")
-            self.save_sol_file() # Auto-save after successful update
+            current_span.add('values_updated')
+            self.app.status_var.set(f"Updated {' -> '.join(map(str, keys_path))}")
+            self.app.autosave.mark_dirty() # Debounced auto-save after successful update
 
         except ValueError as e: 
-            print(f"[ERROR] Value Update Error for {' -> '.join(keys_path)}: {type(e).__name__} - {e}")
+            print(f"[ERROR] Value Update Error for {' -> '.join(map(str, keys_path))}: {type(e).__name__} - {e}")
             detailed_traceback = traceback.format_exc()
             print(detailed_traceback)
             self.app.show_feedback("Update Error", f"Invalid value: {e}", kind='error')
         except Exception as e:
-            print(f"[ERROR] Value Update Error for {' -> '.join(keys_path)}: {type(e).__name__} - {e}")
+            print(f"[ERROR] Value Update Error for {' -> '.join(map(str, keys_path))}: {type(e).__name__} - {e}")
             detailed_traceback = traceback.format_exc()
             print(detailed_traceback)
             self.app.show_feedback("Update Error", f"Could not update value.\nError: {e}", kind='error')
 
-    def save_sol_file(self):
+    def undo(self):
+        self._replay(self.app.journal.undo, "Undid", "Nothing to undo", undone=True)
+
+    def redo(self):
+        self._replay(self.app.journal.redo, "Redid", "Nothing to redo", undone=False)
+
+    def _replay(self, journal_method, verb, nothing_message, undone):
+        if not self.app.current_data:
+            return
+        with span('undo_redo', verb):
+            try:
+                step = journal_method(self.app.current_data)
+            except Exception as e:
+                print(f"[ERROR] {verb} failed: {type(e).__name__} - {e}")
+                print(traceback.format_exc())
+                self.app.show_feedback("Undo Error", f"Could not {verb.lower()[:-1]} the last step.\nError: {e}", kind='error')
+                return
+            if step is None:
+                self.app.status_var.set(nothing_message)
+                return
+            for patch in step.patches:
+                old, new = (patch.new, patch.old) if undone else (patch.old, patch.new)
+                self.app.search.record(patch.path, old, new)
+                self._refresh_path(patch.path)
+        if self.app.selected_tree_item_id and self.app.data_tree.exists(self.app.selected_tree_item_id):
+            self.app.on_tree_item_select(None) # Show the restored value in the edit box
+        self.app.status_var.set(f"{verb}: {step.label}")
+        self.app.autosave.mark_dirty()
+
+    def _refresh_path(self, path):
+        """Redraws the row of `path` (or of its parent when the key was added/removed), if it is inserted."""
+        model = self.app.tree_model
+        if not model:
+            return
+        item_id = model.find(path)
+        if item_id is not None:
+            try:
+                value = model.value(item_id)
+            except (KeyError, IndexError, TypeError): # The row is still there but its key was removed
+                pass
+            else:
+                self.app._update_tree_display(value, item_id)
+                return
+        parent_id = model.find(path[:-1]) if len(path) > 1 else None
+        if parent_id is not None:
+            self.app._update_tree_display(model.value(parent_id), parent_id)
+        elif len(path) == 1:
+            self.app.populate_data_tree(self.app.current_data) # A top-level key came or went
+
+    def auto_save(self, edit_count):
+        """Flush callback of the auto-save scheduler: saves without a confirmation dialog."""
+        self.save_sol_file(auto_edits=edit_count)
+
+    def save_sol_file(self, auto_edits=None):
+        """Saves the current file; auto_edits is the number of edits an auto-save flushes.
+
+        The span only covers handing the save to the worker; write_sol has its own.
+        """
+        with span('save_sol_file', 'auto' if auto_edits is not None else 'manual'):
+            self._save_sol_file(auto_edits)
+
+    def _save_sol_file(self, auto_edits):
         if not self.app.current_sol_path or not self.app.current_data:
-            self.app.show_feedback("No data", "No .sol file loaded or data to save.", kind='warning')
+            if auto_edits is None:
+                self.app.show_feedback("No data", "No .sol file loaded or data to save.", kind='warning')
             return
+        if auto_edits is None:
+            self.app.autosave.mark_clean() # This save writes the pending edits too
         try:
             # current_sol_path should be a Path object from load_sol_file
             sol_path_obj = self.app.current_sol_path 
@@ -180,38 +386,106 @@ class SolEditorActions:
                     sol_path_obj = Path(self.app.current_sol_path)
                 else:
                     raise ValueError(f"Invalid file path type: {type(self.app.current_sol_path)}")
+        except Exception as e:
+            self._on_sol_save_failed(e, traceback.format_exc())
+            return
 
-            write_sol(sol_path_obj, self.app.current_data) # write_sol expects a Path object or string
-            self.app.show_feedback("Saved", f"File {sol_path_obj.name} saved.", kind='info')
+        # Encoding and writing run on a worker thread; back-to-back saves of the same file are coalesced.
+        document = self.app.current_data
+        save_key = ('save', str(sol_path_obj))
+        # A save queued behind a running one expects that write, not the signature known now
+        expected = None if self.app.io_worker.is_pending(save_key) else self._disk_signature
+        label = 'auto-save' if auto_edits is not None else 'save'
+        self.hold_document(document)
+        self.app.io_worker.submit_coalesced(
+            save_key, self._write_sol_job, sol_path_obj, document, expected, label,
+            on_progress=self.app.show_progress,
+            on_done=lambda result: self._on_sol_saved(sol_path_obj, document, *result, auto_edits),
+            on_error=lambda e, details: self._on_sol_save_failed(e, details, document),
+            on_cancelled=lambda _: self.drop_document(document),
+        )
 
-        except Exception as e:
-            print(f"--- Detailed Save Error ---")
-            print(f"Current SOL Path: {self.app.current_sol_path}")
-            print(f"Current SOL Path Type: {type(self.app.current_sol_path)}")
-            print(f"Error Type: {type(e).__name__}")
-            print(f"Error Message: {e}")
-            print(f"Traceback:")
-            detailed_traceback = traceback.format_exc()
-            print(detailed_traceback)
-            print(f"--- End Detailed Save Error ---")
-            
-            path_repr = "the file"
-            try:
-                if self.app.current_sol_path:
-                    if isinstance(self.app.current_sol_path, Path):
-                        path_repr = self.app.current_sol_path.name
-                    elif isinstance(self.app.current_sol_path, dict):
-                        path_repr = str(self.app.current_sol_path.get('path', self.app.current_sol_path))
-                    else:
-                        path_repr = str(self.app.current_sol_path)
-            except:
-                pass # Keep default "the file" if representation fails
-            
-            self.app.show_feedback(
-                "Save Error", 
-                f"Could not save file '{path_repr}'.\nError: {e}\n(See console for more details)", 
-                kind='error'
-            )
+    @staticmethod
+    def _write_sol_job(job, sol_path, document, expected_signature, label):
+        job.report(0.0, f"Saving {sol_path.name}...")
+        if expected_signature is not None and file_signature(sol_path) not in (expected_signature, None):
+            raise ExternalChangeError(f"{sol_path.name} was changed by another program.")
+        SolEditorActions._snapshot_before_write(sol_path, label)
+        start = time.perf_counter()
+        # write_sol expects a Path object or string; it replaces the file atomically and rotates backups
+        written = write_sol(sol_path, document)
+        return written, time.perf_counter() - start, file_signature(sol_path)
+
+    @staticmethod
+    def _snapshot_before_write(sol_path, label):
+        """Adds the version of `sol_path` that is about to be replaced to its history (worker thread)."""
+        history = history_for(sol_path)
+        if history is None:
+            return
+        try:
+            with span('history.snapshot', sol_path.name):
+                history.snapshot_file(sol_path, label)
+        except (OSError, HistoryError) as e:
+            # Not a reason to refuse the save; the rotating backups still hold the previous version
+            print(f"[WARN] Could not add {sol_path.name} to its history: {type(e).__name__} - {e}")
+
+    def _on_sol_saved(self, sol_path_obj, document, written, seconds, signature, auto_edits=None):
+        # Our own write keeps the cached copy valid
+        self.app.doc_cache.refresh(sol_path_obj, document, signature)
+        if self.app.history_panel is not None:
+            self.app.history_panel.refresh(sol_path_obj)
+        if document is self.app.current_data:
+            self._disk_signature = signature
+        self.drop_document(document)
+        if written:
+            self.app.autosave.record_write(seconds)
+        if not written:
+            self.app.clear_progress(f"{sol_path_obj.name} is unchanged; nothing written")
+            if auto_edits is None:
+                self.app.show_feedback("Saved", f"File {sol_path_obj.name} is already up to date.", kind='info')
+        else:
+            # Several saves in a row (auto-saves while editing, a save per file switch) share one toast
+            self.app.clear_progress()
+            message = (f"File {sol_path_obj.name} saved." if auto_edits is None else
+                       f"Auto-saved {sol_path_obj.name} ({auto_edits} edit(s), {seconds * 1000:.0f} ms)")
+            self.app.show_feedback("Saved", message, kind='info', group='saved',
+                                   summary="{count} saves written in {ms:.0f} ms", seconds=seconds)
+
+    def _on_sol_save_failed(self, e, detailed_traceback, document=None):
+        if document is not None:
+            self.drop_document(document)
+        if isinstance(e, ExternalChangeError):
+            self.app.clear_progress(f"Not saved: {e}")
+            if document is self.app.current_data:
+                self.on_external_change(file_signature(self.app.current_sol_path), unsaved=True)
+            return
+        self.app.clear_progress("Save failed")
+        print(f"--- Detailed Save Error ---")
+        print(f"Current SOL Path: {self.app.current_sol_path}")
+        print(f"Current SOL Path Type: {type(self.app.current_sol_path)}")
+        print(f"Error Type: {type(e).__name__}")
+        print(f"Error Message: {e}")
+        print(f"Traceback:")
+        print(detailed_traceback)
+        print(f"--- End Detailed Save Error ---")
+        
+        path_repr = "the file"
+        try:
+            if self.app.current_sol_path:
+                if isinstance(self.app.current_sol_path, Path):
+                    path_repr = self.app.current_sol_path.name
+                elif isinstance(self.app.current_sol_path, dict):
+                    path_repr = str(self.app.current_sol_path.get('path', self.app.current_sol_path))
+                else:
+                    path_repr = str(self.app.current_sol_path)
+        except:
+            pass # Keep default "the file" if representation fails
+        
+        self.app.show_feedback(
+            "Save Error", 
+            f"Could not save file '{path_repr}'.\nError: {e}\n(See console for more details)", 
+            kind='error'
+        )
 
     def export_to_json(self):
         if not self.app.current_data:
@@ -253,15 +527,134 @@ class SolEditorActions:
         if not save_path:
             return # User cancelled
 
-        try:
-            with open(save_path, 'w') as f:
-                json.dump(self.app.current_data, f, indent=4)
-            self.app.show_feedback("Exported", f"Data exported to {Path(save_path).name}", kind='info')
-        except Exception as e:
-            print(f"[ERROR] Exporting to JSON: {type(e).__name__} - {e}")
-            detailed_traceback = traceback.format_exc()
-            print(detailed_traceback)
-            self.app.show_feedback("Export Error", f"Could not export to JSON.\nError: {e}", kind='error')
+        document = self.app.current_data
+        self.hold_document(document)
+        self.app.show_progress(0.0, f"Exporting to {Path(save_path).name}...")
+        self.app.io_worker.submit(
+            self._export_json_job, save_path, document,
+            on_done=lambda _: self._on_json_exported(save_path, document),
+            on_error=lambda e, details: self._on_json_export_failed(e, details, document),
+        )
+
+    @staticmethod
+    def _export_json_job(job, save_path, document):
+        # Streamed entry by entry; AMF types JSON lacks (dates, bytes, typed objects...) are tagged
+        with span('export_json') as s:
+            s.add('json_chars', export_json(document, save_path))
+
+    def _on_json_exported(self, save_path, document):
+        self.drop_document(document)
+        self.app.clear_progress(f"Exported {Path(save_path).name}")
+        self.app.show_feedback("Exported", f"Data exported to {Path(save_path).name}", kind='info')
+
+    def _on_json_export_failed(self, e, detailed_traceback, document):
+        self.drop_document(document)
+        self.app.clear_progress("Export failed")
+        print(f"[ERROR] Exporting to JSON: {type(e).__name__} - {e}")
+        print(detailed_traceback)
+        self.app.show_feedback("Export Error", f"Could not export to JSON.\nError: {e}", kind='error')
+
+    def import_from_json(self):
+        """Replaces the contents of the open save with a JSON export as one undoable step; saving
+        (or the auto-save) writes it to the .sol file."""
+        if not self.app.current_data or not isinstance(self.app.current_sol_path, Path):
+            self.app.show_feedback("No data", "Load a .sol file first.", kind='warning')
+            return
+        json_path = filedialog.askopenfilename(
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+            initialdir=self.app.current_sol_path.parent,
+            title="Import from JSON"
+        )
+        if not json_path:
+            return
+        document = self.app.current_data
+        self.app.show_progress(0.0, f"Importing {Path(json_path).name}...")
+        self.app.io_worker.submit(
+            self._import_json_job, json_path,
+            on_done=lambda imported: self._on_json_imported(json_path, document, imported),
+            on_error=self._on_json_import_failed,
+        )
+
+    @staticmethod
+    def _import_json_job(job, json_path):
+        with span('import_json'):
+            return import_json(json_path)
+
+    def _on_json_imported(self, json_path, document, imported):
+        name = Path(json_path).name
+        if document is not self.app.current_data:
+            self.app.clear_progress(f"Import of {name} dropped: another file was opened")
+            return
+        if id(document) in self._document_holds:
+            # A save or export is still reading the document on a worker; replace it once that is done
+            self.app.master.after(self.app.io_worker.poll_interval_ms,
+                                  lambda: self._on_json_imported(json_path, document, imported))
+            return
+        if imported.amf_version != getattr(document, 'amf_version', imported.amf_version):
+            print(f"[WARN] {name} was exported from an AMF{imported.amf_version} file; "
+                  f"{self.app.current_sol_path.name} keeps AMF{document.amf_version}.")
+        with span('apply_json_import') as s, self.app.journal.group(f"Import {name}"):
+            # Refilled in the order of the file, so saving right away writes what was exported
+            old_values = {key: document[key] for key in document}
+            document.clear()
+            for key, value in imported.items():
+                document[key] = value
+                self.record_edit(f"Import {name}", (key,), old_values.pop(key, MISSING), value)
+            for key, old_value in old_values.items():
+                self.record_edit(f"Import {name}", (key,), old_value, MISSING)
+            s.add('values_updated', len(imported))
+        self.app.populate_data_tree(document)
+        self.app.clear_progress(f"Imported {name}; save to write it to {self.app.current_sol_path.name}")
+        self.app.autosave.mark_dirty()
+
+    def _on_json_import_failed(self, e, detailed_traceback):
+        self.app.clear_progress("Import failed")
+        print(f"[ERROR] Importing JSON: {type(e).__name__} - {e}")
+        print(detailed_traceback)
+        self.app.show_feedback("Import Error", f"Could not import the JSON file.\nError: {e}", kind='error')
+
+    def compare_with_file(self):
+        """Diffs the open document against another save (e.g. one of its backups) and highlights the
+        differences in the tree. Cancelling the file dialog removes the highlights."""
+        if not self.app.current_data or not isinstance(self.app.current_sol_path, Path):
+            self.app.show_feedback("No data", "Load a .sol file first.", kind='warning')
+            return
+        other_path = filedialog.askopenfilename(
+            filetypes=[("SOL files", "*.sol"), ("All files", "*.*")],
+            initialdir=self.app.current_sol_path.parent,
+            title=f"Compare {self.app.current_sol_path.name} With"
+        )
+        if not other_path:
+            self.app.clear_diff()
+            return
+
+        document = self.app.current_data
+        self.hold_document(document)
+        self.app.show_progress(0.0, f"Comparing with {Path(other_path).name}...")
+        self.app.io_worker.submit(
+            self._diff_job, Path(other_path), document, category='diff',
+            on_done=lambda changes: self._on_diff_done(Path(other_path), document, changes),
+            on_error=lambda e, details: self._on_diff_failed(e, details, document),
+            on_cancelled=lambda _: self.drop_document(document),
+        )
+
+    @staticmethod
+    def _diff_job(job, other_path, document):
+        # Reads `document` from the worker thread like a save does; lazy values decode under its lock
+        return diff(read_sol(other_path), document)
+
+    def _on_diff_done(self, other_path, document, changes):
+        self.drop_document(document)
+        self.app.clear_progress()
+        if document is self.app.current_data: # Otherwise the user has moved on to another file
+            self.app.show_diff(changes, other_path.name)
+
+    def _on_diff_failed(self, e, detailed_traceback, document):
+        self.drop_document(document)
+        self.app.clear_progress("Comparison failed")
+        print(f"[ERROR] Comparing: {type(e).__name__} - {e}")
+        print(detailed_traceback)
+        self.app.show_feedback("Compare Error", f"Could not compare the files.\nError: {e}", kind='error')
 
     def add_new_item(self):
         # This is a placeholder for future functionality
@@ -271,18 +664,175 @@ class SolEditorActions:
         # This is a placeholder for future functionality
         self.app.show_feedback("Not Implemented", "Deleting items is not yet implemented.", kind='info')
 
+    # --- Save history ---
+    def show_history(self):
+        """Opens the history panel of the open file."""
+        sol_path = self.app.current_sol_path
+        if not isinstance(sol_path, Path):
+            self.app.show_feedback("No file", "Open a .sol file to see its history.", kind='warning')
+            return
+        history = history_for(sol_path)
+        if history is None:
+            self.app.show_feedback("History off", "Save history is switched off (SOL_EDITOR_HISTORY_LIMIT=0).",
+                                   kind='warning')
+            return
+        if self.app.history_panel is None:
+            from .history import HistoryPanel
+            self.app.history_panel = HistoryPanel(self.app)
+        self.app.history_panel.show(sol_path, history)
+
+    def restore_snapshot(self, sol_path, history, snapshot):
+        """Writes the version of `snapshot` back to `sol_path`, keeping the current version in the history."""
+        save_key = ('save', str(sol_path))
+        if self.app.io_worker.is_pending(save_key):
+            self.app.show_feedback("Busy", f"{sol_path.name} is being saved; restore it once that is done.",
+                                   kind='warning')
+            return
+        document = self.app.current_data if sol_path == self.app.current_sol_path else None
+        if document is not None:
+            self.app.autosave.mark_clean() # Unsaved edits are replaced along with the file
+            self.hold_document(document)
+        self.app.show_progress(0.0, f"Restoring {sol_path.name}...")
+        # Under the save key: no save of this file runs meanwhile, and the watcher knows the write is ours
+        self.app.io_worker.submit_coalesced(
+            save_key, self._restore_job, sol_path, history, snapshot, document,
+            on_done=lambda signature: self._on_snapshot_restored(sol_path, snapshot, document, signature),
+            on_error=lambda e, details: self._on_restore_failed(sol_path, e, details, document),
+            on_cancelled=lambda _: self.drop_document(document) if document is not None else None,
+        )
+
+    @staticmethod
+    def _restore_job(job, sol_path, history, snapshot, document):
+        with span('history.restore', sol_path.name):
+            payload = history.restore_bytes(snapshot) # One keyframe and at most one delta
+            history.snapshot_file(sol_path, 'restore')
+            if isinstance(document, LazySolDocument):
+                document.detach() # Windows refuses to replace a file that is still memory-mapped
+            write_sol_bytes(sol_path, payload)
+        return file_signature(sol_path)
+
+    def _on_snapshot_restored(self, sol_path, snapshot, document, signature):
+        if document is not None:
+            self.drop_document(document)
+        if sol_path == self.app.current_sol_path:
+            self._disk_signature = signature
+            self.reload_current_file()
+        else:
+            self.app.clear_progress()
+        if self.app.history_panel is not None:
+            self.app.history_panel.refresh(sol_path)
+        self.app.show_feedback("Restored", f"{sol_path.name} restored to the version of {snapshot.when_text}.",
+                               kind='info')
+
+    def _on_restore_failed(self, sol_path, e, detailed_traceback, document):
+        if document is not None:
+            self.drop_document(document)
+            if document is self.app.current_data and document.dirty_keys:
+                self.app.autosave.mark_dirty() # The file was not replaced: the edits still need saving
+        print(f"[ERROR] Restoring {sol_path.name}: {type(e).__name__} - {e}")
+        print(detailed_traceback)
+        self.app.clear_progress(f"Could not restore {sol_path.name}")
+        self.app.show_feedback("Error", f"Could not restore {sol_path.name}.\n{e}", kind='error')
+
+    # --- Changes made by other programs (e.g. the game saving) ---
+    def on_folder_changed(self, folder, added, removed, modified, listing):
+        """FolderWatcher callback: updates the file list and checks the open file."""
+        if folder != self.app.current_sol_folder:
+            return
+        self.app.apply_sol_file_changes(added, removed)
+        sol_path = self.app.current_sol_path
+        if not isinstance(sol_path, Path) or sol_path.parent != folder:
+            return
+        if sol_path.name in removed:
+            print(f"[WARN] {sol_path.name} was deleted outside the editor; saving will create it again.")
+            self.app.status_var.set(f"{sol_path.name} was deleted outside the editor")
+        elif sol_path.name in listing and listing[sol_path.name] != self._disk_signature:
+            if not self.app.io_worker.is_pending(('save', str(sol_path))): # Else it is our own write
+                self.on_external_change(listing[sol_path.name])
+
+    def on_external_change(self, signature, unsaved=False):
+        """The open file was written by another program: reload it, merge our edits into it, or keep ours.
+
+        `unsaved` means a save was refused because of the change, so our version is not on disk.
+        """
+        if self._asking_about_change or not self.app.current_data:
+            return
+        has_edits = self.app.journal.can_undo or self.app.autosave.dirty or unsaved
+        self._asking_about_change = True
+        try:
+            choice = self.app.ask_external_change(self.app.current_sol_path.name, has_edits)
+        finally:
+            self._asking_about_change = False
+        if choice == 'keep':
+            self._disk_signature = signature # Stop asking; the next save overwrites the other version
+            if has_edits:
+                self.app.autosave.mark_dirty()
+        else:
+            self.reload_current_file(merge=choice == 'merge')
+
+    def reload_current_file(self, merge=False):
+        """Reads the open file again; with `merge`, the edits of the undo journal are applied to the new version."""
+        sol_path = self.app.current_sol_path
+        if not isinstance(sol_path, Path):
+            return
+        journal = self.app.journal if merge else None
+        self.app.autosave.mark_clean() # The edits are either dropped or re-applied to the new version
+        self.app.show_progress(0.0, f"Reloading {sol_path.name}...")
+        self.app.io_worker.submit(
+            self._read_sol_job, sol_path, self.app.lazy_loading, category='load',
+            on_progress=self.app.show_progress,
+            on_done=lambda result: self._on_sol_reloaded(sol_path, journal, *result),
+            on_error=lambda e, details: self._on_sol_load_failed(sol_path.name, e, details),
+            on_cancelled=lambda result: self._release_document(result and result[0]),
+        )
+
+    def _on_sol_reloaded(self, sol_path, journal, document, signature):
+        applied = skipped = 0
+        if journal is not None:
+            applied, skipped = journal.replay(document)
+        self.discard_current_document()
+        self._show_document(sol_path.name, sol_path, document, signature)
+        if isinstance(document, LazySolDocument):
+            self.store_in_decode_cache(document)
+        if not applied:
+            self.app.clear_progress(f"Reloaded {sol_path.name}")
+            return
+        self.app.autosave.mark_dirty()
+        message = f"Reloaded {sol_path.name} and re-applied {applied} edit(s)"
+        if skipped:
+            message += f"; {skipped} no longer apply"
+            print(f"[WARN] {skipped} edit(s) could not be applied to the new version of {sol_path.name}.")
+        self.app.clear_progress(message)
+
     def auto_select_sol_folder(self):
+        """Looks for the Jacksmith save folder on the worker thread and lists it when found."""
         print("[INFO] Attempting to auto-select Jacksmith folder...")
-        
-        auto_detected_folder = find_jacksmith_sol_folder() 
-        
+        self.app.status_var.set("Looking for the Jacksmith save folder...")
+        self.app.io_worker.submit(
+            self._find_sol_folder_job,
+            on_done=lambda result: self._on_sol_folder_found(*result),
+            on_error=self._on_sol_folder_search_failed,
+        )
+
+    @staticmethod
+    def _find_sol_folder_job(job):
+        auto_detected_folder = find_jacksmith_sol_folder()
         if auto_detected_folder and auto_detected_folder.exists() and auto_detected_folder.is_dir():
+            return auto_detected_folder, scan_folder(auto_detected_folder) # Backups are filtered out
+        return auto_detected_folder, None
+
+    def _on_sol_folder_found(self, auto_detected_folder, listing):
+        self.app.status_var.set("")
+        if self.app.current_sol_folder is not None:
+            return # Chosen by hand while the search ran
+
+        if listing is not None:
             self.app.current_sol_folder = auto_detected_folder
-            sol_files_all = auto_detected_folder.glob("*.sol")
-            sol_files = [f for f in sol_files_all if "backup" not in f.name.lower()] # Filter out backups
+            sol_files = sorted(listing)
+            self.app.watcher.watch(auto_detected_folder, listing)
             
             if sol_files:
-                self.app.update_sol_file_list_display([f.name for f in sol_files])
+                self.app.update_sol_file_list_display(sol_files)
                 self.app.show_feedback(
                     "Folder Auto-Selected", 
                     f"Folder '{auto_detected_folder.name}' auto-selected. Found {len(sol_files)} .sol files (backups excluded).", 
@@ -307,3 +857,8 @@ class SolEditorActions:
                 "Could not automatically find the Jacksmith .sol folder. Please use the 'Choose Jacksmith Folder' button to select it manually.", 
                 kind='info'
             )
+
+    def _on_sol_folder_search_failed(self, e, detailed_traceback):
+        print(f"[WARN] Looking for the Jacksmith folder failed: {type(e).__name__} - {e}")
+        print(detailed_traceback)
+        self.app.status_var.set("Choose the Jacksmith folder to list its saves")
@@ -1,16 +1,28 @@
 \
 import tkinter as tk
 from tkinter import ttk, messagebox
-import json
-import re
+from bisect import bisect_left
+from collections import deque
 from pathlib import Path
 
 from .widgets import (
     create_main_layout, setup_left_frame, setup_middle_frame, 
     setup_right_frame, setup_bottom_actions_frame
 )
-from .actions import SolEditorActions
-# sol_handler is used by actions.py, not directly here for now.
+from .tree_model import LazyTreeModel
+from .io_worker import IOWorker
+from .autosave import AutoSaveScheduler
+from .doc_cache import DocumentCache
+from .undo import MISSING, UndoJournal
+from .search import TreeSearch
+from .folder_watcher import FolderWatcher
+from .notifications import ERROR, Notifier
+from sol_handler import LazySolDocument
+from sol_edits import all_parts, all_design_tags, like_container
+import instrumentation
+
+METRICS_POLL_MS = 250
+DIFF_CONSOLE_LINES = 200 # Changes listed on the console after a comparison
 
 class SolEditorApp:
     def __init__(self, master):
@@ -23,6 +35,10 @@ class SolEditorApp:
         self.current_sol_path = None
         self.current_data = {}
         self.selected_tree_item_id = None 
+        # Memory-map saves and decode top-level values only when their node is opened/selected
+        self.lazy_loading = True
+        self.tree_model = None # Inserts data_tree rows only for opened nodes, created once data_tree exists
+        self.journal = UndoJournal() # Undo/redo steps of the displayed document
 
         # UI elements that need to be accessed/modified by app methods or actions
         # These are initialized to None and assigned actual widgets by setup functions
@@ -34,8 +50,43 @@ class SolEditorApp:
         self.update_button = None
         self.save_button = None
         self.export_button = None
+        self.import_button = None
+        self.compare_button = None
+        self.history_button = None
         self.add_all_button = None # Ensure add_all_button is initialized
         self.add_all_label_var = tk.StringVar() # For the descriptive label
+        self.status_var = tk.StringVar() # Progress message of background I/O
+        self.progress_bar = None
+        self.metrics_var = tk.StringVar() # Timing of the last operation (instrumentation spans)
+        self.profile_var = tk.BooleanVar(value=instrumentation.profiling_mode() is not None)
+        self.search_var = tk.StringVar() # Text of the tree search box
+        self.search_regex_var = tk.BooleanVar(value=False)
+        self.search_entry = None
+        self.log_frame = None # Notification log pane, toggled by the "Log" button
+        self.log_text = None
+        self.status_frame = None
+        self.toast_label = None
+        self.history_panel = None # Saved versions of the open file, created by the "History..." button
+        # Routine results are reported without modal dialogs (status line, toasts, log)
+        self.notifier = Notifier(master, self.status_var)
+
+        # Loads, saves and exports run on worker threads; results come back through master.after()
+        self.io_worker = IOWorker(master)
+        master.protocol("WM_DELETE_WINDOW", self.on_close)
+        # Indexed search over the displayed document; reruns shortly after the query changes
+        self.search = TreeSearch(self)
+        self.search_var.trace_add('write', self.search.schedule)
+        self.search_regex_var.trace_add('write', self.search.schedule)
+        master.bind('<Control-f>', self.focus_search)
+        # Finished spans arrive from any thread; the Tk thread picks them up for the status bar
+        self._finished_spans = deque(maxlen=100)
+        instrumentation.add_listener(self._on_span_finished)
+        self._metrics_poll_id = master.after(METRICS_POLL_MS, self._poll_spans)
+        # Document undo/redo; the value text box keeps its own Ctrl+Z for typing
+        for sequence in ('<Control-z>', '<Control-Z>'):
+            master.bind(sequence, self.on_undo_key)
+        for sequence in ('<Control-y>', '<Control-Y>', '<Control-Shift-Z>'):
+            master.bind(sequence, self.on_redo_key)
 
         # Setup layout - This must happen AFTER UI element attributes are None-initialized
         # and BEFORE actions are initialized if actions depend on UI elements being queryable (even if None)
@@ -56,12 +107,22 @@ class SolEditorApp:
             middle_frame = ttk.Frame(master)
             right_frame = ttk.Frame(master)
 
-        # Initialize actions controller, passing this app instance
-        self.actions = SolEditorActions(self)
-
-        # Initial action - This should be safe now as self.actions is initialized
-        # and UI elements are at least None-initialized or assigned by setup_xxx functions
-        self.actions.auto_select_sol_folder()
+        if self.data_tree:
+            self.tree_model = LazyTreeModel(self.data_tree)
+        self.notifier.toast_label = self.toast_label
+
+        # The actions controller is created on first use (see the actions property), so its imports
+        # (codec, diff, JSON, file dialogs) are not paid for before the window shows
+        self._actions = None
+        # Recently viewed documents with their (detached) tree rows, for instant switching back
+        self.doc_cache = DocumentCache(on_evict=lambda document: self.actions.on_cached_document_evicted(document))
+        # Edits are written after 1.5 s without further edits, or at the latest 10 s after the first unsaved one
+        self.autosave = AutoSaveScheduler(master, lambda edit_count: self.actions.auto_save(edit_count))
+        # Keeps the file list current and notices when the game writes the open save
+        self.watcher = FolderWatcher(master, self.io_worker, lambda *changes: self.actions.on_folder_changed(*changes))
+
+        # Look for the save folder once the first frame is drawn; the search itself runs on the worker thread
+        master.after_idle(self.start_folder_detection)
 
         # --- Style Configuration ---
         self.style = ttk.Style()
@@ -82,6 +143,17 @@ class SolEditorApp:
         # Set initial text for the add_all_label_var
         self.add_all_label_var.set("Select 'parts' or 'newdesigntags' in the tree to enable.")
 
+    @property
+    def actions(self):
+        if self._actions is None:
+            from .actions import SolEditorActions
+            self._actions = SolEditorActions(self)
+        return self._actions
+
+    def start_folder_detection(self):
+        if self.current_sol_folder is None: # Not chosen by hand in the meantime
+            self.actions.auto_select_sol_folder()
+
     def update_sol_file_list_display(self, file_names: list[str]):
         """Clears and repopulates the SOL files listbox in the UI."""
         if self.sol_files_listbox:
@@ -91,6 +163,89 @@ class SolEditorApp:
         else:
             print("[WARN] sol_files_listbox is not initialized when trying to update display.")
 
+    def apply_sol_file_changes(self, added, removed):
+        """Updates the (sorted) SOL files listbox entry by entry, keeping its selection and scroll position."""
+        if not self.sol_files_listbox: return
+        names = [self.sol_files_listbox.get(i) for i in range(self.sol_files_listbox.size())]
+        removed = set(removed)
+        for index in reversed(range(len(names))):
+            if names[index] in removed:
+                self.sol_files_listbox.delete(index)
+                del names[index]
+        for name in added:
+            if name not in names:
+                index = bisect_left(names, name)
+                names.insert(index, name)
+                self.sol_files_listbox.insert(index, name)
+
+    def ask_external_change(self, filename, has_edits):
+        """Asks what to do about a write to the open file by another program: 'reload', 'merge' or 'keep'."""
+        message = f"{filename} was changed outside the editor, probably by the game."
+        if not has_edits:
+            reload = messagebox.askyesno("File Changed", f"{message}\n\nReload it?", parent=self.master)
+            return 'reload' if reload else 'keep'
+        answer = messagebox.askyesnocancel(
+            "File Changed",
+            f"{message}\n\nYes: reload it and discard your edits.\n"
+            f"No: reload it and apply your edits again on top of it.\n"
+            f"Cancel: keep your version; the next save overwrites the other changes.",
+            parent=self.master)
+        if answer is None:
+            return 'keep'
+        return 'reload' if answer else 'merge'
+
+    def show_progress(self, fraction, message=""):
+        """Shows the progress (0.0-1.0) of a background job without blocking the UI."""
+        if self.progress_bar:
+            self.progress_bar.config(value=max(0.0, min(1.0, fraction)) * 100)
+        self.status_var.set(message)
+
+    def clear_progress(self, message=""):
+        if self.progress_bar:
+            self.progress_bar.config(value=0)
+        self.status_var.set(message)
+
+    def _on_span_finished(self, span):
+        if span.depth == 0:
+            self._finished_spans.append(span)
+
+    def _poll_spans(self):
+        self._metrics_poll_id = None
+        last = None
+        while self._finished_spans:
+            last = self._finished_spans.popleft()
+            if last.report is not None:
+                self.status_var.set(f"Profile of {last.name} written to {last.report}")
+        if last is not None:
+            self.metrics_var.set(last.summary())
+        self._metrics_poll_id = self.master.after(METRICS_POLL_MS, self._poll_spans)
+
+    def toggle_profiling(self):
+        """Status bar check box: writes a cProfile report for every following operation."""
+        if self.profile_var.get():
+            instrumentation.configure_profiling('cprofile')
+            self.status_var.set(f"Profiling on; reports go to {instrumentation.profile_dir().resolve()}")
+        else:
+            instrumentation.configure_profiling(None)
+            self.status_var.set("Profiling off")
+
+    def on_close(self):
+        """Flushes pending edits and lets the saves finish before the window is destroyed."""
+        try:
+            self.watcher.stop()
+            self.autosave.close()
+            self.io_worker.shutdown()
+        except Exception as e:
+            print(f"[ERROR] Finishing background jobs on close: {type(e).__name__} - {e}")
+        instrumentation.remove_listener(self._on_span_finished)
+        self.notifier.close()
+        if self._metrics_poll_id is not None:
+            self.master.after_cancel(self._metrics_poll_id)
+            self._metrics_poll_id = None
+        self.doc_cache.clear()
+        self.actions.release_current_document()
+        self.master.destroy()
+
     # --- Methods called by widgets (delegating to self.actions) ---
     def select_sol_folder_gui_action(self): 
         self.actions.select_jacksmith_folder()
@@ -98,6 +253,20 @@ class SolEditorApp:
     def on_sol_file_select(self, event): 
         self.actions.on_sol_file_select(event)
 
+    def on_tree_item_open(self, event):
+        """Inserts the children of a node (decoding lazily loaded values) the first time it is opened."""
+        if not self.data_tree or not self.tree_model: return
+        item_id = self.data_tree.focus()
+        try:
+            with instrumentation.span('expand_node', self.data_tree.item(item_id, "text")) as s:
+                rows_before = self.tree_model.row_count
+                self.tree_model.expand(item_id)
+                s.add('tree_rows', self.tree_model.row_count - rows_before)
+        except Exception as e:
+            key_display = self.data_tree.item(item_id, "text")
+            print(f"[ERROR] Decoding '{key_display}': {type(e).__name__} - {e}")
+            self.show_feedback("Error", f"Could not decode '{key_display}'.\n{e}", kind='error')
+
     def on_tree_item_select(self, event):
         # Ensure data_tree is not None before proceeding
         if not self.data_tree:
@@ -119,11 +288,16 @@ class SolEditorApp:
         key_display = self.data_tree.item(self.selected_tree_item_id, "text")
         self.key_label_var.set(key_display)
         
+        if self.tree_model and self.tree_model.is_chunk(self.selected_tree_item_id):
+            self._show_chunk_selection(self.selected_tree_item_id)
+            return
+
         actual_value = self._get_value_from_tree_path(self.selected_tree_item_id)
         
         if self.value_text:
             self.value_text.delete("1.0", tk.END)
             if isinstance(actual_value, (dict, list)):
+                import json # Imported when first needed, not at startup
                 try:
                     self.value_text.insert(tk.END, json.dumps(actual_value, indent=2, ensure_ascii=False))
                 except TypeError:
@@ -145,6 +319,23 @@ class SolEditorApp:
                 self.add_all_button.config(state=tk.DISABLED)
                 self.add_all_label_var.set("Select 'parts' or 'newdesigntags' in the tree to enable.") # Reset label
 
+    def _show_chunk_selection(self, chunk_item_id):
+        """Shows the slice behind a paging row read-only; edits go through its element rows."""
+        start, stop = self.tree_model.chunk_range(chunk_item_id)
+        container = self._get_value_from_tree_path(chunk_item_id)
+        if self.value_text:
+            self.value_text.delete("1.0", tk.END)
+            if isinstance(container, list):
+                import json
+                try:
+                    self.value_text.insert(tk.END, json.dumps(container[start:stop], indent=2, ensure_ascii=False))
+                except TypeError:
+                    self.value_text.insert(tk.END, str(container[start:stop]) + "\n(Not JSON serializable)")
+        if self.update_button: self.update_button.config(state=tk.DISABLED)
+        if hasattr(self, 'add_all_button') and self.add_all_button:
+            self.add_all_button.config(state=tk.DISABLED)
+            self.add_all_label_var.set("Select 'parts' or 'newdesigntags' in the tree to enable.")
+
     def update_value(self):
         if self.selected_tree_item_id and self.value_text:
             new_value_str = self.value_text.get("1.0", tk.END).strip()
@@ -158,6 +349,33 @@ class SolEditorApp:
     def export_to_json(self):
         self.actions.export_to_json()
 
+    def import_from_json(self):
+        self.actions.import_from_json()
+
+    def compare_with_file(self):
+        self.actions.compare_with_file()
+
+    def show_history(self):
+        self.actions.show_history()
+
+    def focus_search(self, event=None):
+        if self.search_entry:
+            self.search_entry.focus_set()
+            self.search_entry.select_range(0, tk.END)
+        return "break"
+
+    def on_undo_key(self, event=None):
+        if event is not None and event.widget is self.value_text:
+            return None
+        self.actions.undo()
+        return "break"
+
+    def on_redo_key(self, event=None):
+        if event is not None and event.widget is self.value_text:
+            return None
+        self.actions.redo()
+        return "break"
+
     # --- Core UI logic methods ---
     def clear_data_tree(self):
         if self.data_tree:
@@ -169,36 +387,92 @@ class SolEditorApp:
         if self.value_text:
             self.value_text.delete("1.0", tk.END)
         self.selected_tree_item_id = None
+        if self.tree_model:
+            self.tree_model.reset()
         if self.update_button:
             self.update_button.config(state=tk.DISABLED)
 
-    def _populate_tree_recursive(self, data, parent_item):
-        if not self.data_tree: return
-        if isinstance(data, dict):
-            for key, value in sorted(data.items()): # Sort items for consistent display
-                # Ensure key is a string for display
-                display_key = str(key)
-                item_id = self.data_tree.insert(parent_item, tk.END, text=display_key, open=False)
-                if isinstance(value, (dict, list)):
-                    self._populate_tree_recursive(value, item_id)
-                    self.data_tree.item(item_id, values=("(complex type)",))
-                else:
-                    self.data_tree.item(item_id, values=(str(value),))
-        elif isinstance(data, list):
-            for i, item_value in enumerate(data):
-                item_id = self.data_tree.insert(parent_item, tk.END, text=f"[{i}]", open=False)
-                if isinstance(item_value, (dict, list)):
-                    self._populate_tree_recursive(item_value, item_id)
-                    self.data_tree.item(item_id, values=("(complex type)",))
-                else:
-                    self.data_tree.item(item_id, values=(str(item_value),))
+    def detach_data_tree(self):
+        """Unlinks the rows of the displayed document without deleting them and returns
+        (tree model, top-level items, undo journal, search index) so attach_data_tree can show
+        them again instantly."""
+        if not self.data_tree or not self.tree_model: return None
+        selection = self.data_tree.selection()
+        if selection:
+            self.data_tree.selection_remove(*selection)
+        items = self.data_tree.get_children()
+        if items:
+            self.data_tree.detach(*items)
+        state = (self.tree_model, items, self.journal, self.search.detach())
+        self.tree_model = LazyTreeModel(self.data_tree)
+        self.journal = UndoJournal()
+        self.clear_data_tree()
+        return state
+
+    def attach_data_tree(self, state):
+        """Shows rows previously returned by detach_data_tree."""
+        self.clear_data_tree()
+        model, items, journal, search_index = state
+        for index, item in enumerate(items):
+            self.data_tree.move(item, "", index)
+        self.tree_model = model
+        self.journal = journal
+        self.search.start(self.current_data, search_index)
+
+    def discard_tree_state(self, state):
+        """Deletes detached rows that will not be shown again."""
+        if not self.data_tree or not state: return
+        items = [item for item in state[1] if self.data_tree.exists(item)]
+        if items:
+            self.data_tree.delete(*items)
+
+    def _populate_lazy_top_level(self, data):
+        """Inserts one row per top-level key; undecoded containers are decoded when first opened."""
+        for key in sorted(data.keys()):
+            if data.is_loaded(key):
+                self.tree_model.add_entry("", data, key)
+            else:
+                self.tree_model.add_deferred("", data, key) # Decodes on first open
 
     def populate_data_tree(self, data):
         self.clear_data_tree()
-        if self.data_tree: # Ensure data_tree exists
-            self._populate_tree_recursive(data, "")
-        else:
+        if not self.data_tree:
             print("[WARN] populate_data_tree called but data_tree is None.")
+            return
+        with instrumentation.span('populate_data_tree') as s:
+            if isinstance(data, LazySolDocument):
+                self._populate_lazy_top_level(data)
+            else:
+                self.tree_model.populate(data, "")
+            s.add('tree_rows', self.tree_model.row_count)
+
+    def show_diff(self, changes, other_name):
+        """Highlights what differs from `other_name` in the tree: added and changed rows, the parents
+        of removed entries, and every row on the way to them."""
+        if not self.tree_model: return
+        from sol_diff import ADDED, REMOVED, summarize
+        highlights = {}
+        for change in changes:
+            if change.kind == REMOVED:
+                parent = tuple(change.path[:-1])
+                if parent:
+                    highlights.setdefault(parent, 'diff_changed')
+            else:
+                highlights[tuple(change.path)] = 'diff_added' if change.kind == ADDED else 'diff_changed'
+        self.tree_model.set_highlights(highlights, layer='diff')
+
+        counts = summarize(changes)
+        self.status_var.set(f"Compared with {other_name}: {counts['added']} added, {counts['removed']} removed, "
+                            f"{counts['changed']} changed" if changes else f"No differences with {other_name}")
+        for change in changes[:DIFF_CONSOLE_LINES]:
+            print(f"[INFO] {change.describe()}")
+        if len(changes) > DIFF_CONSOLE_LINES:
+            print(f"[INFO] ... {len(changes) - DIFF_CONSOLE_LINES} more changes")
+
+    def clear_diff(self):
+        if self.tree_model and self.tree_model.has_highlights('diff'):
+            self.tree_model.set_highlights({}, layer='diff')
+            self.status_var.set("Comparison cleared")
 
     def enable_editing_ui(self):
         """Enables editing-related UI elements."""
@@ -216,77 +490,66 @@ class SolEditorApp:
             self.value_text.config(state=tk.DISABLED)
         # Add other editing controls if necessary
 
-    def get_keys_for_item(self, tree_item_id): # Added this method
-        """Helper to get the list of keys/indices for a tree item."""
-        if not self.data_tree: return []
-        path_keys_or_indices = []
-        current = tree_item_id
-        while current:
-            # The 'text' is what we displayed (string key or "[index]")
-            path_element_text = self.data_tree.item(current, "text")
-            path_keys_or_indices.insert(0, path_element_text)
-            current = self.data_tree.parent(current)
-        
-        # Convert list indices from string "[i]" to int i if necessary for data access
-        # For now, this method returns the text representations as seen in the tree.
-        # The actual conversion to int for list indices happens in _get_value_from_tree_path
-        return path_keys_or_indices
+    def get_keys_for_item(self, tree_item_id):
+        """Returns the keys/indices from the document root to a tree item, e.g. ['parts', 12, 1]."""
+        if not self.tree_model: return []
+        return self.tree_model.path(tree_item_id)
 
     def _get_value_from_tree_path(self, tree_item_id):
-        if not self.data_tree: return None
-        
-        path_keys_or_indices_text = self.get_keys_for_item(tree_item_id) # Use helper
-        
-        value = self.current_data
+        if not self.data_tree or not self.tree_model: return None
         try:
-            for key_or_index_str in path_keys_or_indices_text:
-                if isinstance(value, dict):
-                    # Assume keys in current_data are strings if they came from SOL/JSON
-                    value = value[key_or_index_str] 
-                elif isinstance(value, list):
-                    if key_or_index_str.startswith("[") and key_or_index_str.endswith("]"):
-                        idx = int(key_or_index_str[1:-1])
-                        value = value[idx]
-                    else: 
-                        # This case should ideally not happen if tree is built correctly
-                        print(f"[ERROR] Malformed list index string from tree: {key_or_index_str}")
-                        return None 
-                else:
-                    # Path goes deeper than actual data structure
-                    return None 
-            return value
-        except (KeyError, IndexError, TypeError, ValueError) as e:
-            print(f"[ERROR] Error accessing value from tree path {' -> '.join(path_keys_or_indices_text)}: {e}")
-            # Fallback for safety, though ideally path should always be valid
+            return self.tree_model.value(tree_item_id) # Direct reference kept by the tree model
+        except (KeyError, IndexError, TypeError) as e:
+            print(f"[ERROR] Error accessing value for tree item {tree_item_id}: {e}")
+            # Fallback for safety, though ideally every inserted row is indexed
             tree_values = self.data_tree.item(tree_item_id, "values")
             return tree_values[0] if tree_values and tree_values[0] != "(complex type)" else None
 
     def _update_tree_display(self, new_value, tree_item_id_to_update):
-        if not self.data_tree: return
-        if isinstance(new_value, (dict, list)):
-            self.data_tree.item(tree_item_id_to_update, values=("(complex type)",))
-            # Clear existing children before repopulating
-            children = self.data_tree.get_children(tree_item_id_to_update)
-            if children: # Check if get_children() returned a non-empty tuple
-                for child in children: # type: ignore
-                    self.data_tree.delete(child)
-            self._populate_tree_recursive(new_value, tree_item_id_to_update)
-        else:
-            self.data_tree.item(tree_item_id_to_update, values=(str(new_value),))
-
-    def show_feedback(self, title, message, kind='info'):
+        if not self.data_tree or not self.tree_model: return
+        # Drops the old rows; children of containers are inserted again when the node is opened
+        was_open = self.data_tree.item(tree_item_id_to_update, "open")
+        self.tree_model.replace(tree_item_id_to_update, new_value)
+        if was_open:
+            self.tree_model.expand(tree_item_id_to_update)
+
+    def show_feedback(self, title, message, kind='info', **notify_options):
+        """Reports `message`: errors in a modal dialog, anything else as a non-modal notification
+        (status line, toast and log). `notify_options` (group, summary, seconds) go to Notifier.notify."""
+        if kind != ERROR:
+            self.notifier.notify(message, kind=kind, title=title, **notify_options)
+            return
+        self.notifier.notify(message, kind=kind, title=title, toast=False) # Logged; the dialog shows it
         # Ensure master window is available for messagebox
         if not self.master: 
             print(f"Feedback ({kind}): {title} - {message} (Master window not available)")
             return
-        if kind == 'info':
-            messagebox.showinfo(title, message, parent=self.master)
-        elif kind == 'warning':
-            messagebox.showwarning(title, message, parent=self.master)
-        elif kind == 'error':
+        with instrumentation.span('feedback_dialog', title): # Time until the user dismissed it
             messagebox.showerror(title, message, parent=self.master)
-        else:
-            messagebox.showinfo(title, message, parent=self.master)
+
+    def toggle_log_pane(self):
+        """Shows or hides the log of all notifications above the status line."""
+        if not self.log_frame or not self.log_text:
+            return
+        if self.log_frame.winfo_ismapped():
+            self.notifier.remove_listener(self._append_log_entry)
+            self.log_frame.pack_forget()
+            return
+        self.log_text.config(state=tk.NORMAL)
+        self.log_text.delete("1.0", tk.END)
+        self.log_text.insert(tk.END, "".join(f"{entry}\n" for entry in self.notifier.log))
+        self.log_text.config(state=tk.DISABLED)
+        self.log_text.see(tk.END)
+        self.notifier.add_listener(self._append_log_entry)
+        self.log_frame.pack(side=tk.BOTTOM, fill=tk.X, after=self.status_frame)
+
+    def _append_log_entry(self, entry):
+        self.log_text.config(state=tk.NORMAL)
+        self.log_text.insert(tk.END, f"{entry}\n")
+        if len(self.notifier.log) == self.notifier.log.maxlen: # Drop the line the log itself dropped
+            self.log_text.delete("1.0", "2.0")
+        self.log_text.config(state=tk.DISABLED)
+        self.log_text.see(tk.END)
 
     def _convert_value(self, new_value_str, original_value):
         original_type = type(original_value)
@@ -295,14 +558,14 @@ class SolEditorApp:
                 if new_value_str.lower() in ("true", "1", "yes"): return True
                 if new_value_str.lower() in ("false", "0", "no"): return False
                 raise ValueError(f"Cannot convert '{new_value_str}' to boolean.")
-            if original_type in (list, dict):
+            if isinstance(original_value, (list, dict)):
+                import json
                 try:
                     val = json.loads(new_value_str)
-                    if not isinstance(val, original_type):
-                        raise ValueError(f"Converted JSON type {type(val)} does not match original type {original_type}")
-                    return val
                 except json.JSONDecodeError as e:
                     raise ValueError(f"Invalid JSON format: {e}")
+                # AMF containers (typed objects, ECMA arrays, vectors...) are rebuilt as the same type
+                return like_container(original_value, val)
             # For int, float, str, try direct conversion
             return original_type(new_value_str)
         except ValueError as e: # Catch specific conversion errors
@@ -319,48 +582,24 @@ class SolEditorApp:
             self.show_feedback("Error", "No item selected in the tree.", kind='warning')
             return
 
-        selected_key = self.data_tree.item(self.selected_tree_item_id, "text")
-        
-        # Get the parent data structure to modify
-        path_to_parent = self.get_keys_for_item(self.data_tree.parent(self.selected_tree_item_id))
-        current_level_data = self.current_data # This will be iteratively accessed to become the parent
-        try:
-            for key_or_idx_str in path_to_parent:
-                if isinstance(current_level_data, dict):
-                    current_level_data = current_level_data[key_or_idx_str]
-                elif isinstance(current_level_data, list):
-                    # Ensure key_or_idx_str is a list index like "[i]"
-                    if key_or_idx_str.startswith("[") and key_or_idx_str.endswith("]"):
-                        idx = int(key_or_idx_str[1:-1])
-                        current_level_data = current_level_data[idx]
-                    else:
-                        raise ValueError(f"Malformed list index string: {key_or_idx_str}")
-                else:
-                    # Should not happen if path is valid and data structure is dict/list
-                    raise TypeError(f"Cannot traverse non-container type: {type(current_level_data)}")
-        except Exception as e:
-            self.show_feedback("Error", f"Could not access parent data for update: {e}", kind='error')
+        # The tree model keeps a direct reference to the container holding the selected value
+        ref = self.tree_model.ref(self.selected_tree_item_id) if self.tree_model else None
+        if ref is None or self.tree_model.is_chunk(self.selected_tree_item_id):
+            self.show_feedback("Error", "Could not access parent data for update.", kind='error')
             return
+        current_level_data, selected_key = ref
+        try:
+            existing_value = current_level_data[selected_key] # Kept by the undo journal
+        except (KeyError, IndexError, TypeError):
+            existing_value = MISSING
 
         updated_value = None
         if selected_key == 'parts':
             # --- Parts Logic ---
-            # Fetch existing parts data from the correct parent (current_level_data)
-            existing_parts_data = []
-            if isinstance(current_level_data, dict):
-                existing_parts_data = current_level_data.get(selected_key, [])
-            elif isinstance(current_level_data, list) and selected_key.startswith("[") and selected_key.endswith("]"):
-                try:
-                    idx = int(selected_key[1:-1])
-                    if 0 <= idx < len(current_level_data):
-                        existing_parts_data = current_level_data[idx]
-                    else: # Index out of bounds, treat as empty
-                        existing_parts_data = []
-                except ValueError:
-                    self.show_feedback("Error", f"Invalid index format for 'parts' key '{selected_key}'.", kind='error')
-                    return
-            else:
-                self.show_feedback("Error", f"Parent for 'parts' is not a dictionary or list, or key '{selected_key}' is malformed.", kind='error')
+            try:
+                existing_parts_data = current_level_data[selected_key]
+            except Exception as e:
+                self.show_feedback("Error", f"Could not access 'parts' data: {e}", kind='error')
                 return
 
             # Ensure existing_parts_data is a list for the logic below
@@ -368,85 +607,26 @@ class SolEditorApp:
                 self.show_feedback("Warning", f"Data for 'parts' key '{selected_key}' is not a list. Initializing as empty list.", kind='warning')
                 existing_parts_data = []
 
-            existing_parts_dict = {}
-            # The existing_parts_data should be a list of lists, e.g., [["part_sword_grip_1", 10], ...]
-            for part_entry in existing_parts_data:
-                if isinstance(part_entry, list) and len(part_entry) >= 2:
-                    existing_parts_dict[str(part_entry[0])] = part_entry[1] # Ensure key is string
-            
-            categories = set()
-            ids = set()
-            for partname in existing_parts_dict:
-                m = re.match(r'part_([a-zA-Z0-9_]+)_([a-zA-Z0-9]+)$', partname)
-                if m:
-                    categories.add(m.group(1))
-                    ids.add(m.group(2))
-            
-            known_categories = {'sword_grip', 'sword_crossguard', 'sword_pommel',
-                                'arrow_head', 'arrow_fletching',
-                                'mace_shaft', 'mace_head',
-                                'shield_body', 'shield_crest', 'shield_paint'}
-            final_categories = categories if categories else known_categories
-            
-            max_id_num = 0
-            detected_ids_numeric = set()
-            for id_str in ids:
-                if id_str.isdigit():
-                    detected_ids_numeric.add(int(id_str))
-            if detected_ids_numeric:
-                max_id_num = max(detected_ids_numeric, default=0)
-            
-            id_range_to_generate = range(1, max(max_id_num + 1, 51)) # Generate up to 50 or max_id + 1
-            
-            all_parts_list = []
-            # Add existing parts first, ensuring they are updated to 999
-            for pname, pval in existing_parts_dict.items():
-                all_parts_list.append([pname, 999])
-
-            # Add new parts
-            for cat in sorted(list(final_categories)):
-                for i in id_range_to_generate:
-                    pname_num = f'part_{cat}_{i}'
-                    if pname_num not in existing_parts_dict: # Add only if truly new
-                        all_parts_list.append([pname_num, 999])
-            
-            updated_value = sorted(all_parts_list, key=lambda x: x[0])
+            updated_value = all_parts(existing_parts_data)
             
             # Update the data in the correct parent structure (current_level_data)
-            if isinstance(current_level_data, dict):
+            try:
                 current_level_data[selected_key] = updated_value
-            elif isinstance(current_level_data, list) and selected_key.startswith("[") and selected_key.endswith("]"):
-                try:
-                    idx = int(selected_key[1:-1])
-                    current_level_data[idx] = updated_value
-                except (ValueError, IndexError):
-                    self.show_feedback("Error", f"Failed to update 'parts' at index '{selected_key}'.", kind='error')
-                    return
-            else: # Should not be reached if initial fetch was okay
-                self.show_feedback("Error", "Data structure error during 'parts' update.", kind='error')
+            except Exception as e:
+                self.show_feedback("Error", f"Failed to update 'parts': {e}", kind='error')
                 return
                 
             self.show_feedback("Success", "All parts have been processed for the selected item!", kind='info')
 
         elif selected_key == 'newdesigntags':
             # --- NewDesignTags Logic ---
-            design_codes = ['AX', 'BW', 'MA', 'PI', 'SH', 'SW']
-            design_nummers = [f'{i:02}' for i in range(1, 15)] # 01 to 14
-            all_tags = [f'{code}-{nummer}' for code in design_codes for nummer in design_nummers]
-            updated_value = sorted(all_tags)
+            updated_value = all_design_tags()
 
             # Update the data in the correct parent structure (current_level_data)
-            if isinstance(current_level_data, dict):
+            try:
                 current_level_data[selected_key] = updated_value
-            elif isinstance(current_level_data, list) and selected_key.startswith("[") and selected_key.endswith("]"):
-                try:
-                    idx = int(selected_key[1:-1])
-                    current_level_data[idx] = updated_value
-                except (ValueError, IndexError):
-                    self.show_feedback("Error", f"Failed to update 'newdesigntags' at index '{selected_key}'.", kind='error')
-                    return
-            else: # Should not be reached if initial fetch was okay
-                self.show_feedback("Error", "Data structure error during 'newdesigntags' update.", kind='error')
+            except Exception as e:
+                self.show_feedback("Error", f"Failed to update 'newdesigntags': {e}", kind='error')
                 return
 
             self.show_feedback("Success", "All design tags have been generated for the selected item!", kind='info')
@@ -455,7 +635,11 @@ class SolEditorApp:
             return
 
         if updated_value is not None:
+            keys_path = self.get_keys_for_item(self.selected_tree_item_id)
+            # One undo step for the whole list, holding the replaced list rather than a copy
+            self.actions.record_edit(f"Add all {selected_key}", keys_path, existing_value, updated_value)
             if self.value_text:
+                import json
                 self.value_text.delete("1.0", tk.END)
                 self.value_text.insert(tk.END, json.dumps(updated_value, indent=2, ensure_ascii=False))
             self._update_tree_display(updated_value, self.selected_tree_item_id)
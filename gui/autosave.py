@@ -0,0 +1,119 @@
+"""
+Debounced auto-save: edits only mark the document dirty, and one save is issued once
+editing has been idle for a while or the oldest unsaved edit reaches a maximum age.
+"""
+import time
+
+IDLE_INTERVAL_MS = 1500
+MAX_DIRTY_AGE_MS = 10000
+
+
+class AutoSaveScheduler:
+    """Coalesces edits into few flushes; `flush_callback()` performs the actual save.
+
+    Timers run on the Tk event loop through master.after(). close() flushes any pending
+    edits, so nothing is lost when the window is closed.
+    """
+
+    def __init__(self, master, flush_callback, idle_ms=IDLE_INTERVAL_MS, max_age_ms=MAX_DIRTY_AGE_MS):
+        self.master = master
+        self.flush_callback = flush_callback
+        self.idle_ms = idle_ms
+        self.max_age_ms = max_age_ms
+        self._first_dirty = None # monotonic time of the oldest unsaved edit
+        self._last_dirty = None
+        self._pending_edits = 0
+        self._timer_id = None
+        # Statistics
+        self.edit_count = 0
+        self.flush_count = 0
+        self.flush_reasons = {}
+        self.write_count = 0
+        self.write_seconds_total = 0.0
+        self.write_seconds_max = 0.0
+        self.last_write_seconds = None
+
+    @property
+    def dirty(self):
+        return self._first_dirty is not None
+
+    def mark_dirty(self):
+        """Records an edit and (re)arms the flush timer."""
+        now = time.monotonic()
+        if self._first_dirty is None:
+            self._first_dirty = now
+        self._last_dirty = now
+        self._pending_edits += 1
+        self.edit_count += 1
+        self._schedule()
+
+    def mark_clean(self):
+        """Forgets pending edits, e.g. after an explicit save already wrote them."""
+        self._cancel_timer()
+        self._first_dirty = self._last_dirty = None
+        self._pending_edits = 0
+
+    def flush(self, reason='manual'):
+        """Saves now if there are pending edits. Returns True if a save was issued."""
+        self._cancel_timer()
+        if not self.dirty:
+            return False
+        edits = self._pending_edits
+        self.mark_clean()
+        self.flush_count += 1
+        self.flush_reasons[reason] = self.flush_reasons.get(reason, 0) + 1
+        self.flush_callback(edits)
+        return True
+
+    def close(self):
+        """Final flush before the application exits."""
+        self.flush('close')
+
+    def record_write(self, seconds):
+        """Called by the saver with the duration of a completed write."""
+        self.write_count += 1
+        self.write_seconds_total += seconds
+        self.write_seconds_max = max(self.write_seconds_max, seconds)
+        self.last_write_seconds = seconds
+
+    def stats(self):
+        """Flush counts and write timings, e.g. for logging how many writes were avoided."""
+        return {
+            'edits': self.edit_count,
+            'flushes': self.flush_count,
+            'writes_avoided': max(0, self.edit_count - self.flush_count),
+            'flush_reasons': dict(self.flush_reasons),
+            'writes': self.write_count,
+            'write_seconds_total': self.write_seconds_total,
+            'write_seconds_max': self.write_seconds_max,
+            'write_seconds_avg': self.write_seconds_total / self.write_count if self.write_count else 0.0,
+            'last_write_seconds': self.last_write_seconds,
+        }
+
+    def _schedule(self):
+        self._cancel_timer()
+        now = time.monotonic()
+        idle_due = self._last_dirty + self.idle_ms / 1000
+        age_due = self._first_dirty + self.max_age_ms / 1000
+        delay_ms = max(0, int((min(idle_due, age_due) - now) * 1000))
+        self._timer_id = self.master.after(delay_ms, self._on_timer)
+
+    def _on_timer(self):
+        self._timer_id = None
+        if not self.dirty:
+            return
+        now = time.monotonic()
+        if now - self._first_dirty >= self.max_age_ms / 1000:
+            self.flush('max_age')
+        elif now - self._last_dirty >= self.idle_ms / 1000:
+            self.flush('idle')
+        else:
+            self._schedule()
+
+    def _cancel_timer(self):
+        if self._timer_id is not None:
+            try:
+                self.master.after_cancel(self._timer_id)
+            except Exception:
+                pass
+            self._timer_id = None
@@ -0,0 +1,117 @@
+"""
+LRU cache of recently viewed documents, so switching back to a save neither re-reads
+the file nor rebuilds its tree rows.
+
+Entries are keyed on the file path and validated against (st_mtime_ns, st_size); a
+file that changed on disk is a miss. Eviction is by approximate decoded size.
+"""
+import os
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Decoded documents (objects plus the kept encoded bytes) take about 6x their file size
+DECODED_SIZE_FACTOR = 6
+TREE_ROW_BYTES = 200 # Rough cost of one detached Treeview row kept in Tk
+
+
+def file_signature(path):
+    """(st_mtime_ns, st_size) of `path`, or None if it cannot be stat'ed."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class CachedDocument:
+    __slots__ = ('path', 'signature', 'document', 'tree_state', 'size')
+
+    def __init__(self, path, signature, document, tree_state, size):
+        self.path = path
+        self.signature = signature
+        self.document = document
+        self.tree_state = tree_state # Opaque to the cache; the app keeps its detached rows here
+        self.size = size
+
+
+class DocumentCache:
+    """Bounded LRU of documents that are not currently displayed.
+
+    `on_evict(entry)` is called for every entry that leaves the cache without being taken,
+    so the owner can free its tree rows and file mapping.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, on_evict=None):
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self._entries = OrderedDict() # str(path) -> CachedDocument, least recently used first
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, path):
+        return str(path) in self._entries
+
+    def contains_document(self, document):
+        return any(entry.document is document for entry in self._entries.values())
+
+    def put(self, path, document, tree_state=None, row_count=0, signature=None):
+        """Caches `document` as the contents of `path`, then evicts down to max_bytes.
+
+        `signature` is that of the file version the document matches (default: the file as it is now).
+        """
+        if signature is None:
+            signature = file_signature(path)
+        if signature is None:
+            return False
+        self._discard(str(path))
+        size = signature[1] * DECODED_SIZE_FACTOR + row_count * TREE_ROW_BYTES
+        self._entries[str(path)] = CachedDocument(path, signature, document, tree_state, size)
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes and self._entries:
+            self.evictions += 1
+            self._discard(next(iter(self._entries)))
+        return str(path) in self._entries
+
+    def take(self, path):
+        """Removes and returns the entry for `path` if the file is unchanged on disk; else None."""
+        key = str(path)
+        entry = self._entries.get(key)
+        if entry is None or entry.signature != file_signature(path):
+            if entry is not None:
+                self._discard(key) # Changed on disk: the cached copy is stale
+            self.misses += 1
+            return None
+        del self._entries[key]
+        self.total_bytes -= entry.size
+        self.hits += 1
+        return entry
+
+    def refresh(self, path, document, signature=None):
+        """Updates the signature (default: re-read) after `document` itself was saved to `path`."""
+        entry = self._entries.get(str(path))
+        if entry is not None and entry.document is document:
+            if signature is None:
+                signature = file_signature(path)
+            if signature is not None:
+                entry.signature = signature
+
+    def clear(self):
+        for key in list(self._entries):
+            self._discard(key)
+
+    def stats(self):
+        return {'entries': len(self._entries), 'bytes': self.total_bytes, 'hits': self.hits,
+                'misses': self.misses, 'evictions': self.evictions}
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.total_bytes -= entry.size
+        if self.on_evict is not None:
+            self.on_evict(entry)
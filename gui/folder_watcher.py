@@ -0,0 +1,125 @@
+"""
+Polls the save folder for files that appear, disappear or change.
+
+Every few seconds a worker thread lists the folder with os.scandir and compares each
+entry's (st_mtime_ns, st_size) with the previous listing; only the differences reach
+the UI thread, so the file list is updated entry by entry and the open save can be
+checked for writes by the game. Polling never touches the file system on the Tk thread.
+"""
+import os
+
+POLL_INTERVAL_MS = 2000
+
+
+def is_listed_save(name):
+    """True for the .sol files the file list shows (backups are hidden)."""
+    return name.lower().endswith('.sol') and 'backup' not in name.lower()
+
+
+def scan_folder(folder, include=is_listed_save):
+    """{file name: (st_mtime_ns, st_size)} of the files in `folder` accepted by `include`."""
+    listing = {}
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if not include(entry.name):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+            except OSError: # Deleted between listing and stat
+                continue
+            listing[entry.name] = (st.st_mtime_ns, st.st_size)
+    return listing
+
+
+def diff_listings(old, new):
+    """(added, removed, modified) file names between two scan_folder results, each sorted."""
+    added = sorted(new.keys() - old.keys())
+    removed = sorted(old.keys() - new.keys())
+    modified = sorted(name for name in new.keys() & old.keys() if new[name] != old[name])
+    return added, removed, modified
+
+
+class FolderWatcher:
+    """Reports changes of one folder through `on_changes(folder, added, removed, modified, listing)`.
+
+    Scans run as coalesced IOWorker jobs and the next one is only scheduled once the
+    previous result was handled, so a slow disk delays polling instead of piling up scans.
+    """
+
+    def __init__(self, master, io_worker, on_changes, interval_ms=POLL_INTERVAL_MS, include=is_listed_save):
+        self.master = master
+        self.io_worker = io_worker
+        self.on_changes = on_changes
+        self.interval_ms = interval_ms
+        self.include = include
+        self.folder = None
+        self.listing = {}
+        self._timer_id = None
+        self._generation = 0 # Bumped by watch()/stop() so results of an older folder are dropped
+        self._failing = False
+        self.scan_count = 0
+
+    def watch(self, folder, listing=None):
+        """Starts watching `folder`; `listing` is its current scan_folder result if already known."""
+        self.stop()
+        self.folder = folder
+        self.listing = dict(listing) if listing is not None else {}
+        if listing is None:
+            self.poll_now()
+        else:
+            self._schedule()
+
+    def stop(self):
+        self._generation += 1
+        if self._timer_id is not None:
+            self.master.after_cancel(self._timer_id)
+            self._timer_id = None
+        self.folder = None
+
+    def poll_now(self):
+        """Scans right away instead of waiting for the next interval."""
+        if self.folder is None:
+            return
+        if self._timer_id is not None:
+            self.master.after_cancel(self._timer_id)
+            self._timer_id = None
+        generation, folder = self._generation, self.folder
+        self.io_worker.submit_coalesced(
+            ('watch', str(folder)), self._scan_job, folder, self.include,
+            on_done=lambda listing: self._on_scanned(generation, folder, listing),
+            on_error=lambda e, details: self._on_scan_failed(generation, folder, e),
+        )
+
+    @staticmethod
+    def _scan_job(job, folder, include):
+        return scan_folder(folder, include)
+
+    def _schedule(self):
+        if self.folder is not None and self._timer_id is None:
+            self._timer_id = self.master.after(self.interval_ms, self._on_timer)
+
+    def _on_timer(self):
+        self._timer_id = None
+        self.poll_now()
+
+    def _on_scanned(self, generation, folder, listing):
+        if generation != self._generation:
+            return
+        self.scan_count += 1
+        self._failing = False
+        added, removed, modified = diff_listings(self.listing, listing)
+        self.listing = listing
+        if added or removed or modified:
+            self.on_changes(folder, added, removed, modified, listing)
+        self._schedule()
+
+    def _on_scan_failed(self, generation, folder, e):
+        if generation != self._generation:
+            return
+        # E.g. a network drive went away; the last listing stays until the folder can be read again
+        if not self._failing:
+            print(f"[WARN] Could not list {folder}: {type(e).__name__} - {e}")
+            self._failing = True
+        self._schedule()
@@ -0,0 +1,96 @@
+"""
+History panel: the saved versions of a file (see sol_history), newest first.
+
+Every row is the version a save replaced, at the time of that save. Restoring one writes
+it back through SolEditorActions.restore_snapshot, after the current version has been
+added to the history, so a restore can itself be undone from the same list.
+"""
+import tkinter as tk
+from tkinter import messagebox, ttk
+
+COLUMNS = (('time', "Replaced at", 160, tk.W), ('label', "By", 90, tk.W),
+           ('size', "Size", 90, tk.E), ('stored', "Stored", 90, tk.E))
+
+
+class HistoryPanel:
+    """A non-modal window listing the snapshots of one file; created once and reused."""
+
+    def __init__(self, app):
+        self.app = app
+        self.window = None
+        self.tree = None
+        self.summary_var = None
+        self.sol_path = None
+        self.history = None
+        self._snapshots = {} # tree item -> Snapshot
+
+    def show(self, sol_path, history):
+        self.sol_path, self.history = sol_path, history
+        if self.window is None or not self.window.winfo_exists():
+            self._build()
+        self.window.title(f"History of {sol_path.name}")
+        self.refresh()
+        self.window.deiconify()
+        self.window.lift()
+
+    def _build(self):
+        self.window = tk.Toplevel(self.app.master)
+        self.window.geometry("520x360")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        frame = ttk.Frame(self.window, padding=5)
+        frame.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(frame, columns=[column for column, *_ in COLUMNS], show='headings',
+                                 selectmode='browse')
+        for column, title, width, anchor in COLUMNS:
+            self.tree.heading(column, text=title)
+            self.tree.column(column, width=width, anchor=anchor)
+        scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+        self.tree.bind('<Double-1>', lambda event: self.restore_selected())
+
+        buttons = ttk.Frame(self.window, padding=5)
+        buttons.pack(fill=tk.X)
+        ttk.Button(buttons, text="Restore", command=self.restore_selected).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons, text="Close", command=self.close).pack(side=tk.RIGHT, padx=5)
+        self.summary_var = tk.StringVar()
+        ttk.Label(buttons, textvariable=self.summary_var, foreground="gray40").pack(side=tk.LEFT, padx=5)
+
+    def refresh(self, sol_path=None):
+        """Lists the snapshots again; with `sol_path`, only when the panel shows that file."""
+        if self.window is None or not self.window.winfo_exists():
+            return
+        if sol_path is not None and sol_path != self.sol_path:
+            return
+        self.tree.delete(*self.tree.get_children())
+        self._snapshots = {}
+        snapshots = self.history.snapshots()
+        for snapshot in reversed(snapshots):
+            stored = f"{snapshot.stored / 1024:.1f} KiB" if snapshot.stored else "shared"
+            item = self.tree.insert('', tk.END, values=(snapshot.when_text, snapshot.label,
+                                                        f"{snapshot.size / 1024:.1f} KiB", stored))
+            self._snapshots[item] = snapshot
+        if not snapshots:
+            self.summary_var.set("No versions yet; one is kept before every save")
+            return
+        total = sum(snapshot.size for snapshot in snapshots)
+        self.summary_var.set(f"{len(snapshots)} version(s) of {total / 1024:.0f} KiB in total, "
+                             f"{self.history.size_bytes() / 1024:.0f} KiB on disk")
+
+    def restore_selected(self):
+        selection = self.tree.selection()
+        snapshot = self._snapshots.get(selection[0]) if selection else None
+        if snapshot is None:
+            return
+        message = (f"Replace {self.sol_path.name} with the version of {snapshot.when_text}?\n\n"
+                   f"The current version is added to the history first.")
+        if self.sol_path == self.app.current_sol_path and self.app.autosave.dirty:
+            message += " Edits that have not been saved yet are discarded."
+        if messagebox.askyesno("Restore Version", message, parent=self.window):
+            self.app.actions.restore_snapshot(self.sol_path, self.history, snapshot)
+
+    def close(self):
+        if self.window is not None:
+            self.window.destroy()
+        self.window = self.tree = None
@@ -0,0 +1,204 @@
+"""
+Runs file I/O off the Tk main loop.
+
+Jobs execute on a small thread pool; their progress, results and errors are put on a
+queue that the UI thread drains with master.after(), so every callback runs on the
+Tk thread. Loads can be superseded (the previous one is cancelled) and saves to the
+same file are coalesced (one running, at most one waiting with the newest request).
+"""
+import queue
+import threading
+import traceback
+
+POLL_INTERVAL_MS = 30
+
+
+class JobCancelled(Exception):
+    """Raised inside a job whose result is no longer wanted."""
+
+
+class IOJob:
+    """A unit of background work. `func(job, *args)` runs on a worker thread."""
+
+    def __init__(self, worker, func, args, on_done=None, on_error=None, on_progress=None, on_cancelled=None):
+        self._worker = worker
+        self.func = func
+        self.args = args
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_cancelled = on_cancelled
+        self.category = None # Newer jobs of the same category cancel this one
+        self.key = None # Jobs with the same key are coalesced
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def check_cancelled(self):
+        """Call from the job function between steps to stop early once cancelled."""
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+
+    def report(self, fraction, message=""):
+        """Posts progress (0.0-1.0) to the UI thread. Raises JobCancelled if the job was cancelled."""
+        self.check_cancelled()
+        if self.on_progress is not None:
+            self._worker._queue.put(('progress', self, (fraction, message)))
+
+
+class IOWorker:
+    """Thread pool plus an after()-polled result queue; all callbacks run on the Tk thread."""
+
+    def __init__(self, master, max_workers=2, poll_interval_ms=POLL_INTERVAL_MS):
+        self.master = master
+        self.poll_interval_ms = poll_interval_ms
+        self.max_workers = max_workers
+        self._executor = None # Created by the first job; concurrent.futures is not needed before that
+        self._queue = queue.Queue()
+        self._active = set() # jobs submitted to the pool whose completion was not dispatched yet
+        self._latest = {} # category -> newest job
+        self._running = {} # coalescing key -> job in the pool
+        self._waiting = {} # coalescing key -> newest job queued behind the running one
+        self._poll_id = None
+        self._closed = False
+
+    @property
+    def busy(self):
+        return bool(self._active or self._waiting)
+
+    def is_pending(self, key):
+        """True while a job with coalescing `key` is running or waiting."""
+        return key in self._running or key in self._waiting
+
+    def cancel_category(self, category):
+        """Cancels the unfinished job of `category`, e.g. a load made obsolete by a cache hit."""
+        job = self._latest.pop(category, None)
+        if job is not None:
+            job.cancel()
+
+    def submit(self, func, *args, category=None, **callbacks):
+        """Runs `func(job, *args)` in the background and returns the job.
+
+        With a `category`, the previous unfinished job of that category is cancelled: its
+        on_cancelled(result_or_None) runs instead of on_done, e.g. to release a superseded load.
+        """
+        job = IOJob(self, func, args, **callbacks)
+        if category is not None:
+            previous = self._latest.get(category)
+            if previous is not None:
+                previous.cancel()
+            job.category = category
+            self._latest[category] = job
+        self._start(job)
+        return job
+
+    def submit_coalesced(self, key, func, *args, **callbacks):
+        """Like submit, but at most one job per `key` runs at a time.
+
+        A request made while one is running waits; a newer request replaces the waiting one
+        (whose on_cancelled(None) runs), so a burst of saves results in at most two writes.
+        """
+        job = IOJob(self, func, args, **callbacks)
+        job.key = key
+        if key in self._running:
+            replaced = self._waiting.get(key)
+            self._waiting[key] = job
+            if replaced is not None and replaced.on_cancelled is not None:
+                replaced.on_cancelled(None)
+        else:
+            self._running[key] = job
+            self._start(job)
+        return job
+
+    def shutdown(self):
+        """Finishes all running and waiting jobs (dispatching their callbacks) and stops the pool."""
+        self._closed = True
+        if self._poll_id is not None:
+            try:
+                self.master.after_cancel(self._poll_id)
+            except Exception:
+                pass
+            self._poll_id = None
+        while self._active:
+            self._dispatch(*self._queue.get())
+        self._drain()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def _start(self, job):
+        self._active.add(job)
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="sol-io")
+        self._executor.submit(self._run, job)
+        self._schedule_poll()
+
+    def _run(self, job):
+        # Worker thread: only touches the job and the queue.
+        if job.cancelled:
+            self._queue.put(('cancelled', job, None))
+            return
+        try:
+            result = job.func(job, *job.args)
+        except JobCancelled:
+            self._queue.put(('cancelled', job, None))
+        except Exception as e:
+            if job.cancelled: # Failures of superseded jobs are not worth reporting
+                self._queue.put(('cancelled', job, None))
+            else:
+                self._queue.put(('error', job, (e, traceback.format_exc())))
+        else:
+            self._queue.put(('cancelled' if job.cancelled else 'done', job, result))
+
+    def _schedule_poll(self):
+        if self._poll_id is None and not self._closed:
+            self._poll_id = self.master.after(self.poll_interval_ms, self._poll)
+
+    def _poll(self):
+        self._poll_id = None
+        self._drain()
+        if self._active:
+            self._schedule_poll()
+
+    def _drain(self):
+        while True:
+            try:
+                message = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            self._dispatch(*message)
+
+    def _dispatch(self, kind, job, payload):
+        if kind == 'progress':
+            if not job.cancelled and job.on_progress is not None:
+                job.on_progress(*payload)
+            return
+
+        if kind == 'done' and job.cancelled: # Superseded after it finished but before dispatch
+            kind = 'cancelled'
+        self._active.discard(job)
+        if job.category is not None and self._latest.get(job.category) is job:
+            del self._latest[job.category]
+        if job.key is not None and self._running.get(job.key) is job:
+            del self._running[job.key]
+            waiting = self._waiting.pop(job.key, None)
+            if waiting is not None:
+                self._running[job.key] = waiting
+                self._start(waiting)
+
+        if kind == 'done' and job.on_done is not None:
+            job.on_done(payload)
+        elif kind == 'error':
+            error, details = payload
+            if job.on_error is not None:
+                job.on_error(error, details)
+            else:
+                print(f"[ERROR] Background job failed: {type(error).__name__} - {error}")
+                print(details)
+        elif kind == 'cancelled' and job.on_cancelled is not None:
+            job.on_cancelled(payload)
@@ -0,0 +1,168 @@
+"""
+Non-modal notifications: the status line, short-lived toasts and a log of everything reported.
+
+Routine results (loaded, saved, exported...) go through Notifier.notify() instead of a
+modal messagebox, so repeated work is never held up by an OK button; modal dialogs are
+kept for errors. One toast is shown at a time and a new one appears at most every
+TOAST_GAP_MS. Notifications of the same group are folded into the toast that is shown or
+queued ("12 files saved in 340 ms"), and once MAX_QUEUED_TOASTS are waiting the rest are
+counted in a single "more" toast. Every notification is kept in the log pane.
+"""
+import time
+from collections import deque
+from datetime import datetime
+
+INFO = 'info'
+WARNING = 'warning'
+ERROR = 'error'
+
+TOAST_DURATION_MS = 3000
+TOAST_GAP_MS = 500
+MAX_QUEUED_TOASTS = 3
+LOG_LIMIT = 1000 # Entries kept in memory and in the log pane
+TOAST_COLORS = {INFO: ('#2d3b45', 'white'), WARNING: ('#8a5a00', 'white'), ERROR: ('#a4262c', 'white')}
+_MORE = 'more' # Group of the toast that counts the notifications beyond MAX_QUEUED_TOASTS
+
+
+class LogEntry:
+    __slots__ = ('time', 'kind', 'title', 'message')
+
+    def __init__(self, when, kind, title, message):
+        self.time = when
+        self.kind = kind
+        self.title = title
+        self.message = message
+
+    def __str__(self):
+        title = f"{self.title}: " if self.title else ""
+        return f"{self.time:%H:%M:%S} {self.kind.upper():<7} {title}{' '.join(self.message.split())}"
+
+
+class Toast:
+    """One toast; `count` notifications of its group have been folded into it."""
+    __slots__ = ('kind', 'text', 'group', 'summary', 'count', 'seconds')
+
+    def __init__(self, kind, text, group=None, summary=None, seconds=None):
+        self.kind = kind
+        self.text = text
+        self.group = group
+        self.summary = summary # Format string with {count} and {ms}, used once count > 1
+        self.count = 1
+        self.seconds = seconds
+
+    def merge(self, kind, text, seconds=None):
+        self.count += 1
+        self.text = text
+        if seconds is not None:
+            self.seconds = (self.seconds or 0.0) + seconds
+        if kind == WARNING:
+            self.kind = WARNING
+
+    @property
+    def display_text(self):
+        if self.count == 1:
+            return self.text
+        if self.summary:
+            return self.summary.format(count=self.count, ms=(self.seconds or 0.0) * 1000)
+        return f"{self.text} (+{self.count - 1} more)"
+
+
+class Notifier:
+    """Logs notifications, mirrors them in the status line and shows them as toasts on `toast_label`."""
+
+    def __init__(self, master, status_var=None):
+        self.master = master
+        self.status_var = status_var
+        self.toast_label = None # A tk.Label assigned once the widgets exist; without it toasts are only queued
+        self.log = deque(maxlen=LOG_LIMIT)
+        self._listeners = []
+        self._current = None
+        self._queue = deque()
+        self._hide_id = None
+        self._pump_id = None
+        self._next_toast_at = 0.0 # time.monotonic() before which no new toast is shown
+        self.toasts_shown = 0
+
+    def add_listener(self, callback):
+        """Calls `callback(entry)` for every LogEntry from now on."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def notify(self, message, kind=INFO, title='', group=None, summary=None, seconds=None, toast=True):
+        """Reports `message` without blocking: log, status line and (with `toast`) a toast.
+
+        Notifications with the same `group` share one toast, which shows `summary`
+        (formatted with {count} and {ms}, the summed `seconds`) once there are several.
+        """
+        entry = LogEntry(datetime.now(), kind, title, message)
+        self.log.append(entry)
+        for listener in list(self._listeners):
+            listener(entry)
+        if self.status_var is not None:
+            self.status_var.set(' '.join(message.split()))
+        if toast:
+            self._enqueue(kind, message, group, summary, seconds)
+
+    def _enqueue(self, kind, text, group, summary, seconds):
+        if group is not None:
+            for pending in ([self._current] if self._current else []) + list(self._queue):
+                if pending.group == group:
+                    pending.merge(kind, text, seconds)
+                    if pending is self._current:
+                        self._show(pending) # Updated in place and kept up for the full duration again
+                    return
+        if len(self._queue) >= MAX_QUEUED_TOASTS:
+            more = self._queue[-1]
+            if more.group != _MORE:
+                more = Toast(INFO, text, _MORE, "{count} more notification(s); see the log")
+                more.count = 0
+                self._queue.append(more)
+            more.merge(kind, text)
+            return
+        self._queue.append(Toast(kind, text, group, summary, seconds))
+        self._pump()
+
+    def _pump(self):
+        if self._current is not None or not self._queue or self._pump_id is not None:
+            return
+        wait_ms = int((self._next_toast_at - time.monotonic()) * 1000)
+        if wait_ms > 0: # Rate limit: the previous toast went away only just now
+            self._pump_id = self.master.after(wait_ms, self._on_pump_timer)
+            return
+        self._current = self._queue.popleft()
+        self.toasts_shown += 1
+        self._show(self._current)
+
+    def _on_pump_timer(self):
+        self._pump_id = None
+        self._pump()
+
+    def _show(self, toast):
+        if self.toast_label is not None:
+            background, foreground = TOAST_COLORS.get(toast.kind, TOAST_COLORS[INFO])
+            self.toast_label.config(text=toast.display_text, background=background, foreground=foreground)
+            self.toast_label.place(relx=1.0, rely=1.0, x=-16, y=-72, anchor='se')
+            self.toast_label.lift()
+        if self._hide_id is not None:
+            self.master.after_cancel(self._hide_id)
+        self._hide_id = self.master.after(TOAST_DURATION_MS, self._hide)
+
+    def _hide(self):
+        self._hide_id = None
+        self._current = None
+        if self.toast_label is not None:
+            self.toast_label.place_forget()
+        self._next_toast_at = time.monotonic() + TOAST_GAP_MS / 1000
+        self._pump()
+
+    def close(self):
+        for timer_id in (self._hide_id, self._pump_id):
+            if timer_id is not None:
+                self.master.after_cancel(timer_id)
+        self._hide_id = self._pump_id = None
+        self._current = None
+        self._queue.clear()
+        self._listeners.clear()
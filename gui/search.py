@@ -0,0 +1,188 @@
+"""
+Search box of the data tree.
+
+The SearchIndex of a document is built on a worker thread right after it is loaded and
+then kept current by every edit, undo and redo. Typing re-runs the search after a short
+pause: matches are highlighted (also in rows inserted later) and only the ancestors of
+the first matches are opened; Enter walks through all of them.
+"""
+import re
+
+import instrumentation
+from sol_index import PREFIX, REGEX, SearchIndex, path_sort_key
+
+SEARCH_DELAY_MS = 150
+MAX_HIGHLIGHTED = 5000 # Matches tagged in the tree; the status line reports the total
+MAX_REVEALED = 20 # Matches whose ancestors are opened right away; Enter reveals the others
+MATCH_TAG = 'search_match'
+
+
+class TreeSearch:
+    """Owns the search index of the displayed document and applies queries to the tree."""
+
+    def __init__(self, app):
+        self.app = app
+        self.index = None
+        self._building = None # Document whose index is being built
+        self._stale = False # Edited while its index was being built
+        self._timer_id = None
+        self._matches = [] # Sorted paths of the last search
+        self._position = -1 # Match selected by the last Enter
+
+    # --- Index lifecycle ---
+    def start(self, document, index=None):
+        """Uses `index` for the newly displayed `document`, or builds one in the background."""
+        self.index = index
+        self._matches, self._position = [], -1
+        if index is None and document:
+            self._building, self._stale = document, False
+            self.app.actions.hold_document(document)
+            self.app.io_worker.submit(
+                self._build_job, document, category='search_index',
+                on_done=lambda index: self._on_built(document, index),
+                on_error=lambda e, details: self._on_build_failed(document, e, details),
+                on_cancelled=lambda _: self._on_build_cancelled(document),
+            )
+        elif self.query:
+            self.run()
+
+    def detach(self):
+        """Returns the index of the displayed document (None while it is still being built) and forgets it."""
+        index = self.index
+        self.index = None
+        if self._building is not None:
+            self.app.io_worker.cancel_category('search_index')
+            self._building = None
+        self._matches, self._position = [], -1
+        return index
+
+    @staticmethod
+    def _build_job(job, document):
+        # Reads `document` from the worker thread like a save does; lazy values decode under its lock
+        with instrumentation.span('search_index.build') as s:
+            index = SearchIndex.build(document, check=job.check_cancelled)
+            s.add('indexed_nodes', len(index))
+        return index
+
+    def _on_built(self, document, index):
+        self.app.actions.drop_document(document)
+        if document is not self._building:
+            return # The user has moved on to another file
+        if self._stale: # An edit raced with the build; index the current state instead
+            self._building = None
+            self.start(document)
+            return
+        self._building = None
+        self.index = index
+        if self.query:
+            self.run()
+
+    def _on_build_failed(self, document, e, details):
+        self.app.actions.drop_document(document)
+        if document is not self._building:
+            return
+        self._building = None
+        if self._stale: # E.g. a dict changed size while it was being walked
+            self.start(document)
+            return
+        print(f"[WARN] Could not index {getattr(self.app.current_sol_path, 'name', 'the document')} "
+              f"for searching: {type(e).__name__} - {e}")
+        print(details)
+
+    def _on_build_cancelled(self, document):
+        self.app.actions.drop_document(document)
+
+    def record(self, path, old, new):
+        """Keeps the index current after the value at `path` changed from `old` to `new`."""
+        if self.index is not None:
+            self.index.update(path, old, new)
+        elif self._building is not None:
+            self._stale = True
+        if self.query:
+            self.schedule(reveal=False) # Refresh the highlights without opening rows again
+
+    # --- Queries ---
+    @property
+    def query(self):
+        return self.app.search_var.get()
+
+    @property
+    def mode(self):
+        return REGEX if self.app.search_regex_var.get() else PREFIX
+
+    def schedule(self, *trace_args, reveal=True):
+        """Runs the search once typing has paused (also usable as a Tk variable trace)."""
+        if self._timer_id is not None:
+            self.app.master.after_cancel(self._timer_id)
+        self._timer_id = self.app.master.after(SEARCH_DELAY_MS, lambda: self.run(reveal))
+
+    def cancel(self):
+        if self._timer_id is not None:
+            self.app.master.after_cancel(self._timer_id)
+            self._timer_id = None
+
+    def run(self, reveal=True):
+        """Highlights the matches of the current query and, with `reveal`, opens the way to the first ones."""
+        self._timer_id = None
+        model = self.app.tree_model
+        if not model:
+            return
+        query = self.query
+        if not query:
+            self.clear()
+            return
+        if self.index is None:
+            if self._building is not None:
+                self.app.status_var.set("Indexing... the search runs when it is ready")
+            return
+        with instrumentation.span('search', query) as s:
+            try:
+                matches = self.index.search(query, self.mode)
+            except re.error as e:
+                self.app.status_var.set(f"Invalid regular expression: {e}")
+                return
+            self._matches = sorted(matches, key=path_sort_key)
+            if reveal:
+                self._position = -1
+            s.add('search_matches', len(self._matches))
+            model.set_highlights(dict.fromkeys(self._matches[:MAX_HIGHLIGHTED], MATCH_TAG), layer='search')
+            first = None
+            for path in self._matches[:MAX_REVEALED] if reveal else ():
+                item_id = model.reveal(path)
+                if first is None:
+                    first = item_id
+        if first is not None:
+            self.app.data_tree.see(first)
+        count = len(self._matches)
+        if not count:
+            self.app.status_var.set(f"No matches for '{query}'")
+        elif count > MAX_HIGHLIGHTED:
+            self.app.status_var.set(f"{count} matches for '{query}' (first {MAX_HIGHLIGHTED} highlighted)")
+        else:
+            self.app.status_var.set(f"{count} match(es) for '{query}'; Enter selects the next one")
+
+    def next_match(self, event=None):
+        """Selects the next match, opening its ancestors."""
+        if self._timer_id is not None: # Enter pressed before the pause ended
+            self.cancel()
+            self.run()
+        if not self._matches or not self.app.tree_model:
+            return "break"
+        self._position = (self._position + 1) % len(self._matches)
+        item_id = self.app.tree_model.reveal(self._matches[self._position])
+        if item_id is not None:
+            self.app.data_tree.selection_set(item_id)
+            self.app.data_tree.focus(item_id)
+            self.app.data_tree.see(item_id)
+            self.app.status_var.set(f"Match {self._position + 1} of {len(self._matches)}")
+        return "break"
+
+    def clear(self, event=None):
+        """Empties the search box and removes the match highlights."""
+        self.cancel()
+        if self.app.search_var.get():
+            self.app.search_var.set("")
+        self._matches, self._position = [], -1
+        if self.app.tree_model and self.app.tree_model.has_highlights('search'):
+            self.app.tree_model.set_highlights({}, layer='search')
+            self.app.status_var.set("Search cleared")
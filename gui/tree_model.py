@@ -0,0 +1,279 @@
+"""
+Virtualized population of the data Treeview.
+
+Only the rows of opened nodes exist in the widget: every container gets a single
+placeholder child until it is expanded, and long lists are paged into range rows
+such as [0..999] so a single open never inserts more than `page_size` rows.
+
+Every inserted row is indexed by item id with a direct reference to its data
+(the parent container and the dict key or list index), so selections and edits
+never have to walk the widget or parse the displayed "[i]" text.
+
+Rows can be highlighted by document path, in independent layers (e.g. the result of a
+diff and the matches of a search); rows that are inserted later, when a node is opened,
+get their highlight tag on insertion.
+"""
+from bisect import bisect_left
+
+COMPLEX_TYPE_TEXT = "(complex type)"
+PLACEHOLDER_TEXT = "..."
+NOT_LOADED_TEXT = "(not loaded)"
+PAGE_SIZE = 1000
+# Tag of rows that are not highlighted themselves but lead to highlighted rows
+ANCESTOR_TAG = 'highlight_ancestor'
+
+
+class LazyTreeModel:
+    """Inserts Treeview rows on demand. Works with any widget offering the ttk.Treeview item API."""
+
+    def __init__(self, tree, page_size=PAGE_SIZE):
+        self.tree = tree
+        self.page_size = page_size
+        self._refs = {} # item id -> (container, key or index, parent item id)
+        self._pending = {} # item id -> (start, stop) of a container whose rows are not inserted yet
+        self._chunks = {} # item id of a paging row -> (start, stop)
+        self._layers = {} # layer name -> {path tuple: tag}
+        self._highlights = {} # path tuple -> tag, all layers merged
+        self._marked_children = {} # path tuple -> keys of its children leading to a highlight
+        self._marked_indices = {} # path tuple -> sorted list indices of _marked_children, for paging rows
+
+    def reset(self):
+        """Forgets all bookkeeping; call after the widget itself was cleared."""
+        self._refs.clear()
+        self._pending.clear()
+        self._chunks.clear()
+        self._layers = {}
+        self._highlights = {}
+        self._marked_children = {}
+        self._marked_indices = {}
+
+    # --- Lookups ---
+    def ref(self, item_id):
+        """(container, key) holding the value shown by `item_id`, or None for unknown rows.
+
+        Paging rows share the reference of the list they page.
+        """
+        ref = self._refs.get(item_id)
+        return None if ref is None else ref[:2]
+
+    def value(self, item_id):
+        """The value shown by `item_id` (decoding it for lazily loaded documents)."""
+        container, key, _ = self._refs[item_id]
+        return container[key]
+
+    def path(self, item_id):
+        """Keys/indices from the root of the document to `item_id`, e.g. ['parts', 12, 1]."""
+        path = []
+        ref = self._refs.get(item_id)
+        while ref is not None:
+            if item_id not in self._chunks:
+                path.append(ref[1])
+            item_id = ref[2]
+            ref = self._refs.get(item_id)
+        path.reverse()
+        return path
+
+    @property
+    def row_count(self):
+        """Number of indexed rows (placeholders not included)."""
+        return len(self._refs)
+
+    def is_chunk(self, item_id):
+        return item_id in self._chunks
+
+    def chunk_range(self, item_id):
+        """(start, stop) of the list slice shown by a paging row, or None for regular rows."""
+        return self._chunks.get(item_id)
+
+    def is_expanded(self, item_id):
+        return item_id not in self._pending
+
+    def find(self, path):
+        """Item id of the row showing `path`, or None when that row is not inserted (yet)."""
+        item_id = ""
+        for key in path:
+            item_id = self._find_child(item_id, key)
+            if item_id is None:
+                return None
+        return item_id or None
+
+    def reveal(self, path):
+        """Opens the rows leading to `path`, inserting only what lies on the way, and returns
+        the item id of its row (None if the path does not exist)."""
+        item_id = ""
+        for key in path:
+            if item_id:
+                self._open(item_id)
+            item_id = self._find_child(item_id, key, open_chunks=True)
+            if item_id is None:
+                return None
+        return item_id or None
+
+    def _open(self, item_id):
+        self.expand(item_id)
+        self.tree.item(item_id, open=True)
+
+    def _find_child(self, parent, key, open_chunks=False):
+        for child in self.tree.get_children(parent):
+            chunk = self._chunks.get(child)
+            if chunk is not None:
+                if isinstance(key, int) and chunk[0] <= key < chunk[1]:
+                    if open_chunks:
+                        self._open(child)
+                    return self._find_child(child, key, open_chunks)
+            else:
+                ref = self._refs.get(child)
+                if ref is not None and type(ref[1]) is type(key) and ref[1] == key:
+                    return child
+        return None
+
+    # --- Highlights ---
+    def has_highlights(self, layer=None):
+        """True if `layer` (any layer by default) highlights something."""
+        return bool(self._highlights if layer is None else self._layers.get(layer))
+
+    def set_highlights(self, highlights, layer='default'):
+        """Tags the rows at the given paths ({path tuple: tag}) and ANCESTOR_TAG on their ancestors.
+
+        Replaces the earlier highlights of `layer`; an empty mapping removes them. Where layers
+        overlap, the layer set most recently wins.
+        """
+        self._layers.pop(layer, None)
+        if highlights:
+            self._layers[layer] = dict(highlights)
+        self._highlights = {}
+        for layer_highlights in self._layers.values():
+            self._highlights.update(layer_highlights)
+        self._marked_children = {}
+        self._marked_indices = {}
+        for path in self._highlights:
+            for depth in range(len(path)):
+                self._marked_children.setdefault(path[:depth], set()).add(path[depth])
+        for item_id in self._refs:
+            self.tree.item(item_id, tags=self._tags_for(item_id))
+
+    def _tags_for(self, item_id):
+        if not self._highlights:
+            return ()
+        path = tuple(self.path(item_id))
+        if item_id in self._chunks:
+            start, stop = self._chunks[item_id]
+            indices = self._marked_indices.get(path)
+            if indices is None:
+                keys = self._marked_children.get(path, ())
+                indices = self._marked_indices[path] = sorted(k for k in keys if isinstance(k, int))
+            i = bisect_left(indices, start)
+            return (ANCESTOR_TAG,) if i < len(indices) and indices[i] < stop else ()
+        tag = self._highlights.get(path)
+        if tag is not None:
+            return (tag,)
+        return (ANCESTOR_TAG,) if path in self._marked_children else ()
+
+    # --- Population ---
+    def populate(self, data, parent=""):
+        """Inserts the direct children of `data` under `parent`."""
+        self._insert_children(parent, data, 0, None)
+
+    def add_entry(self, parent, container, key):
+        """Inserts the row for `container[key]` under `parent`."""
+        return self._insert_node(parent, container, key, str(key), container[key])
+
+    def add_deferred(self, parent, container, key):
+        """Inserts a container row for `container[key]` without reading the value until it is opened."""
+        item_id = self.tree.insert(parent, "end", text=str(key), open=False, values=(COMPLEX_TYPE_TEXT,))
+        self._refs[item_id] = (container, key, parent)
+        if self._highlights:
+            self.tree.item(item_id, tags=self._tags_for(item_id))
+        self._add_placeholder(item_id)
+        self._pending[item_id] = (0, None)
+        return item_id
+
+    def expand(self, item_id):
+        """Replaces the placeholder of `item_id` by its real children. Returns False if already expanded.
+
+        Exceptions raised while reading the value (e.g. decoding errors) propagate and leave the
+        node collapsed, so opening it again retries.
+        """
+        if item_id not in self._pending:
+            return False
+        start, stop = self._pending[item_id]
+        value = self.value(item_id)
+        del self._pending[item_id]
+        for child in self.tree.get_children(item_id):
+            self.tree.delete(child)
+        self._insert_children(item_id, value, start, stop)
+        return True
+
+    def replace(self, item_id, value):
+        """Shows `value` as the new content of `item_id`, dropping its old rows."""
+        self._forget_descendants(item_id)
+        self._pending.pop(item_id, None)
+        for child in self.tree.get_children(item_id):
+            self.tree.delete(child)
+        if _has_children(value):
+            self.tree.item(item_id, values=(COMPLEX_TYPE_TEXT,))
+            self._add_placeholder(item_id)
+            self._pending[item_id] = (0, None)
+        elif isinstance(value, (dict, list)):
+            self.tree.item(item_id, values=(COMPLEX_TYPE_TEXT,))
+        else:
+            self.tree.item(item_id, values=(str(value),))
+
+    def _forget_descendants(self, item_id):
+        stack = list(self.tree.get_children(item_id))
+        while stack:
+            child = stack.pop()
+            self._refs.pop(child, None)
+            self._pending.pop(child, None)
+            self._chunks.pop(child, None)
+            stack.extend(self.tree.get_children(child))
+
+    def _add_placeholder(self, item_id):
+        self.tree.insert(item_id, "end", text=PLACEHOLDER_TEXT, values=(NOT_LOADED_TEXT,))
+
+    def _insert_children(self, parent, container, start, stop):
+        if isinstance(container, dict):
+            for key, value in sorted(container.items()): # Sort items for consistent display
+                self._insert_node(parent, container, key, str(key), value)
+        elif isinstance(container, list):
+            if stop is None:
+                stop = len(container)
+            if stop - start > self.page_size:
+                self._insert_chunks(parent, container, start, stop)
+                return
+            for i in range(start, stop):
+                self._insert_node(parent, container, i, f"[{i}]", container[i])
+
+    def _insert_chunks(self, parent, container, start, stop):
+        # Nested ranges keep every level at most page_size rows wide, e.g. [0..999999] > [0..999]
+        step = self.page_size
+        while (stop - start) > step * self.page_size:
+            step *= self.page_size
+        # Paging rows point at the paged list itself; the root container gets a holder tuple
+        list_container, list_key, _ = self._refs.get(parent, ((container,), 0, None))
+        for chunk_start in range(start, stop, step):
+            chunk_stop = min(chunk_start + step, stop)
+            item_id = self.tree.insert(parent, "end", text=f"[{chunk_start}..{chunk_stop - 1}]", open=False,
+                                       values=(f"({chunk_stop - chunk_start} items)",))
+            self._refs[item_id] = (list_container, list_key, parent)
+            self._chunks[item_id] = (chunk_start, chunk_stop)
+            if self._highlights:
+                self.tree.item(item_id, tags=self._tags_for(item_id))
+            self._add_placeholder(item_id)
+            self._pending[item_id] = (chunk_start, chunk_stop)
+
+    def _insert_node(self, parent, container, key, text, value):
+        is_container = isinstance(value, (dict, list))
+        item_id = self.tree.insert(parent, "end", text=text, open=False,
+                                   values=(COMPLEX_TYPE_TEXT if is_container else str(value),))
+        self._refs[item_id] = (container, key, parent)
+        if self._highlights:
+            self.tree.item(item_id, tags=self._tags_for(item_id))
+        if is_container and value:
+            self._add_placeholder(item_id)
+            self._pending[item_id] = (0, None)
+        return item_id
+
+
+def _has_children(value):
+    return isinstance(value, (dict, list)) and len(value) > 0
@@ -0,0 +1,128 @@
+"""
+Undo/redo journal of value edits.
+
+Each step is a list of patches (path, old value, new value). Patches hold references to
+the values that were replaced, never copies of the document, so a step costs the same
+whether the save has 100 or 100000 parts. Steps are undone strictly in reverse order,
+which keeps those references valid: when a step is undone, every later edit below its
+path has already been undone too.
+"""
+from sol_edits import MISSING, delete_path, set_path
+
+MAX_STEPS = 200
+
+
+class Patch:
+    __slots__ = ('path', 'old', 'new')
+
+    def __init__(self, path, old, new):
+        self.path = tuple(path)
+        self.old = old
+        self.new = new
+
+
+class UndoStep:
+    __slots__ = ('label', 'patches')
+
+    def __init__(self, label, patches):
+        self.label = label
+        self.patches = patches
+
+
+class UndoJournal:
+    """Undo and redo stacks of UndoSteps for one document."""
+
+    def __init__(self, max_steps=MAX_STEPS):
+        self.max_steps = max_steps
+        self._undo = []
+        self._redo = []
+        self._group = None # Patches collected by an open group()
+
+    @property
+    def can_undo(self):
+        return bool(self._undo)
+
+    @property
+    def can_redo(self):
+        return bool(self._redo)
+
+    def record(self, label, path, old, new):
+        """Records one edit that has already been applied to the document."""
+        patch = Patch(path, old, new)
+        if self._group is not None:
+            self._group.patches.append(patch)
+        else:
+            self._push(UndoStep(label, [patch]))
+
+    def group(self, label):
+        """Context manager: every record() inside becomes part of a single step."""
+        return _Group(self, label)
+
+    def undo(self, document):
+        """Reverts the newest step on `document`; returns it (None if there is nothing to undo)."""
+        if not self._undo:
+            return None
+        step = self._undo.pop()
+        for patch in reversed(step.patches):
+            _apply(document, patch.path, patch.old)
+        self._redo.append(step)
+        return step
+
+    def redo(self, document):
+        if not self._redo:
+            return None
+        step = self._redo.pop()
+        for patch in step.patches:
+            _apply(document, patch.path, patch.new)
+        self._undo.append(step)
+        return step
+
+    def replay(self, document):
+        """Applies every undoable step, oldest first, to another document, e.g. a newer version of the
+        same file. Returns (applied, skipped) patch counts; patches whose path no longer exists are skipped."""
+        applied = skipped = 0
+        for step in self._undo:
+            for patch in step.patches:
+                try:
+                    _apply(document, patch.path, patch.new)
+                except (KeyError, IndexError, TypeError):
+                    skipped += 1
+                else:
+                    applied += 1
+        return applied, skipped
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+
+    def _push(self, step):
+        if not step.patches:
+            return
+        self._undo.append(step)
+        if len(self._undo) > self.max_steps:
+            del self._undo[0]
+        self._redo.clear() # A new edit makes the undone steps unreachable
+
+
+class _Group:
+    def __init__(self, journal, label):
+        self.journal = journal
+        self.step = UndoStep(label, [])
+
+    def __enter__(self):
+        if self.journal._group is not None:
+            raise RuntimeError("Undo groups cannot be nested.")
+        self.journal._group = self.step
+        return self.step
+
+    def __exit__(self, exc_type, exc, tb):
+        self.journal._group = None
+        self.journal._push(self.step) # Also when the operation failed halfway: its edits were applied
+        return False
+
+
+def _apply(document, path, value):
+    if value is MISSING:
+        delete_path(document, list(path))
+    else:
+        set_path(document, list(path), value)
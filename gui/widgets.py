@@ -39,6 +39,16 @@ def setup_left_frame(parent_frame, app_instance):
 
 def setup_middle_frame(parent_frame, app_instance):
     """Sets up the data treeview in the middle frame."""
+    search_frame = ttk.Frame(parent_frame)
+    search_frame.pack(fill=tk.X, pady=(0, 5))
+    ttk.Label(search_frame, text="Search:").pack(side=tk.LEFT, padx=(0, 5))
+    app_instance.search_entry = ttk.Entry(search_frame, textvariable=app_instance.search_var)
+    app_instance.search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+    app_instance.search_entry.bind('<Return>', app_instance.search.next_match)
+    app_instance.search_entry.bind('<Escape>', app_instance.search.clear)
+    ttk.Checkbutton(search_frame, text="Regex", variable=app_instance.search_regex_var).pack(side=tk.LEFT, padx=5)
+    ttk.Button(search_frame, text="Clear", command=app_instance.search.clear).pack(side=tk.LEFT)
+
     tree_frame = ttk.LabelFrame(parent_frame, text="Data Structure", padding="10")
     tree_frame.pack(fill=tk.BOTH, expand=True)
     app_instance.data_tree = ttk.Treeview(tree_frame, columns=("Value"), selectmode="browse")
@@ -59,6 +69,15 @@ def setup_middle_frame(parent_frame, app_instance):
     app_instance.data_tree.bind('<Double-1>', app_instance.on_tree_item_select)
     # Optionally, also bind single click to select
     app_instance.data_tree.bind('<<TreeviewSelect>>', app_instance.on_tree_item_select)
+    # Lazily loaded nodes insert their children when first expanded
+    app_instance.data_tree.bind('<<TreeviewOpen>>', app_instance.on_tree_item_open)
+
+    # Comparison overlay (see SolEditorApp.show_diff)
+    app_instance.data_tree.tag_configure('diff_added', background='#d9f2d0')
+    app_instance.data_tree.tag_configure('diff_changed', background='#fff0b8')
+    app_instance.data_tree.tag_configure('highlight_ancestor', background='#eef3fb')
+    # Search matches (see gui/search.py)
+    app_instance.data_tree.tag_configure('search_match', background='#ffd9a8')
 
 def setup_right_frame(parent_frame, app_instance):
     """Sets up the editing controls and 'Add All' functionality in the right frame."""
@@ -114,7 +133,7 @@ def setup_right_frame(parent_frame, app_instance):
     # --- End Add All Parts/Tags ---
 
 def setup_bottom_actions_frame(master, app_instance):
-    """Sets up save and export buttons in the bottom actions frame."""
+    """Sets up the save, export/import, compare and history buttons in the bottom actions frame."""
     bottom_frame = ttk.Frame(master, padding="10")
     bottom_frame.pack(fill=tk.X, side=tk.BOTTOM, pady=(5,10))
 
@@ -123,3 +142,39 @@ def setup_bottom_actions_frame(master, app_instance):
 
     app_instance.export_button = ttk.Button(bottom_frame, text="Export to JSON", command=app_instance.export_to_json)
     app_instance.export_button.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+
+    app_instance.import_button = ttk.Button(bottom_frame, text="Import JSON...", command=app_instance.import_from_json)
+    app_instance.import_button.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+
+    app_instance.compare_button = ttk.Button(bottom_frame, text="Compare With...", command=app_instance.compare_with_file)
+    app_instance.compare_button.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+
+    app_instance.history_button = ttk.Button(bottom_frame, text="History...", command=app_instance.show_history)
+    app_instance.history_button.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+
+    # Progress of background loads/saves/exports
+    status_frame = ttk.Frame(master, padding=(10, 0))
+    status_frame.pack(fill=tk.X, side=tk.BOTTOM)
+    app_instance.progress_bar = ttk.Progressbar(status_frame, mode='determinate', maximum=100, length=160)
+    app_instance.progress_bar.pack(side=tk.RIGHT, padx=5)
+    ttk.Checkbutton(status_frame, text="Profile", variable=app_instance.profile_var,
+                    command=app_instance.toggle_profiling).pack(side=tk.RIGHT, padx=5)
+    ttk.Button(status_frame, text="Log", width=5, command=app_instance.toggle_log_pane).pack(side=tk.RIGHT, padx=5)
+    # Duration and counters of the last operation
+    ttk.Label(status_frame, textvariable=app_instance.metrics_var, anchor=tk.E,
+              foreground="gray40").pack(side=tk.RIGHT, padx=5)
+    ttk.Label(status_frame, textvariable=app_instance.status_var, anchor=tk.W).pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+    # Log of all notifications, shown above the status line by the "Log" button
+    app_instance.log_frame = ttk.Frame(master, padding=(10, 0))
+    app_instance.log_text = tk.Text(app_instance.log_frame, height=8, wrap=tk.NONE, state=tk.DISABLED,
+                                    font=('Consolas', 9))
+    log_scrollbar = ttk.Scrollbar(app_instance.log_frame, orient=tk.VERTICAL, command=app_instance.log_text.yview)
+    app_instance.log_text.configure(yscrollcommand=log_scrollbar.set)
+    log_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    app_instance.log_text.pack(fill=tk.BOTH, expand=True)
+    app_instance.status_frame = status_frame
+
+    # Non-modal toasts, placed over the bottom right corner while shown
+    app_instance.toast_label = tk.Label(master, padx=12, pady=6, justify=tk.LEFT, wraplength=360,
+                                        font=('Segoe UI', 10))
@@ -0,0 +1,291 @@
+"""
+Lightweight timing and counting of the editor's hot paths.
+
+    with span('read_sol') as s:
+        ...
+        s.add('bytes_read', size)
+
+Every finished span updates per-operation statistics (calls, total/max/last seconds) and
+the global counters, and is passed to the registered listeners (from the thread that ran
+it). Spans nest; only the outermost span of a thread can be profiled.
+
+Profiling is opt-in, through configure_profiling() or the environment:
+    SOL_EDITOR_PROFILE=cprofile|tracemalloc
+    SOL_EDITOR_PROFILE_DIR=<folder for the reports>     (default: ./profiles)
+    SOL_EDITOR_PROFILE_OPS=read_sol,write_sol           (default: every operation)
+Each profiled operation writes one text report (plus a .prof file for cProfile).
+"""
+import io
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+PROFILE_MODES = ('cprofile', 'tracemalloc')
+DEFAULT_PROFILE_DIR = 'profiles'
+REPORT_LINES = 30
+
+
+class Span:
+    """One timed operation; `counters` holds what add() recorded while it ran."""
+
+    __slots__ = ('name', 'detail', 'counters', 'seconds', 'depth', 'thread', 'report', 'error')
+
+    def __init__(self, name, detail, depth):
+        self.name = name
+        self.detail = detail
+        self.counters = {}
+        self.seconds = None
+        self.depth = depth
+        self.thread = threading.current_thread().name
+        self.report = None # Path of the profile report, if this span was profiled
+        self.error = None
+
+    def add(self, counter, amount=1):
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def summary(self):
+        """Short text for a status line, e.g. 'read_sol 12.3 ms, bytes_read 48213'."""
+        parts = [f"{self.name} {self.seconds * 1000:.1f} ms"]
+        parts.extend(f"{counter} {amount}" for counter, amount in self.counters.items())
+        if self.error:
+            parts.append(f"failed ({self.error})")
+        return ", ".join(parts)
+
+
+class _Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.operations = {} # name -> {'calls', 'total_s', 'max_s', 'last_s'}
+        self.counters = {}
+        self.listeners = []
+        self.profile_mode = None
+        self.profile_dir = Path(DEFAULT_PROFILE_DIR)
+        self.profile_ops = None # None: every operation
+        self._profile_lock = threading.Lock() # cProfile and tracemalloc are process-wide
+
+    def stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def finish(self, span):
+        with self._lock:
+            stats = self.operations.get(span.name)
+            if stats is None:
+                stats = self.operations[span.name] = {'calls': 0, 'total_s': 0.0, 'max_s': 0.0, 'last_s': 0.0}
+            stats['calls'] += 1
+            stats['total_s'] += span.seconds
+            stats['max_s'] = max(stats['max_s'], span.seconds)
+            stats['last_s'] = span.seconds
+            if not span.depth: # Nested spans already passed their counters to the outermost one
+                for counter, amount in span.counters.items():
+                    self.counters[counter] = self.counters.get(counter, 0) + amount
+            listeners = list(self.listeners)
+        for listener in listeners:
+            try:
+                listener(span)
+            except Exception as e:
+                print(f"[WARN] Instrumentation listener failed: {type(e).__name__} - {e}")
+
+
+_recorder = _Recorder()
+
+
+class span:
+    """Context manager timing the block as operation `name`; `detail` is free text (e.g. a file name)."""
+
+    def __init__(self, name, detail=None):
+        self._span = None
+        self._name = name
+        self._detail = detail
+        self._profiler = None
+        self._start = None
+
+    def __enter__(self):
+        stack = _recorder.stack()
+        self._span = Span(self._name, self._detail, len(stack))
+        stack.append(self._span)
+        if not self._span.depth and _should_profile(self._name):
+            self._profiler = _start_profiler()
+        self._start = time.perf_counter()
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        current = self._span
+        current.seconds = time.perf_counter() - self._start
+        if exc_type is not None:
+            current.error = exc_type.__name__
+        _recorder.stack().pop()
+        if self._profiler is not None:
+            current.report = _stop_profiler(self._profiler, current)
+        # Counters of nested spans also count for the enclosing one
+        stack = _recorder.stack()
+        if stack:
+            for counter, amount in current.counters.items():
+                stack[-1].add(counter, amount)
+        _recorder.finish(current)
+        return False
+
+
+def count(counter, amount=1):
+    """Adds to a counter outside of any span (or to the innermost running span of this thread)."""
+    stack = _recorder.stack()
+    if stack:
+        stack[-1].add(counter, amount)
+    else:
+        with _recorder._lock:
+            _recorder.counters[counter] = _recorder.counters.get(counter, 0) + amount
+
+
+def add_listener(callback):
+    """`callback(span)` is called for every finished span, on the thread that ran it."""
+    with _recorder._lock:
+        _recorder.listeners.append(callback)
+
+
+def remove_listener(callback):
+    with _recorder._lock:
+        if callback in _recorder.listeners:
+            _recorder.listeners.remove(callback)
+
+
+def stats():
+    """Copy of the per-operation statistics and the global counters."""
+    with _recorder._lock:
+        return {'operations': {name: dict(s) for name, s in _recorder.operations.items()},
+                'counters': dict(_recorder.counters)}
+
+
+def reset():
+    with _recorder._lock:
+        _recorder.operations.clear()
+        _recorder.counters.clear()
+
+
+def format_stats():
+    """Multi-line table of stats(), slowest total first."""
+    data = stats()
+    lines = [f"{'operation':<22} {'calls':>6} {'total ms':>10} {'avg ms':>9} {'max ms':>9}"]
+    for name, s in sorted(data['operations'].items(), key=lambda item: -item[1]['total_s']):
+        lines.append(f"{name:<22} {s['calls']:>6} {s['total_s'] * 1000:>10.1f} "
+                     f"{s['total_s'] / s['calls'] * 1000:>9.2f} {s['max_s'] * 1000:>9.2f}")
+    if data['counters']:
+        lines.append(", ".join(f"{counter} {amount}" for counter, amount in sorted(data['counters'].items())))
+    return "\n".join(lines)
+
+
+# --- Profiling ---
+def configure_profiling(mode=None, output_dir=None, operations=None):
+    """Turns per-operation profiling on ('cprofile' or 'tracemalloc') or off (None)."""
+    if mode is not None and mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode '{mode}'. Expected one of {PROFILE_MODES}.")
+    _recorder.profile_mode = mode
+    if output_dir is not None:
+        _recorder.profile_dir = Path(output_dir)
+    _recorder.profile_ops = set(operations) if operations else None
+
+
+def profiling_mode():
+    return _recorder.profile_mode
+
+
+def profile_dir():
+    return _recorder.profile_dir
+
+
+def _should_profile(name):
+    return _recorder.profile_mode is not None and (_recorder.profile_ops is None or name in _recorder.profile_ops)
+
+
+def _start_profiler():
+    # One capture at a time; operations overlapping a capture simply run unprofiled.
+    if not _recorder._profile_lock.acquire(blocking=False):
+        return None
+    mode = _recorder.profile_mode
+    try:
+        if mode == 'cprofile':
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+            return mode, profiler
+        import tracemalloc
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(10)
+        if hasattr(tracemalloc, 'reset_peak'): # Python 3.9+
+            tracemalloc.reset_peak()
+        return mode, (started, tracemalloc.take_snapshot())
+    except Exception as e:
+        _recorder._profile_lock.release()
+        print(f"[WARN] Could not start {mode} profiling: {type(e).__name__} - {e}")
+        return None
+
+
+def _stop_profiler(handle, current):
+    mode, state = handle
+    try:
+        if mode == 'cprofile':
+            state.disable()
+            return _write_cprofile_report(state, current)
+        return _write_tracemalloc_report(state, current)
+    except Exception as e:
+        print(f"[WARN] Could not write the {mode} report for {current.name}: {type(e).__name__} - {e}")
+        return None
+    finally:
+        _recorder._profile_lock.release()
+
+
+def _report_path(current, suffix):
+    folder = _recorder.profile_dir
+    folder.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    return folder / f"{stamp}-{current.name}{suffix}"
+
+
+def _report_header(current):
+    header = f"{current.name}" + (f" ({current.detail})" if current.detail else "")
+    return f"{header}: {current.seconds * 1000:.1f} ms on thread {current.thread}\n{current.summary()}\n\n"
+
+
+def _write_cprofile_report(profiler, current):
+    import pstats
+    text = io.StringIO()
+    pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(REPORT_LINES)
+    path = _report_path(current, '.txt')
+    profiler.dump_stats(str(path.with_suffix('.prof'))) # For snakeviz, pstats etc.
+    path.write_text(_report_header(current) + text.getvalue())
+    return path
+
+
+def _write_tracemalloc_report(state, current):
+    import tracemalloc
+    started, before = state
+    after = tracemalloc.take_snapshot()
+    size, peak = tracemalloc.get_traced_memory()
+    if started:
+        tracemalloc.stop()
+    lines = [_report_header(current), f"Traced memory now {size / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB\n",
+             f"\nTop {REPORT_LINES} allocation differences by line:\n"]
+    for stat in after.compare_to(before, 'lineno')[:REPORT_LINES]:
+        lines.append(f"{stat}\n")
+    path = _report_path(current, '.txt')
+    path.write_text("".join(lines))
+    return path
+
+
+def _configure_from_environment():
+    mode = os.environ.get('SOL_EDITOR_PROFILE', '').strip().lower() or None
+    if mode is None:
+        return
+    operations = [op.strip() for op in os.environ.get('SOL_EDITOR_PROFILE_OPS', '').split(',') if op.strip()]
+    try:
+        configure_profiling(mode, os.environ.get('SOL_EDITOR_PROFILE_DIR') or None, operations)
+    except ValueError as e:
+        print(f"[WARN] SOL_EDITOR_PROFILE ignored: {e}")
+
+
+_configure_from_environment()
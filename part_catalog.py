@@ -0,0 +1,308 @@
+"""
+Catalog of every part name the game knows, used by "Add All Parts".
+
+A catalog is the sorted list of 'part_<category>_<id>' names for a set of categories and
+ids 1..id_limit-1, plus an index from each name to its (category, id). Catalogs are built
+once and cached, so filling the parts of many saves (or clicking 'Add All' repeatedly)
+costs one dict lookup per existing part and a linear merge.
+
+PartsTable holds a save's [name, count] entries as columns (sorted names, an array of
+counts) so that whole-table edits - every count set to N, the catalog merged in, a
+category kept or dropped - run as list and array operations instead of per-entry Python
+code. to_rows() turns it back into the [name, count] lists the document and write_sol use.
+"""
+import gc
+import re
+import sys
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import lru_cache
+
+KNOWN_PART_CATEGORIES = frozenset({'sword_grip', 'sword_crossguard', 'sword_pommel',
+                                   'arrow_head', 'arrow_fletching',
+                                   'mace_shaft', 'mace_head',
+                                   'shield_body', 'shield_crest', 'shield_paint'})
+MIN_PART_ID_LIMIT = 51 # Ids 1..50 are always generated
+PART_COUNT = 999
+
+# One pass over all names joined by newlines instead of a match() call per name
+_PART_NAME_LINES = re.compile(r'^part_([a-zA-Z0-9_]+)_([a-zA-Z0-9]+)$', re.MULTILINE)
+
+
+class PartCatalog:
+    """Sorted part names for `categories` x ids 1..id_limit-1.
+
+    `category_of` and `id_of` map every name to its category and numeric id.
+    """
+
+    __slots__ = ('categories', 'id_limit', 'names', 'category_of', 'id_of')
+
+    def __init__(self, categories, id_limit):
+        self.categories = frozenset(categories)
+        self.id_limit = id_limit
+        self.category_of = {}
+        self.id_of = {}
+        with _gc_paused():
+            for cat in self.categories:
+                cat_names = [f'part_{cat}_{i}' for i in range(1, id_limit)]
+                self.category_of.update(dict.fromkeys(cat_names, cat))
+                self.id_of.update(zip(cat_names, range(1, id_limit)))
+            self.names = sorted(self.id_of)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.id_of
+
+
+class PartsTable:
+    """A save's parts as columns: `names` sorted, unique and interned, `counts[i]` the count of `names[i]`.
+
+    Lookups by name go through a name -> row index (built on first use, O(1)) or a bisect of
+    `names` (O(log n)); the batch operations rebuild the columns in one pass.
+    """
+
+    __slots__ = ('names', 'counts', '_rows')
+
+    def __init__(self, names=(), counts=()):
+        """`names` must be sorted and unique; `counts` has one int per name."""
+        self.names = list(names)
+        self.counts = array('i', counts)
+        if len(self.counts) != len(self.names):
+            raise ValueError(f"{len(self.names)} names but {len(self.counts)} counts.")
+        self._rows = None
+
+    @classmethod
+    def from_rows(cls, rows, count=None):
+        """The table of a save's [name, count] entries.
+
+        Entries that are not lists of at least two items are skipped, names are converted to
+        strings and the first of several entries with the same name wins. With `count` every part gets
+        that count; otherwise each entry's count must be an int or a whole float (AMF3 saves may store
+        3.0), which is stored as an int, else ValueError.
+        """
+        entries = [entry for entry in rows if isinstance(entry, list) and len(entry) >= 2]
+        names = list(map(sys.intern, [entry[0] if type(entry[0]) is str else str(entry[0]) for entry in entries]))
+        if count is not None:
+            names = sorted(set(names))
+            counts = array('i', [count]) * len(names)
+        else:
+            # Built backwards so that the first entry of a repeated name is the one kept
+            count_of = dict(zip(reversed(names), reversed([entry[1] for entry in entries])))
+            if not {int}.issuperset(map(type, count_of.values())):
+                count_of = {name: _whole_count(name, value) for name, value in count_of.items()}
+            names = sorted(count_of)
+            try:
+                counts = array('i', map(count_of.__getitem__, names))
+            except OverflowError:
+                raise ValueError("A part count does not fit in 32 bits.") from None
+        table = cls()
+        table.names, table.counts = names, counts
+        return table
+
+    def to_rows(self):
+        """The [name, count] lists, sorted by name, as stored in a save."""
+        with _gc_paused():
+            return [[name, count] for name, count in zip(self.names, self.counts)]
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        """(name, count) pairs in name order."""
+        return zip(self.names, self.counts)
+
+    def __contains__(self, name):
+        return name in self._index()
+
+    def __repr__(self):
+        return f"PartsTable({len(self.names)} parts)"
+
+    def copy(self):
+        table = PartsTable()
+        table.names, table.counts = list(self.names), array('i', self.counts)
+        return table
+
+    def _index(self):
+        if self._rows is None:
+            self._rows = dict(zip(self.names, range(len(self.names))))
+        return self._rows
+
+    # --- Single parts ---
+    def row_of(self, name):
+        """The row of `name` or None (hash lookup)."""
+        return self._index().get(name)
+
+    def find(self, name):
+        """The row of `name` or None (bisect, without building the index)."""
+        row = bisect_left(self.names, name)
+        return row if row < len(self.names) and self.names[row] == name else None
+
+    def get(self, name, default=None):
+        row = self._index().get(name)
+        return default if row is None else self.counts[row]
+
+    def set_count(self, name, count):
+        """Sets the count of `name`, inserting it in name order if it is new."""
+        row = self.row_of(name)
+        if row is None:
+            row = bisect_left(self.names, name)
+            self.names.insert(row, sys.intern(name))
+            self.counts.insert(row, count)
+            self._rows = None # Later rows moved
+        else:
+            self.counts[row] = count
+
+    # --- Batch operations ---
+    def set_all_counts(self, count):
+        """Sets every count to `count`."""
+        self.counts = array('i', [count]) * len(self.names)
+
+    def merge_names(self, names, count=PART_COUNT):
+        """Adds the sorted `names` that are missing, with `count`; returns how many were added."""
+        existing = self._rows if self._rows is not None else set(self.names) # A set is cheaper than the index
+        added = [name for name in names if name not in existing]
+        if not added:
+            return 0
+        combined = self.names + added
+        if self.counts.count(count) == len(self.counts): # Uniform counts: no need to carry them along
+            # Two sorted runs: timsort merges them in linear time instead of re-sorting
+            combined.sort()
+            self.names, self.counts = combined, array('i', [count]) * len(combined)
+        else:
+            order = sorted(range(len(combined)), key=combined.__getitem__)
+            combined_counts = self.counts + array('i', [count]) * len(added)
+            self.names = list(map(combined.__getitem__, order))
+            self.counts = array('i', map(combined_counts.__getitem__, order))
+        self._rows = None
+        return len(added)
+
+    def merge_catalog(self, part_catalog, count=PART_COUNT):
+        """Adds every name of `part_catalog` that is missing, with `count`; returns how many were added."""
+        return self.merge_names(part_catalog.names, count)
+
+    def category_rows(self, category):
+        """The rows of the names 'part_<category>_<id>', as a range when they are contiguous."""
+        prefix = f'part_{category}_'
+        start = bisect_left(self.names, prefix)
+        stop = bisect_left(self.names, prefix[:-1] + '`', start) # '`' sorts right after '_'
+        # Names of a longer category ('part_<category>_x_<id>') share the prefix; each has an extra '_'
+        if '\n'.join(self.names[start:stop]).count('_') == prefix.count('_') * (stop - start):
+            return range(start, stop)
+        return [row for row in range(start, stop) if '_' not in self.names[row][len(prefix):]]
+
+    def filter_categories(self, categories, keep=True):
+        """Keeps only (with `keep`) or drops the parts of `categories`; returns how many were removed."""
+        selected = []
+        for category in set(categories):
+            rows = self.category_rows(category)
+            if isinstance(rows, range):
+                if rows:
+                    selected.append((rows.start, rows.stop))
+            else:
+                selected.extend((row, row + 1) for row in rows)
+        selected.sort()
+        if not keep: # Complement of the selected spans
+            kept, start = [], 0
+            for span_start, span_stop in selected:
+                if span_start > start:
+                    kept.append((start, span_start))
+                start = span_stop
+            if start < len(self.names):
+                kept.append((start, len(self.names)))
+            selected = kept
+        names, counts = [], array('i')
+        for start, stop in selected:
+            names += self.names[start:stop]
+            counts += self.counts[start:stop]
+        removed = len(self.names) - len(names)
+        self.names, self.counts, self._rows = names, counts, None
+        return removed
+
+
+def _whole_count(name, value):
+    # AMF3 saves may store whole counts as doubles
+    if type(value) is float and value.is_integer():
+        return int(value)
+    if type(value) is not int:
+        raise ValueError(f"The count of '{name}' is not an integer: {value!r}.")
+    return value
+
+
+@contextmanager
+def _gc_paused():
+    # Building 100k+ small lists would otherwise trigger many useless collections
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+_last_catalog = None # Most recently used catalog; its index parses the names of the next save
+
+
+@lru_cache(maxsize=16)
+def catalog(categories=KNOWN_PART_CATEGORIES, id_limit=MIN_PART_ID_LIMIT):
+    """The cached PartCatalog for a frozenset of categories and an id limit."""
+    return PartCatalog(categories, id_limit)
+
+
+def scan_names(names, known=None):
+    """(categories, highest numeric id) found in part names like 'part_sword_grip_12'.
+
+    Names of the `known` catalog (default: the last one used) are looked up in its index;
+    only the others go through the regular expression.
+    """
+    if known is None:
+        known = _last_catalog
+    if known is None:
+        categories, max_id, unknown = set(), 0, names
+    else:
+        categories = set(map(known.category_of.get, names))
+        ids = list(map(known.id_of.get, names))
+        unknown = ()
+        if None in categories:
+            categories.discard(None)
+            unknown = [name for name in names if name not in known.id_of]
+            ids = [part_id for part_id in ids if part_id is not None]
+        max_id = max(ids, default=0)
+    if not unknown:
+        return categories, max_id
+
+    joined = '\n'.join(unknown)
+    if joined.count('\n') != max(len(unknown) - 1, 0): # A name contains a newline; match one by one
+        matches = [m.groups() for m in map(_PART_NAME_LINES.fullmatch, unknown) if m]
+    else:
+        matches = _PART_NAME_LINES.findall(joined)
+    categories.update(cat for cat, _ in matches)
+    max_id = max(max_id, max((int(part_id) for _, part_id in matches if part_id.isdigit()), default=0))
+    return categories, max_id
+
+
+def catalog_for(names):
+    """The catalog 'Add All' uses for a save with these part names.
+
+    Categories are those found in the names (KNOWN_PART_CATEGORIES when there are none); ids
+    run up to the highest id found, and at least to 50.
+    """
+    global _last_catalog
+    categories, max_id = scan_names(names)
+    _last_catalog = catalog(frozenset(categories) or KNOWN_PART_CATEGORIES, max(max_id + 1, MIN_PART_ID_LIMIT))
+    return _last_catalog
+
+
+def all_parts(existing_parts, count=PART_COUNT):
+    """Every part of a save (existing ones plus its catalog) at `count`, sorted by name."""
+    table = PartsTable.from_rows(existing_parts, count)
+    table.merge_catalog(catalog_for(table.names), count)
+    return table.to_rows()
+
+
+def all_parts_many(parts_lists, count=PART_COUNT):
+    """all_parts for several saves at once; saves with the same categories share one catalog."""
+    return [all_parts(parts, count) for parts in parts_lists]
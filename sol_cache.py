@@ -0,0 +1,177 @@
+"""
+Persistent cache of decoded saves: reopening a file whose bytes did not change skips AMF decoding.
+
+Entries are keyed by the BLAKE2b hash of the file's bytes, so any change to the file is a
+miss while an identical copy (a backup, the same save in another folder) is a hit. An
+entry is a version header followed by a pickle of the document: its top-level values,
+root name and AMF version, plus the byte spans of every top-level entry, so a document
+loaded from the cache still saves incrementally. The bytes themselves are not stored;
+they are the file the caller read to compute the key. Once the entries take more than
+`max_bytes`, the least recently used ones are deleted (a hit refreshes its entry).
+
+The cache is opt-in: pass a DecodeCache to read_sol, or set the environment variables
+below for the editor and sol_cli.py:
+    SOL_EDITOR_DECODE_CACHE=<folder for the entries>
+    SOL_EDITOR_DECODE_CACHE_MB=256                      (default: 256)
+Entries are pickles, which can run code when loaded: use a folder only you can write to.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+from sol_handler import SolDocument
+
+CACHE_VERSION = 1 # Bump whenever the pickled layout (SolDocument, AMF types, _SolEntry) changes
+DEFAULT_MAX_MB = 256
+ENTRY_SUFFIX = '.solcache'
+_HEADER = b'SOLCACHE' + CACHE_VERSION.to_bytes(2, 'big')
+
+
+def content_key(data):
+    """Hex BLAKE2b digest of a file's bytes."""
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+class DecodeCache:
+    """A folder of decoded documents; see the module docstring."""
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def _path(self, key):
+        return self.directory / f"{key}{ENTRY_SUFFIX}"
+
+    def load(self, data):
+        """The document decoded from the file bytes `data`, or None when it is not cached."""
+        path = self._path(content_key(data))
+        try:
+            with open(path, 'rb') as f:
+                payload = f.read()
+        except OSError:
+            self.misses += 1
+            return None
+        try:
+            if not payload.startswith(_HEADER):
+                raise ValueError("written by another version")
+            size, sol_name, amf_version, items, entries = pickle.loads(memoryview(payload)[len(_HEADER):])
+            if size != len(data):
+                raise ValueError("size does not match the file")
+        except Exception as e:
+            # An outdated or damaged entry is not an error: decode the file and store it again
+            print(f"[WARN] Discarding decode cache entry {path.name}: {e}")
+            _remove(path)
+            self.misses += 1
+            return None
+        document = SolDocument()
+        document.sol_name = sol_name
+        document.amf_version = amf_version
+        for key, value in items:
+            dict.__setitem__(document, key, value)
+        document._set_baseline(data, {entry.key: entry for entry in entries})
+        try:
+            os.utime(path) # Most recently used
+        except OSError:
+            pass
+        self.hits += 1
+        return document
+
+    def store(self, document):
+        """Caches `document` under the bytes it was decoded from (or last saved as).
+
+        Returns False, storing nothing, when it has unsaved edits or no baseline at all,
+        or when it was edited or saved while being pickled (e.g. on a worker thread).
+        """
+        baseline = document.clean_baseline()
+        if baseline is None:
+            return False
+        data, entries = baseline
+        payload = pickle.dumps((len(data), document.sol_name, document.amf_version,
+                                list(dict.items(document)), list(entries.values())),
+                               protocol=pickle.HIGHEST_PROTOCOL)
+        again = document.clean_baseline()
+        if again is None or again[1] is not entries:
+            return False
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._write(self._path(content_key(data)), payload)
+            self._evict()
+        except OSError as e:
+            print(f"[WARN] Could not write to the decode cache in {self.directory}: {e}")
+            return False
+        self.stores += 1
+        return True
+
+    def _write(self, path, payload):
+        # A reader (another editor or sol_cli process) never sees half an entry
+        fd, temp_name = tempfile.mkstemp(prefix='.', suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(_HEADER)
+                f.write(payload)
+            os.replace(temp_name, path)
+        except BaseException:
+            _remove(Path(temp_name))
+            raise
+
+    def _evict(self):
+        """Deletes the least recently used entries until the rest fit in max_bytes."""
+        entries = []
+        for path in self.directory.glob(f"*{ENTRY_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue # Evicted by another process meanwhile
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            _remove(path)
+            total -= size
+            self.evictions += 1
+
+    def size_bytes(self):
+        return sum(path.stat().st_size for path in self.directory.glob(f"*{ENTRY_SUFFIX}"))
+
+    def clear(self):
+        for path in self.directory.glob(f"*{ENTRY_SUFFIX}"):
+            _remove(path)
+
+
+def _remove(path):
+    try:
+        path.unlink()
+    except OSError:
+        pass
+
+
+_default_cache = None
+
+
+def default_cache():
+    """The DecodeCache configured through the environment, or None (the cache is off)."""
+    return _default_cache
+
+
+def _configure_from_environment():
+    global _default_cache
+    directory = os.environ.get('SOL_EDITOR_DECODE_CACHE', '').strip()
+    if not directory:
+        return
+    size_mb = os.environ.get('SOL_EDITOR_DECODE_CACHE_MB', '').strip() or DEFAULT_MAX_MB
+    try:
+        max_bytes = int(float(size_mb) * 1024 * 1024)
+    except ValueError:
+        print(f"[WARN] SOL_EDITOR_DECODE_CACHE_MB ignored: {size_mb!r} is not a number")
+        max_bytes = DEFAULT_MAX_MB * 1024 * 1024
+    _default_cache = DecodeCache(directory, max_bytes)
+
+
+_configure_from_environment()
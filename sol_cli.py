@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Headless batch editor: applies the same edits to many .sol files in parallel.
+
+Examples:
+    python sol_cli.py "%APPDATA%/com.flipline.jacksmith/Local Store/#SharedObjects" --add-all-parts
+    python sol_cli.py saves/*.sol --set gold=100000 --set settings.music=0.5 --dry-run
+    python sol_cli.py saves/*.sol --remove-part-category shield_paint --set-part-counts 50
+
+Edits are applied in the order they are given. Folders are expanded to their *.sol files;
+files with "backup" in their name are skipped, like in the editor. With
+SOL_EDITOR_DECODE_CACHE set (see sol_cache), decoded files are cached between runs.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from sol_handler import SOL_BACKUP_COUNT, read_sol, write_sol
+from sol_cache import default_cache
+from sol_edits import all_design_tags, all_parts, format_path, parse_path, parse_value, set_path
+from part_catalog import PartsTable
+
+
+def collect_files(targets):
+    """Expands folders and glob patterns into a sorted list of .sol files (backups excluded)."""
+    files = set()
+    for target in targets:
+        target = os.path.expandvars(os.path.expanduser(target))
+        if os.path.isdir(target):
+            candidates = Path(target).glob("*.sol")
+        else:
+            candidates = (Path(p) for p in glob.glob(target))
+        files.update(p.resolve() for p in candidates if p.is_file() and "backup" not in p.name.lower())
+    return sorted(files)
+
+
+def parse_operations(raw_operations):
+    """Validates the command line operations: [('set', path, value), ('add_all_parts',), ...]."""
+    operations = []
+    for op in raw_operations or ():
+        if op[0] == 'set':
+            path_text, sep, value_text = op[1].partition('=')
+            if not sep:
+                raise ValueError(f"--set expects PATH=VALUE, got '{op[1]}'.")
+            operations.append(('set', parse_path(path_text.strip()), parse_value(value_text)))
+        else:
+            operations.append(op)
+    return operations
+
+
+def apply_operations(document, operations):
+    """Applies the operations in order and returns descriptions of what actually changed."""
+    changes = []
+    for op in operations:
+        if op[0] == 'set':
+            _, path, value = op
+            old = set_path(document, path, value)
+            if old != value:
+                changes.append(f"{format_path(path)}: {old!r} -> {value!r}")
+        elif op[0] == 'add_all_parts':
+            existing = document.get('parts')
+            updated = all_parts(existing if isinstance(existing, list) else [])
+            if updated != existing:
+                document['parts'] = updated
+                changes.append(f"parts: {len(existing or [])} -> {len(updated)} entries")
+        elif op[0] in ('set_part_counts', 'remove_part_category'):
+            existing = document.get('parts')
+            if not isinstance(existing, list):
+                continue
+            table = PartsTable.from_rows(existing, op[1] if op[0] == 'set_part_counts' else None)
+            if op[0] == 'remove_part_category':
+                table.filter_categories([op[1]], keep=False)
+            updated = table.to_rows()
+            if updated != existing:
+                document['parts'] = updated
+                changes.append(f"parts: {op[0].replace('_', ' ')} {op[1]} ({len(existing)} -> {len(updated)} entries)")
+        elif op[0] == 'add_all_design_tags':
+            existing = document.get('newdesigntags')
+            updated = all_design_tags()
+            if updated != existing:
+                document['newdesigntags'] = updated
+                changes.append(f"newdesigntags: {len(existing or [])} -> {len(updated)} tags")
+        else:
+            raise ValueError(f"Unknown operation {op[0]!r}.")
+    return changes
+
+
+def process_file(path, operations, dry_run=False, backups=SOL_BACKUP_COUNT):
+    """Worker: reads, edits and (unless dry_run) writes one file. Never raises; returns a result dict."""
+    result = {'path': str(path), 'status': 'error', 'changes': [], 'error': None,
+              'read_s': 0.0, 'edit_s': 0.0, 'write_s': 0.0}
+    try:
+        start = time.perf_counter()
+        cache = default_cache() # Set up from the environment in every worker process
+        document = read_sol(path, cache=cache)
+        result['read_s'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result['changes'] = apply_operations(document, operations)
+        result['edit_s'] = time.perf_counter() - start
+
+        if not result['changes']:
+            result['status'] = 'unchanged'
+        elif dry_run:
+            result['status'] = 'would change'
+        else:
+            start = time.perf_counter()
+            written = write_sol(path, document, backups=backups)
+            result['write_s'] = time.perf_counter() - start
+            if written and cache is not None:
+                cache.store(document) # The next run over the same files skips decoding
+            result['status'] = 'changed' if written else 'unchanged'
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def print_report(results, wall_seconds, verbose=False):
+    print(f"{'status':<13} {'read ms':>8} {'edit ms':>8} {'write ms':>9}  file")
+    for r in results:
+        print(f"{r['status']:<13} {r['read_s'] * 1000:>8.1f} {r['edit_s'] * 1000:>8.1f} {r['write_s'] * 1000:>9.1f}  {r['path']}")
+        if r['error']:
+            print(f"{'':<13} [ERROR] {r['error']}")
+        elif verbose:
+            for change in r['changes']:
+                print(f"{'':<13} {change}")
+
+    counts = {}
+    for r in results:
+        counts[r['status']] = counts.get(r['status'], 0) + 1
+    busy = sum(r['read_s'] + r['edit_s'] + r['write_s'] for r in results)
+    slowest = max(results, key=lambda r: r['read_s'] + r['edit_s'] + r['write_s'], default=None)
+    summary = ", ".join(f"{n} {status}" for status, n in sorted(counts.items()))
+    print(f"\n{len(results)} file(s): {summary or 'none'}")
+    print(f"Wall time {wall_seconds * 1000:.1f} ms, summed per-file time {busy * 1000:.1f} ms"
+          + (f", slowest {Path(slowest['path']).name}" if slowest else ""))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0],
+                                     epilog="PATH uses dots for keys and [i] for list indices, e.g. weapons[0].name. "
+                                            "VALUE is parsed as JSON when possible (100, true, \"text\"), else taken as text.")
+    parser.add_argument('targets', nargs='+', help="Folders, .sol files or glob patterns.")
+    parser.add_argument('--set', dest='operations', action='append', type=lambda text: ('set', text),
+                        metavar='PATH=VALUE', help="Set a value (repeatable).")
+    parser.add_argument('--add-all-parts', dest='operations', action='append_const', const=('add_all_parts',),
+                        help="Add every part with count 999, like the editor's 'Add All' button on 'parts'.")
+    parser.add_argument('--set-part-counts', dest='operations', action='append', metavar='N',
+                        type=lambda text: ('set_part_counts', int(text)),
+                        help="Set the count of every part to N.")
+    parser.add_argument('--remove-part-category', dest='operations', action='append', metavar='CATEGORY',
+                        type=lambda text: ('remove_part_category', text),
+                        help="Remove the parts of a category, e.g. shield_paint. "
+                             "Like 'Add All', part edits leave the parts sorted by name.")
+    parser.add_argument('--add-all-design-tags', dest='operations', action='append_const', const=('add_all_design_tags',),
+                        help="Add every design tag, like the editor's 'Add All' button on 'newdesigntags'.")
+    parser.add_argument('--dry-run', action='store_true', help="Report what would change without writing.")
+    parser.add_argument('--jobs', type=int, default=None, help="Worker processes (default: CPU count).")
+    parser.add_argument('--backups', type=int, default=SOL_BACKUP_COUNT, help="Rotating backups to keep per file.")
+    parser.add_argument('-v', '--verbose', action='store_true', help="List every change per file.")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        operations = parse_operations(args.operations)
+    except ValueError as e:
+        parser.error(str(e))
+    if not operations:
+        parser.error("No edits given (use --set, --add-all-parts or --add-all-design-tags).")
+
+    files = collect_files(args.targets)
+    if not files:
+        print("[WARN] No .sol files found.")
+        return 1
+
+    start = time.perf_counter()
+    results = []
+    if len(files) == 1 or args.jobs == 1:
+        results = [process_file(path, operations, args.dry_run, args.backups) for path in files]
+    else:
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            futures = [executor.submit(process_file, path, operations, args.dry_run, args.backups) for path in files]
+            results = [future.result() for future in as_completed(futures)]
+        results.sort(key=lambda r: r['path'])
+    print_report(results, time.perf_counter() - start, verbose=args.verbose or args.dry_run)
+    return 1 if any(r['status'] == 'error' for r in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
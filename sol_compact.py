@@ -0,0 +1,266 @@
+"""
+Compact storage for decoded saves: array-backed lists of numbers and interned strings.
+
+A decoded list of ints (or of floats) normally costs a pointer plus, for most values, a
+separate int/float object per item. ScalarArray keeps such lists in an array.array using
+the narrowest type that holds them ('b' for [3, 0, 12], 'd' for floats), while still
+being a list: isinstance() checks, indexing, slicing, iteration, len(), comparisons,
+copy and pickle all behave as for the list it replaces, so the tree, the edit helpers,
+the encoder and the exporters need no special cases. Storing a value the array cannot
+hold (a string, a float among ints, a bool) turns the storage back into a plain list;
+ints that outgrow the item size widen the array.
+
+One caveat: C code that reads list internals directly (json.dumps without indent, for
+one) sees a ScalarArray as empty; encode through JSONEncoder.iterencode() or tolist().
+"""
+import sys
+from array import array
+
+COMPACT_MIN_ITEMS = 8 # Shorter lists are left alone; the array header would eat the savings
+INTERN_MAX_LENGTH = 64 # Longer decoded strings are rarely repeated and are not interned
+
+_INT_TYPECODES = ('b', 'h', 'i', 'q') # Narrowest first
+_INT_LIMITS = {typecode: 1 << (array(typecode).itemsize * 8 - 1) for typecode in _INT_TYPECODES}
+
+
+def intern_string(value):
+    """`value` interned when it is short enough to be worth sharing (dict keys, part names)."""
+    return sys.intern(value) if len(value) <= INTERN_MAX_LENGTH else value
+
+
+def _int_typecode(low, high):
+    for typecode in _INT_TYPECODES:
+        limit = _INT_LIMITS[typecode]
+        if -limit <= low and high < limit:
+            return typecode
+    return None
+
+
+def _typecode_for(values):
+    """The array typecode that holds every item of `values` unchanged, or None."""
+    if not values:
+        return None
+    kind = type(values[0])
+    if kind is float:
+        return 'd' if all(type(value) is float for value in values) else None
+    if kind is int and all(type(value) is int for value in values):
+        return _int_typecode(min(values), max(values))
+    return None # bool is excluded on purpose: it must come back as True/False
+
+
+class ScalarArray(list):
+    """A list of ints or floats stored in an array.array; see the module docstring."""
+
+    __slots__ = ('_items',)
+
+    def __init__(self, iterable=()):
+        if isinstance(iterable, array):
+            self._items = array(iterable.typecode, iterable)
+            return
+        values = list(iterable)
+        typecode = _typecode_for(values)
+        self._items = array(typecode, values) if typecode else values
+
+    @property
+    def typecode(self):
+        """The array typecode, or None once the items live in a plain list."""
+        return self._items.typecode if self._items.__class__ is array else None
+
+    def tolist(self):
+        return self._items.tolist() if self._items.__class__ is array else list(self._items)
+
+    def _prepare(self, values):
+        """`values` (a list) converted for storage in `_items`; widens or unpacks the array if needed."""
+        items = self._items
+        if items.__class__ is not array:
+            return values
+        typecode = items.typecode
+        needed = _typecode_for(values) if values else typecode
+        if typecode == 'd' or needed in (None, 'd'):
+            needed = typecode if needed == typecode else None
+        elif _INT_TYPECODES.index(needed) < _INT_TYPECODES.index(typecode):
+            needed = typecode
+        if needed is None:
+            self._items = items.tolist()
+            return values
+        if needed != typecode:
+            self._items = array(needed, items)
+        return array(needed, values)
+
+    # --- Reading ---
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __reversed__(self):
+        return reversed(self._items)
+
+    def __contains__(self, value):
+        return value in self._items
+
+    def __getitem__(self, key):
+        items = self._items[key]
+        return items.tolist() if items.__class__ is array else items
+
+    def index(self, value, start=0, stop=sys.maxsize):
+        try:
+            return self._items.index(value, start, stop)
+        except ValueError:
+            raise ValueError(f"{value!r} is not in list") from None
+
+    def count(self, value):
+        return self._items.count(value)
+
+    def copy(self):
+        return ScalarArray(self._items)
+
+    def __repr__(self):
+        return repr(self.tolist())
+
+    def __sizeof__(self):
+        return list.__sizeof__(self) + sys.getsizeof(self._items)
+
+    def __reduce__(self):
+        return (ScalarArray, (self._items,))
+
+    # --- Comparisons: as lists ---
+    def _compare(self, other, op):
+        if isinstance(other, ScalarArray):
+            other = other.tolist()
+        elif not isinstance(other, list):
+            return NotImplemented
+        return op(self.tolist(), other)
+
+    def __eq__(self, other):
+        if isinstance(other, ScalarArray) and self._items.__class__ is other._items.__class__ is array:
+            return self._items == other._items
+        return self._compare(other, list.__eq__)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __lt__(self, other):
+        return self._compare(other, list.__lt__)
+
+    def __le__(self, other):
+        return self._compare(other, list.__le__)
+
+    def __gt__(self, other):
+        return self._compare(other, list.__gt__)
+
+    def __ge__(self, other):
+        return self._compare(other, list.__ge__)
+
+    __hash__ = None
+
+    # --- Arithmetic: plain lists, like slicing ---
+    def __add__(self, other):
+        if not isinstance(other, list):
+            return NotImplemented
+        return self.tolist() + list(other)
+
+    def __radd__(self, other):
+        if not isinstance(other, list):
+            return NotImplemented
+        return list(other) + self.tolist()
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+    def __mul__(self, times):
+        return self.tolist() * times
+
+    __rmul__ = __mul__
+
+    def __imul__(self, times):
+        self._items *= times
+        return self
+
+    # --- Writing ---
+    def __setitem__(self, key, value):
+        # _prepare() first: it may replace self._items
+        if isinstance(key, slice):
+            values = self._prepare(list(value))
+            self._items[key] = values
+        else:
+            value = self._prepare([value])[0]
+            self._items[key] = value
+
+    def __delitem__(self, key):
+        del self._items[key]
+
+    def append(self, value):
+        values = self._prepare([value])
+        self._items.extend(values)
+
+    def extend(self, iterable):
+        values = self._prepare(self.tolist() if iterable is self else list(iterable))
+        self._items.extend(values)
+
+    def insert(self, index, value):
+        value = self._prepare([value])[0]
+        self._items.insert(index, value)
+
+    def pop(self, index=-1):
+        if not self._items:
+            raise IndexError("pop from empty list")
+        return self._items.pop(index)
+
+    def remove(self, value):
+        del self._items[self.index(value)]
+
+    def clear(self):
+        del self._items[:]
+
+    def reverse(self):
+        self._items.reverse()
+
+    def sort(self, *, key=None, reverse=False):
+        values = self._prepare(sorted(self._items, key=key, reverse=reverse))
+        self._items[:] = values
+
+
+def compact_list(values):
+    """A ScalarArray with the items of `values` when they are all ints or all floats, else `values`."""
+    if len(values) < COMPACT_MIN_ITEMS or type(values) is not list or _typecode_for(values) is None:
+        return values
+    return ScalarArray(values)
+
+
+def compact(value):
+    """Compacts every eligible list below `value` in place; returns the (possibly new) value.
+
+    Lists that occur more than once keep sharing one object.
+    """
+    return _compact(value, {})
+
+
+def _compact(value, memo):
+    if not isinstance(value, (list, dict)):
+        return value
+    if id(value) in memo:
+        return memo[id(value)]
+    memo[id(value)] = value # Provisional: a list that contains itself is never all scalars
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if isinstance(item, (list, dict)):
+                compacted = _compact(item, memo)
+                if compacted is not item:
+                    dict.__setitem__(value, key, compacted)
+        return value
+    if type(value) is list:
+        compacted = compact_list(value)
+        if compacted is not value:
+            memo[id(value)] = compacted
+            return compacted
+    for index, item in enumerate(value):
+        if isinstance(item, (list, dict)):
+            compacted = _compact(item, memo)
+            if compacted is not item:
+                list.__setitem__(value, index, compacted)
+    return value
+
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Structural diff of two decoded saves, and a command line tool to compare saves or folders.
+
+Dicts are matched by key and [name, value] lists (like 'parts') by name, both through
+hash lookups, so large saves compare in linear time. Lists of unique scalars (like
+'newdesigntags') are matched by value; other lists by position.
+
+Examples:
+    python sol_diff.py jacksmith1.backup1.sol jacksmith1.sol
+    python sol_diff.py before_session/ "%APPDATA%/com.flipline.jacksmith/Local Store/#SharedObjects"
+
+Exit status is 0 when nothing differs, 1 when something does and 2 on errors, like diff.
+"""
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+from sol_handler import read_sol
+from sol_edits import format_path
+
+ADDED = 'added'
+REMOVED = 'removed'
+CHANGED = 'changed'
+
+
+class Change:
+    """One difference. `path` locates the value in the new document (in the old one for removals)."""
+
+    __slots__ = ('kind', 'path', 'old', 'new')
+
+    def __init__(self, kind, path, old=None, new=None):
+        self.kind = kind
+        self.path = path
+        self.old = old
+        self.new = new
+
+    def __repr__(self):
+        return f"Change({self.kind!r}, {self.path!r})"
+
+    def describe(self, max_value_length=80):
+        path = format_path(self.path) or '(root)'
+        if self.kind == ADDED:
+            return f"+ {path}: {_short(self.new, max_value_length)}"
+        if self.kind == REMOVED:
+            return f"- {path}: {_short(self.old, max_value_length)}"
+        return f"~ {path}: {_short(self.old, max_value_length)} -> {_short(self.new, max_value_length)}"
+
+
+def diff(old, new, path=None):
+    """Returns the list of Changes that turn `old` into `new`."""
+    changes = []
+    _diff_value(old, new, [] if path is None else list(path), changes, set())
+    return changes
+
+
+def summarize(changes):
+    """{'added': n, 'removed': n, 'changed': n}"""
+    counts = {ADDED: 0, REMOVED: 0, CHANGED: 0}
+    for change in changes:
+        counts[change.kind] += 1
+    return counts
+
+
+def _diff_value(old, new, path, changes, seen):
+    # `seen` holds the (old, new) container pairs compared already: AMF references can share
+    # a container between several paths or make it contain itself.
+    if isinstance(old, dict) and isinstance(new, dict):
+        if _first_visit(old, new, seen):
+            _diff_dict(old, new, path, changes, seen)
+    elif isinstance(old, list) and isinstance(new, list):
+        if _first_visit(old, new, seen):
+            _diff_list(old, new, path, changes, seen)
+    elif not _same_scalar(old, new):
+        changes.append(Change(CHANGED, path, old, new))
+
+
+def _first_visit(old, new, seen):
+    pair = (id(old), id(new))
+    if pair in seen:
+        return False
+    seen.add(pair)
+    return True
+
+
+def _same_scalar(a, b):
+    if type(a) is not type(b): # 1 == True == 1.0, but the game tells them apart
+        return False
+    return a == b or (a != a and b != b) # NaN equals NaN here
+
+
+def _diff_dict(old, new, path, changes, seen):
+    for key, old_value in old.items():
+        if key not in new:
+            changes.append(Change(REMOVED, path + [key], old_value, None))
+    for key, new_value in new.items():
+        if key not in old:
+            changes.append(Change(ADDED, path + [key], None, new_value))
+        else:
+            _diff_value(old[key], new_value, path + [key], changes, seen)
+
+
+def _pair_index(items):
+    """{name: position} if `items` is a [name, value] list with unique names, else None."""
+    index = {}
+    for position, item in enumerate(items):
+        if not isinstance(item, list) or len(item) != 2:
+            return None
+        try:
+            index.setdefault(item[0], position)
+        except TypeError: # Unhashable name
+            return None
+        if len(index) <= position:
+            return None # Duplicate name
+    return index
+
+
+def _scalar_index(items):
+    """{value: position} if `items` holds unique hashable scalars, else None."""
+    index = {}
+    for position, item in enumerate(items):
+        if isinstance(item, (dict, list)) or isinstance(item, float) and item != item:
+            return None
+        try:
+            index.setdefault((type(item), item), position)
+        except TypeError:
+            return None
+        if len(index) <= position:
+            return None
+    return index
+
+
+def _diff_list(old, new, path, changes, seen):
+    if old and new:
+        old_index, new_index = _pair_index(old), _pair_index(new)
+        if old_index is not None and new_index is not None:
+            _diff_keyed_list(old, new, old_index, new_index, path, changes, seen, value_position=1)
+            return
+        old_index, new_index = _scalar_index(old), _scalar_index(new)
+        if old_index is not None and new_index is not None:
+            _diff_keyed_list(old, new, old_index, new_index, path, changes, seen, value_position=None)
+            return
+    for i in range(min(len(old), len(new))):
+        _diff_value(old[i], new[i], path + [i], changes, seen)
+    for i in range(len(new), len(old)):
+        changes.append(Change(REMOVED, path + [i], old[i], None))
+    for i in range(len(old), len(new)):
+        changes.append(Change(ADDED, path + [i], None, new[i]))
+
+
+def _diff_keyed_list(old, new, old_index, new_index, path, changes, seen, value_position):
+    """Matches list items by key; `value_position` 1 compares item[1] of [name, value] pairs."""
+    for key, position in old_index.items():
+        if key not in new_index:
+            changes.append(Change(REMOVED, path + [position], old[position], None))
+    for key, position in new_index.items():
+        old_position = old_index.get(key)
+        if old_position is None:
+            changes.append(Change(ADDED, path + [position], None, new[position]))
+        elif value_position is not None:
+            _diff_value(old[old_position][value_position], new[position][value_position],
+                        path + [position, value_position], changes, seen)
+
+
+def _short(value, limit):
+    try:
+        # iterencode(), unlike dumps(), never takes the C path that reads ScalarArrays as empty lists
+        text = ''.join(json.JSONEncoder(ensure_ascii=False, default=str).iterencode(value))
+    except (TypeError, ValueError):
+        text = repr(value)
+    return text if len(text) <= limit else text[:limit - 3] + '...'
+
+
+# --- Command line ---
+def pair_files(old_target, new_target, include_backups=False):
+    """[(name, old path or None, new path or None)] for two files or two folders (matched by file name)."""
+    old_target, new_target = Path(old_target), Path(new_target)
+    if old_target.is_file() and new_target.is_file():
+        return [(new_target.name, old_target, new_target)]
+    if not (old_target.is_dir() and new_target.is_dir()):
+        raise ValueError("Compare two .sol files or two folders.")
+
+    def listing(folder):
+        return {p.name: p for p in folder.glob("*.sol")
+                if p.is_file() and (include_backups or "backup" not in p.name.lower())}
+    old_files, new_files = listing(old_target), listing(new_target)
+    return [(name, old_files.get(name), new_files.get(name)) for name in sorted(old_files.keys() | new_files.keys())]
+
+
+def compare_files(name, old_path, new_path, max_value_length=80):
+    """Worker: diffs one pair of files. Never raises; returns a result dict with formatted changes."""
+    result = {'name': name, 'status': 'error', 'summary': None, 'changes': [], 'error': None}
+    if old_path is None or new_path is None:
+        result['status'] = 'only in new' if old_path is None else 'only in old'
+        return result
+    try:
+        changes = diff(read_sol(old_path), read_sol(new_path))
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+        return result
+    result['status'] = 'differs' if changes else 'same'
+    result['summary'] = summarize(changes)
+    result['changes'] = [{'kind': c.kind, 'path': c.path, 'text': c.describe(max_value_length)} for c in changes]
+    return result
+
+
+def print_report(results, limit):
+    for r in results:
+        if r['status'] == 'same':
+            continue
+        if r['summary']:
+            s = r['summary']
+            print(f"{r['name']}: {s[ADDED]} added, {s[REMOVED]} removed, {s[CHANGED]} changed")
+        else:
+            print(f"{r['name']}: {r['status']}")
+        if r['error']:
+            print(f"    [ERROR] {r['error']}")
+        for change in r['changes'][:limit]:
+            print(f"    {change['text']}")
+        if len(r['changes']) > limit:
+            print(f"    ... {len(r['changes']) - limit} more")
+    same = sum(1 for r in results if r['status'] == 'same')
+    print(f"\n{len(results)} file(s) compared, {same} identical, {len(results) - same} different or missing")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('old', help="Old .sol file or folder.")
+    parser.add_argument('new', help="New .sol file or folder.")
+    parser.add_argument('--include-backups', action='store_true', help="Also compare files with 'backup' in their name.")
+    parser.add_argument('--limit', type=int, default=50, help="Changes listed per file (default 50).")
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+    parser.add_argument('--jobs', type=int, default=None, help="Worker processes (default: CPU count).")
+    args = parser.parse_args(argv)
+
+    try:
+        pairs = pair_files(os.path.expandvars(args.old), os.path.expandvars(args.new), args.include_backups)
+    except ValueError as e:
+        parser.error(str(e))
+    if len(pairs) <= 1 or args.jobs == 1:
+        results = [compare_files(*pair) for pair in pairs]
+    else:
+        from concurrent.futures import ProcessPoolExecutor # Pulls in multiprocessing; only the CLI needs it
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            results = list(executor.map(compare_files, *zip(*pairs)))
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False, default=str))
+    else:
+        print_report(results, args.limit)
+    if any(r['status'] == 'error' for r in results):
+        return 2
+    return 0 if all(r['status'] == 'same' for r in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Edits on decoded Jacksmith saves, shared by the GUI and the batch CLI.
+"""
+import re
+
+from part_catalog import all_parts  # noqa: F401 (re-exported for the GUI and the batch CLI)
+from sol_compact import compact
+from sol_handler import AMFDictionary, AMFVector, MixedArray, TypedObject
+
+DESIGN_CODES = ['AX', 'BW', 'MA', 'PI', 'SH', 'SW']
+MISSING = object() # Old/new value of a key that did not exist before/after an edit
+
+_PATH_TOKEN = re.compile(r'([^.\[\]]+)|\[(-?\d+)\]')
+# Item ranges of the typed AMF3 vectors; Vector.<Number> takes any number
+_VECTOR_INT_RANGES = {'int': (-1 << 31, 1 << 31), 'uint': (0, 1 << 32)}
+
+
+def all_design_tags():
+    """Every design tag, AX-01 .. SW-14."""
+    design_nummers = [f'{i:02}' for i in range(1, 15)] # 01 to 14
+    return sorted(f'{code}-{nummer}' for code in DESIGN_CODES for nummer in design_nummers)
+
+
+def parse_path(text):
+    """Parses 'settings.music' or 'parts[3][1]' into ['settings', 'music'] / ['parts', 3, 1]."""
+    path = []
+    pos = 0
+    for m in _PATH_TOKEN.finditer(text):
+        # Names follow a '.' (except the first one); indices follow directly
+        separator = '.' if m.group(1) is not None and pos > 0 else ''
+        if text[pos:m.start()] != separator:
+            raise ValueError(f"Invalid path '{text}'.")
+        path.append(m.group(1) if m.group(1) is not None else int(m.group(2)))
+        pos = m.end()
+    if not path or pos != len(text):
+        raise ValueError(f"Invalid path '{text}'.")
+    return path
+
+
+def format_path(path):
+    """The inverse of parse_path: ['parts', 3, 1] -> 'parts[3][1]'."""
+    text = ''
+    for key in path:
+        text += f"[{key}]" if isinstance(key, int) else (f".{key}" if text else str(key))
+    return text
+
+
+def parse_value(text):
+    """JSON values (numbers, true/false, lists, quoted strings); anything else is a plain string."""
+    import json # Only edits from text need it; keeps it out of the editor's startup imports
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def like_container(original, value):
+    """`value`, a list or dict parsed from text, rebuilt as the container type of `original`.
+
+    AMF containers keep what makes them that AMF type (class name and traits, vector item
+    type, weak keys), so an edited value is written back as the same type. Lists of numbers
+    are stored as ScalarArrays where decoding would have (see sol_compact). Raises
+    ValueError when `value` cannot be held by such a container.
+    """
+    expected = list if isinstance(original, list) else dict
+    if not isinstance(value, expected):
+        raise ValueError(f"Expected a JSON {'array' if expected is list else 'object'}, "
+                         f"got {type(value).__name__}.")
+    value = compact(value)
+    if isinstance(original, TypedObject):
+        if not original.dynamic and any(key not in original.sealed for key in value):
+            raise ValueError(f"'{original.class_name}' is a sealed class; it cannot hold extra keys.")
+        result = TypedObject(value)
+        result.class_name, result.sealed, result.dynamic = original.class_name, original.sealed, original.dynamic
+        return result
+    if isinstance(original, AMFDictionary):
+        result = AMFDictionary(value)
+        result.weak_keys = original.weak_keys
+        return result
+    if isinstance(original, MixedArray):
+        return MixedArray(value)
+    if isinstance(original, AMFVector):
+        result = AMFVector(_vector_items(original.item_type, value))
+        result.item_type, result.fixed, result.class_name = original.item_type, original.fixed, original.class_name
+        return result
+    return value
+
+
+def _vector_items(item_type, items):
+    if item_type == 'double':
+        if not all(isinstance(item, (int, float)) and not isinstance(item, bool) for item in items):
+            raise ValueError("A Vector.<Number> can only hold numbers.")
+        return [float(item) for item in items]
+    limits = _VECTOR_INT_RANGES.get(item_type)
+    if limits is not None and not all(type(item) is int and limits[0] <= item < limits[1] for item in items):
+        raise ValueError(f"A Vector.<{item_type}> can only hold integers from {limits[0]} to {limits[1] - 1}.")
+    return items
+
+
+def get_path(data, path):
+    for key in path:
+        data = data[key]
+    return data
+
+
+def set_path(data, path, value):
+    """Assigns `value` at `path` (the last dict key may be new) and returns the previous value or None."""
+    container = get_path(data, path[:-1])
+    key = path[-1]
+    if isinstance(container, list):
+        if not isinstance(key, int):
+            raise TypeError(f"'{key}' is not a list index.")
+        old = container[key]
+    elif isinstance(container, dict):
+        old = container.get(key)
+    else:
+        raise TypeError(f"Cannot set '{key}' on a {type(container).__name__}.")
+    container[key] = value
+    if len(path) > 1 and hasattr(data, 'mark_dirty'):
+        data.mark_dirty(path[0]) # In-place edit below the top level
+    return old
+
+
+def delete_path(data, path):
+    """Removes the dict key or list item at `path` and returns its value."""
+    container = get_path(data, path[:-1])
+    old = container[path[-1]]
+    del container[path[-1]]
+    if len(path) > 1 and hasattr(data, 'mark_dirty'):
+        data.mark_dirty(path[0])
+    return old
@@ -1,74 +1,1629 @@
 '''
 Module voor het lezen, schrijven en vinden van .sol bestanden.
-Vereist: pyamf (pip install pyamf)
+Vereist: pyamf (pip install pyamf) alleen voor de 'pyamf' backend; de standaard
+'native' backend decodeert AMF0/AMF3 zelf.
 '''
+import mmap
 import os
+import shutil
+import struct
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from pyamf import sol
 
-def read_sol(path):
+from instrumentation import span
+from sol_compact import COMPACT_MIN_ITEMS, compact_list, intern_string
+
+AMF0 = 0
+AMF3 = 3
+
+# Backend used by read_sol when none is given; 'pyamf' keeps the original decoder available.
+DEFAULT_BACKEND = 'native'
+SOL_BACKENDS = ('native', 'pyamf')
+# Rotating copies kept by write_sol: name.backup1.sol (newest) .. name.backupN.sol
+SOL_BACKUP_COUNT = 3
+
+SOL_HEADER_VERSION = b'\x00\xbf'
+SOL_HEADER_SIGNATURE = b'TCSO\x00\x04\x00\x00\x00\x00'
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Placeholder for reference-table slots whose owning entry has not been decoded yet (lazy mode).
+_PENDING = object()
+
+_TABLE_NAMES = ('amf0_objects', 'amf3_strings', 'amf3_objects', 'amf3_traits')
+
+# Markers of values that never touch the object tables; the lazy index decodes these right away.
+_AMF0_SCALAR_MARKERS = frozenset((0x00, 0x01, 0x02, 0x05, 0x06, 0x0B, 0x0C, 0x0D))
+_AMF3_SCALAR_MARKERS = frozenset((0x00, 0x01, 0x02, 0x03, 0x04, 0x05, 0x06))
+
+_unpack_u16 = struct.Struct('>H').unpack_from
+_unpack_u32 = struct.Struct('>I').unpack_from
+_unpack_double = struct.Struct('>d').unpack_from
+_pack_u16 = struct.Struct('>H').pack
+_pack_u32 = struct.Struct('>I').pack
+_pack_double = struct.Struct('>d').pack
+
+
+class SolFormatError(ValueError):
+    """Raised when a .sol file is not a valid SharedObject stream."""
+
+
+class SolDocument(dict):
+    """The top-level name/value pairs of a .sol file plus its header fields.
+
+    Documents from the native decoder keep the encoded bytes of every top-level entry,
+    so write_sol only re-encodes keys that are dirty. Top-level assignments mark a key
+    dirty automatically; in-place edits below the top level must call mark_dirty(key).
+    """
+    sol_name = ''
+    amf_version = AMF0
+    _baseline = None          # encoded bytes the baseline entries point into
+    _baseline_entries = None  # top-level key -> _SolEntry
+    _saving = frozenset()     # keys taken by a write_sol that has not finished
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._dirty = set()
+
+    def mark_dirty(self, key):
+        """Records that the value under top-level `key` changed since the last save."""
+        self._dirty.add(key)
+
+    def mark_all_dirty(self):
+        self._dirty.update(dict.keys(self))
+        self._baseline = self._baseline_entries = None
+
+    @property
+    def dirty_keys(self):
+        return frozenset(self._dirty)
+
+    def clean_baseline(self):
+        """(encoded bytes, {key: _SolEntry}) of the file the values still match, or None.
+
+        None once a value was changed (or is being saved) since the document was decoded or
+        last saved, and for documents that never had a baseline (pyamf, JSON import).
+        """
+        if self._dirty or self._saving or self._baseline is None:
+            return None
+        return self._baseline, self._baseline_entries
+
+    def _set_baseline(self, data, entries):
+        self._baseline = data
+        self._baseline_entries = entries
+
+    def _take_dirty(self):
+        """Starts a save: returns the dirty keys and tracks edits made during the save separately."""
+        dirty, self._dirty = self._dirty, set()
+        self._saving = dirty
+        return dirty
+
+    def __setitem__(self, key, value):
+        self._dirty.add(key)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self._dirty.add(key)
+        dict.__delitem__(self, key)
+
+    def pop(self, key, *default):
+        self._dirty.add(key)
+        return dict.pop(self, key, *default)
+
+    def popitem(self):
+        key, value = dict.popitem(self)
+        self._dirty.add(key)
+        return key, value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self._dirty.add(key)
+        return dict.setdefault(self, key, default)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self):
+        self._dirty.update(dict.keys(self))
+        dict.clear(self)
+
+    def __reduce__(self):
+        # Copies and pickles are detached from the file: no baseline, everything re-encoded.
+        return (_restore_sol_document, (dict(self.items()), self.sol_name, self.amf_version))
+
+
+def _restore_sol_document(data, sol_name, amf_version):
+    document = SolDocument(data)
+    document.sol_name = sol_name
+    document.amf_version = amf_version
+    return document
+
+
+# The AMF container types use __slots__: a save can hold many thousands of them and a
+# per-instance __dict__ would cost more than the attributes it stores.
+class TypedObject(dict):
+    """An AMF object with a registered class name (and, for AMF3, its traits)."""
+    __slots__ = ('class_name', 'sealed', 'dynamic')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.class_name = ''
+        self.sealed = ()
+        self.dynamic = True
+
+
+class MixedArray(dict):
+    """An AMF0 ECMA array or an AMF3 array with associative members."""
+    __slots__ = ()
+
+
+class XMLDocument(str):
+    """XML payload stored by Flash; kept as text."""
+    __slots__ = ()
+
+
+class AMFVector(list):
+    """An AMF3 Vector.<int|uint|Number|Object>."""
+    __slots__ = ('item_type', 'fixed', 'class_name')
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.item_type = 'object'
+        self.fixed = False
+        self.class_name = ''
+
+
+class AMFDictionary(dict):
+    """An AMF3 flash.utils.Dictionary."""
+    __slots__ = ('weak_keys',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.weak_keys = False
+
+
+def _is_array_index(key):
+    """True for ECMA array keys that str(int) writes back unchanged ('7', not '07' or '²')."""
+    return key.isascii() and key.isdecimal() and str(int(key)) == key
+
+
+def _check_for_int(value):
+    # AMF0 has a single number type; mirror pyamf and hand back ints for whole numbers.
+    if value == value and value.is_integer():
+        return int(value)
+    return value
+
+
+class _AmfReader:
+    """Decodes AMF0/AMF3 values straight from a memoryview over the file bytes."""
+
+    def __init__(self, buf, pos=0):
+        self.buf = buf
+        self.pos = pos
+        # Reference tables live for the whole file, like in Flash's own SOL reader.
+        self.amf0_objects = []
+        self.amf3_strings = []
+        self.amf3_objects = []
+        self.amf3_traits = []
+        # Called as resolve_pending(reader, table_name, index) for _PENDING slots (lazy mode only).
+        self.resolve_pending = None
+        # Intern AMF0 property names and store lists of numbers as ScalarArrays (see sol_compact).
+        # AMF3 needs no interning: repeated strings already share one table entry.
+        self.compact = True
+        self.begin_entry()
+
+    def table_counts(self):
+        return (len(self.amf0_objects), len(self.amf3_strings), len(self.amf3_objects), len(self.amf3_traits))
+
+    def begin_entry(self):
+        """Starts recording which table slots the next top-level entry references."""
+        self.entry_counts = self.table_counts()
+        self.ref_max = [-1, -1, -1, -1]
+        self.ref_internal = [False, False, False, False]
+
+    def _note_ref(self, position, index):
+        # The incremental writer needs to know whether an entry points at slots created by
+        # earlier entries (and which) or only at its own slots.
+        if index < self.entry_counts[position]:
+            if index > self.ref_max[position]:
+                self.ref_max[position] = index
+        else:
+            self.ref_internal[position] = True
+
+    # --- Primitive readers ---
+    def _read_u8(self):
+        value = self.buf[self.pos]
+        self.pos += 1
+        return value
+
+    def _read_u16(self):
+        value = _unpack_u16(self.buf, self.pos)[0]
+        self.pos += 2
+        return value
+
+    def _read_u32(self):
+        value = _unpack_u32(self.buf, self.pos)[0]
+        self.pos += 4
+        return value
+
+    def _read_double(self):
+        value = _unpack_double(self.buf, self.pos)[0]
+        self.pos += 8
+        return value
+
+    def _read_utf8(self, length):
+        start = self.pos
+        end = start + length
+        if end > len(self.buf):
+            raise SolFormatError("String runs past the end of the file.")
+        self.pos = end
+        return str(self.buf[start:end], 'utf-8')
+
+    def _read_u29(self):
+        buf = self.buf
+        pos = self.pos
+        result = 0
+        for _ in range(3):
+            byte = buf[pos]
+            pos += 1
+            if byte < 0x80:
+                self.pos = pos
+                return (result << 7) | byte
+            result = (result << 7) | (byte & 0x7F)
+        self.pos = pos + 1
+        return (result << 8) | buf[pos]
+
+    # --- AMF0 ---
+    def read_amf0_string(self):
+        return self._read_utf8(self._read_u16())
+
+    def read_amf0(self):
+        marker = self.buf[self.pos]
+        self.pos += 1
+        if marker == 0x00:  # number
+            return _check_for_int(self._read_double())
+        if marker == 0x02:  # string
+            return self._read_utf8(self._read_u16())
+        if marker == 0x01:  # boolean
+            return self._read_u8() != 0
+        if marker == 0x0A:  # strict array
+            count = self._read_u32()
+            result = []
+            index = len(self.amf0_objects)
+            self.amf0_objects.append(result)
+            append = result.append
+            for _ in range(count):
+                append(self.read_amf0())
+            if count >= COMPACT_MIN_ITEMS and self.compact:
+                return self._compacted('amf0_objects', index, result)
+            return result
+        if marker == 0x03:  # anonymous object
+            result = {}
+            self.amf0_objects.append(result)
+            self._read_amf0_properties(result)
+            return result
+        if marker in (0x05, 0x06, 0x0D):  # null, undefined, unsupported
+            return None
+        if marker == 0x07:  # reference
+            return self._table_ref('amf0_objects', self._read_u16())
+        if marker == 0x08:  # ECMA array
+            self._read_u32()  # advisory length, the end marker is authoritative
+            result = MixedArray()
+            self.amf0_objects.append(result)
+            self._read_amf0_properties(result, index_keys=True)
+            return result
+        if marker == 0x0B:  # date, the timezone field is ignored
+            millis = self._read_double()
+            self.pos += 2
+            return _EPOCH + timedelta(milliseconds=millis)
+        if marker == 0x0C:  # long string
+            return self._read_utf8(self._read_u32())
+        if marker == 0x0F:  # XML document
+            return XMLDocument(self._read_utf8(self._read_u32()))
+        if marker == 0x10:  # typed object
+            result = TypedObject()
+            result.class_name = self.read_amf0_string()
+            self.amf0_objects.append(result)
+            self._read_amf0_properties(result)
+            return result
+        if marker == 0x11:  # switch to AMF3 for one value
+            return self.read_amf3()
+        raise SolFormatError(f"Unknown AMF0 marker 0x{marker:02x} at offset {self.pos - 1}.")
+
+    def _read_amf0_properties(self, target, index_keys=False):
+        """Reads name/value pairs up to the end marker; with index_keys, array indices become ints."""
+        buf = self.buf
+        while True:
+            length = self._read_u16()
+            if length == 0 and buf[self.pos] == 0x09:
+                self.pos += 1
+                return
+            key = self._read_utf8(length)
+            if index_keys and _is_array_index(key):
+                key = int(key)
+            elif self.compact:
+                key = intern_string(key)
+            target[key] = self.read_amf0()
+
+    # --- AMF3 ---
+    def read_amf3_string(self):
+        ref = self._read_u29()
+        if not ref & 1:
+            index = ref >> 1
+            self._note_ref(1, index)
+            try:
+                value = self.amf3_strings[index]
+            except IndexError:
+                raise SolFormatError(f"Invalid AMF3 string reference {index}.") from None
+            if value.__class__ is tuple:  # (start, end) span recorded by the skip scanner
+                value = self.amf3_strings[index] = str(self.buf[value[0]:value[1]], 'utf-8')
+            return value
+        length = ref >> 1
+        if length == 0:
+            return ''
+        value = self._read_utf8(length)
+        self.amf3_strings.append(value)
+        return value
+
+    def _table_ref(self, table_name, index):
+        self._note_ref(_TABLE_NAMES.index(table_name), index)
+        table = getattr(self, table_name)
+        try:
+            value = table[index]
+        except IndexError:
+            raise SolFormatError(f"Invalid {table_name} reference {index}.") from None
+        if value is _PENDING:
+            value = table[index] = self.resolve_pending(self, table_name, index)
+        return value
+
+    def _compacted(self, table_name, index, result):
+        # A list of plain numbers cannot contain a reference to itself, so nothing can hold
+        # the list object yet and its table slot may be swapped for the compact copy.
+        compacted = compact_list(result)
+        if compacted is not result:
+            getattr(self, table_name)[index] = compacted
+        return compacted
+
+    def _amf3_object_ref(self, index):
+        return self._table_ref('amf3_objects', index)
+
+    def read_amf3(self):
+        marker = self.buf[self.pos]
+        self.pos += 1
+        if marker == 0x06:  # string
+            return self.read_amf3_string()
+        if marker == 0x04:  # integer
+            value = self._read_u29()
+            return value - 0x20000000 if value & 0x10000000 else value
+        if marker == 0x09:
+            return self._read_amf3_array()
+        if marker == 0x0A:
+            return self._read_amf3_object()
+        if marker == 0x05:  # double
+            return self._read_double()
+        if marker in (0x00, 0x01):  # undefined, null
+            return None
+        if marker == 0x02:
+            return False
+        if marker == 0x03:
+            return True
+        if marker == 0x08:  # date
+            ref = self._read_u29()
+            if not ref & 1:
+                return self._amf3_object_ref(ref >> 1)
+            result = _EPOCH + timedelta(milliseconds=self._read_double())
+            self.amf3_objects.append(result)
+            return result
+        if marker in (0x07, 0x0B):  # XML document / XML
+            ref = self._read_u29()
+            if not ref & 1:
+                return self._amf3_object_ref(ref >> 1)
+            result = XMLDocument(self._read_utf8(ref >> 1))
+            self.amf3_objects.append(result)
+            return result
+        if marker == 0x0C:  # ByteArray
+            ref = self._read_u29()
+            if not ref & 1:
+                return self._amf3_object_ref(ref >> 1)
+            start = self.pos
+            self.pos = start + (ref >> 1)
+            if self.pos > len(self.buf):
+                raise SolFormatError("ByteArray runs past the end of the file.")
+            result = bytes(self.buf[start:self.pos])
+            self.amf3_objects.append(result)
+            return result
+        if 0x0D <= marker <= 0x10:
+            return self._read_amf3_vector(marker)
+        if marker == 0x11:
+            return self._read_amf3_dictionary()
+        raise SolFormatError(f"Unknown AMF3 marker 0x{marker:02x} at offset {self.pos - 1}.")
+
+    def _read_amf3_array(self):
+        ref = self._read_u29()
+        if not ref & 1:
+            return self._amf3_object_ref(ref >> 1)
+        dense_count = ref >> 1
+        key = self.read_amf3_string()
+        if key == '':
+            result = []
+            index = len(self.amf3_objects)
+            self.amf3_objects.append(result)
+            append = result.append
+            for _ in range(dense_count):
+                append(self.read_amf3())
+            if dense_count >= COMPACT_MIN_ITEMS and self.compact:
+                return self._compacted('amf3_objects', index, result)
+            return result
+        result = MixedArray()
+        self.amf3_objects.append(result)
+        while key:
+            result[key] = self.read_amf3()
+            key = self.read_amf3_string()
+        for i in range(dense_count):
+            result[i] = self.read_amf3()
+        return result
+
+    def _read_amf3_object(self):
+        ref = self._read_u29()
+        if not ref & 1:
+            return self._amf3_object_ref(ref >> 1)
+        if not ref & 2:
+            class_name, sealed, dynamic, externalizable = self._table_ref('amf3_traits', ref >> 2)
+        else:
+            externalizable = bool(ref & 4)
+            dynamic = bool(ref & 8)
+            class_name = self.read_amf3_string()
+            sealed = tuple(self.read_amf3_string() for _ in range(ref >> 4))
+            self.amf3_traits.append((class_name, sealed, dynamic, externalizable))
+        if externalizable:
+            raise SolFormatError(f"Externalizable class '{class_name}' cannot be decoded natively; try the pyamf backend.")
+
+        if class_name or sealed:
+            result = TypedObject()
+            result.class_name = class_name
+            result.sealed = sealed
+            result.dynamic = dynamic
+        else:
+            result = {}
+        self.amf3_objects.append(result)
+        for name in sealed:
+            result[name] = self.read_amf3()
+        if dynamic:
+            key = self.read_amf3_string()
+            while key:
+                result[key] = self.read_amf3()
+                key = self.read_amf3_string()
+        return result
+
+    def _read_amf3_vector(self, marker):
+        ref = self._read_u29()
+        if not ref & 1:
+            return self._amf3_object_ref(ref >> 1)
+        count = ref >> 1
+        result = AMFVector()
+        result.fixed = self._read_u8() != 0
+        self.amf3_objects.append(result)
+        if marker == 0x10:
+            result.class_name = self.read_amf3_string()
+            for _ in range(count):
+                result.append(self.read_amf3())
+            return result
+
+        result.item_type, fmt = {0x0D: ('int', '>%di'), 0x0E: ('uint', '>%dI'), 0x0F: ('double', '>%dd')}[marker]
+        fmt = fmt % count
+        result.extend(struct.unpack_from(fmt, self.buf, self.pos))
+        self.pos += struct.calcsize(fmt)
+        return result
+
+    def _read_amf3_dictionary(self):
+        ref = self._read_u29()
+        if not ref & 1:
+            return self._amf3_object_ref(ref >> 1)
+        result = AMFDictionary()
+        result.weak_keys = self._read_u8() != 0
+        self.amf3_objects.append(result)
+        for _ in range(ref >> 1):
+            key = self.read_amf3()
+            if isinstance(key, (dict, list)):
+                key = str(key)  # Python dict keys must be hashable
+            result[key] = self.read_amf3()
+        return result
+
+    # --- Skip scanner (lazy mode) ---
+    # Walks a value without building it, but registers every reference-table slot the
+    # decoder would, so that later entries can still be decoded on their own.
+    def skip_amf0(self):
+        # Iterative with locals only: this loop is the whole cost of opening a file lazily.
+        # Each stack frame is the number of array values left, or None for an object body.
+        buf = self.buf
+        pos = self.pos
+        objects = self.amf0_objects
+        stack = [1]
+        while stack:
+            top = stack[-1]
+            if top is None:
+                length = _unpack_u16(buf, pos)[0]
+                if length == 0 and buf[pos + 2] == 0x09:
+                    pos += 3
+                    stack.pop()
+                    continue
+                pos += 2 + length
+            elif top == 0:
+                stack.pop()
+                continue
+            else:
+                stack[-1] = top - 1
+            marker = buf[pos]
+            pos += 1
+            if marker == 0x00:
+                pos += 8
+            elif marker == 0x02:
+                pos += 2 + _unpack_u16(buf, pos)[0]
+            elif marker == 0x0A:
+                stack.append(_unpack_u32(buf, pos)[0])
+                pos += 4
+                objects.append(_PENDING)
+            elif marker == 0x01:
+                pos += 1
+            elif marker in (0x03, 0x08, 0x10):
+                if marker == 0x08:
+                    pos += 4
+                elif marker == 0x10:
+                    pos += 2 + _unpack_u16(buf, pos)[0]
+                objects.append(_PENDING)
+                stack.append(None)
+            elif marker in (0x05, 0x06, 0x0D):
+                pass
+            elif marker == 0x07:
+                self._note_ref(0, _unpack_u16(buf, pos)[0])
+                pos += 2
+            elif marker == 0x0B:
+                pos += 10
+            elif marker in (0x0C, 0x0F):
+                pos += 4 + _unpack_u32(buf, pos)[0]
+            elif marker == 0x11:
+                self.pos = pos
+                self.skip_amf3()
+                pos = self.pos
+            else:
+                raise SolFormatError(f"Unknown AMF0 marker 0x{marker:02x} at offset {pos - 1}.")
+        self.pos = pos
+
+    def _skip_amf3_string(self):
+        """Skips a string and returns False only for the empty string."""
+        ref = self._read_u29()
+        if not ref & 1:
+            self._note_ref(1, ref >> 1)
+            return True
+        length = ref >> 1
+        if length == 0:
+            return False
+        start = self.pos
+        self.pos = start + length
+        self.amf3_strings.append((start, self.pos))
+        return True
+
+    def skip_amf3(self):
+        marker = self.buf[self.pos]
+        self.pos += 1
+        if marker == 0x06:
+            self._skip_amf3_string()
+        elif marker == 0x04:
+            self._read_u29()
+        elif marker == 0x05:
+            self.pos += 8
+        elif marker <= 0x03:
+            pass
+        elif marker <= 0x11:
+            # Every remaining type starts with a U29 that is either an object reference or inline
+            ref = self._read_u29()
+            if not ref & 1:
+                self._note_ref(2, ref >> 1)
+            elif marker == 0x09:
+                self.amf3_objects.append(_PENDING)
+                while self._skip_amf3_string():
+                    self.skip_amf3()
+                for _ in range(ref >> 1):
+                    self.skip_amf3()
+            elif marker == 0x0A:
+                self._skip_amf3_object(ref)
+            elif marker in (0x07, 0x08, 0x0B, 0x0C):
+                self.pos += 8 if marker == 0x08 else ref >> 1
+                self.amf3_objects.append(_PENDING)
+            elif marker <= 0x0F:
+                self.pos += 1 + (ref >> 1) * (8 if marker == 0x0F else 4)
+                self.amf3_objects.append(_PENDING)
+            else:
+                self.pos += 1
+                self.amf3_objects.append(_PENDING)
+                if marker == 0x10:
+                    self._skip_amf3_string()
+                    for _ in range(ref >> 1):
+                        self.skip_amf3()
+                else:
+                    for _ in range(ref >> 1):
+                        self.skip_amf3()
+                        self.skip_amf3()
+        else:
+            raise SolFormatError(f"Unknown AMF3 marker 0x{marker:02x} at offset {self.pos - 1}.")
+
+    def _skip_amf3_object(self, ref):
+        if not ref & 2:
+            class_name, sealed, dynamic, externalizable = self._table_ref('amf3_traits', ref >> 2)
+        else:
+            externalizable = bool(ref & 4)
+            dynamic = bool(ref & 8)
+            class_name = self.read_amf3_string()
+            sealed = tuple(self.read_amf3_string() for _ in range(ref >> 4))
+            self.amf3_traits.append((class_name, sealed, dynamic, externalizable))
+        if externalizable:
+            raise SolFormatError(f"Externalizable class '{class_name}' cannot be decoded natively; try the pyamf backend.")
+        self.amf3_objects.append(_PENDING)
+        for _ in sealed:
+            self.skip_amf3()
+        if dynamic:
+            while self._skip_amf3_string():
+                self.skip_amf3()
+
+
+def _encode_u29(value):
+    if value < 0x80:
+        return bytes((value,))
+    if value < 0x4000:
+        return bytes(((value >> 7) | 0x80, value & 0x7F))
+    if value < 0x200000:
+        return bytes(((value >> 14) | 0x80, ((value >> 7) & 0x7F) | 0x80, value & 0x7F))
+    if value < 0x20000000:
+        return bytes(((value >> 22) | 0x80, ((value >> 15) & 0x7F) | 0x80, ((value >> 8) & 0x7F) | 0x80, value & 0xFF))
+    raise ValueError(f"{value} does not fit in an AMF3 U29.")
+
+
+def _date_to_millis(value):
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH) / timedelta(milliseconds=1)
+
+
+class _AmfWriter:
+    """Encodes Python values as AMF0/AMF3 into a bytearray, mirroring pyamf's choices."""
+
+    def __init__(self):
+        # Slots created by copied (not re-encoded) entries are counted but never referenced,
+        # so the writer does not need to know their contents.
+        self.counts = [0, 0, 0, 0]
+        self.amf0_objects = {}
+        self.amf3_strings = {}
+        self.amf3_objects = {}
+        self.amf3_traits = {}
+        self._keepalive = []  # object ids are only unique while the objects are alive
+        self.begin_entry()
+
+    def table_counts(self):
+        return tuple(self.counts)
+
+    def begin_entry(self):
+        """Starts a fresh output buffer and reference statistics for the next entry."""
+        self.out = bytearray()
+        self.entry_counts = tuple(self.counts)
+        self.ref_max = [-1, -1, -1, -1]
+        self.ref_internal = [False, False, False, False]
+
+    def _note_ref(self, position, index):
+        if index < self.entry_counts[position]:
+            if index > self.ref_max[position]:
+                self.ref_max[position] = index
+        else:
+            self.ref_internal[position] = True
+
+    def _object_ref(self, position, table, value):
+        """Writes a reference and returns True, or registers `value` and returns False."""
+        index = table.get(id(value))
+        if index is not None and (position != 0 or index <= 0xFFFF):
+            if position == 0:
+                self.out += b'\x07' + _pack_u16(index)
+            else:
+                self.out += _encode_u29(index << 1)
+            self._note_ref(position, index)
+            return True
+        table[id(value)] = self.counts[position]
+        self.counts[position] += 1
+        self._keepalive.append(value)
+        return False
+
+    def register_copied(self, value, amf_version, counts, end_counts):
+        """Registers the objects of a copied entry at the slots its bytes give them.
+
+        Re-encoded entries can then reference those objects instead of writing copies that
+        would no longer be shared after decoding. The walk allocates object slots in the
+        order write_amf0/write_amf3 would; when it does not end at the entry's recorded
+        table sizes, nothing is registered. Returns whether the objects were registered.
+        """
+        slots = ({}, {})
+        positions = [counts[0], counts[2]]
+        self._walk_slots(value, amf_version == AMF3, slots, positions)
+        if positions != [end_counts[0], end_counts[2]]:
+            return False
+        self.amf0_objects.update(slots[0])
+        self.amf3_objects.update(slots[1])
+        self._keepalive.append(value)
+        return True
+
+    def _walk_slots(self, value, amf3, slots, positions):
+        if not amf3:
+            if isinstance(value, (bytes, bytearray, AMFVector, AMFDictionary)):
+                amf3 = True  # written after an AMF3 switch marker
+            elif not isinstance(value, (list, tuple, dict)):
+                return
+        elif (value is None or isinstance(value, (bool, int, float))
+              or (isinstance(value, str) and not isinstance(value, XMLDocument))):
+            return
+        which = 1 if amf3 else 0
+        table = self.amf3_objects if amf3 else self.amf0_objects
+        index = slots[which].get(id(value), table.get(id(value)))
+        if index is not None and (amf3 or index <= 0xFFFF):
+            return  # a reference, no new slot
+        slots[which][id(value)] = positions[which]
+        positions[which] += 1
+        if isinstance(value, AMFVector):
+            children = value if value.item_type not in ('int', 'uint', 'double') else ()
+        elif isinstance(value, (list, tuple)):
+            children = value
+        elif isinstance(value, MixedArray) and amf3:
+            dense = 0
+            while dense in value:
+                dense += 1
+            children = [item for key, item in value.items() if not (isinstance(key, int) and 0 <= key < dense)]
+            children += [value[i] for i in range(dense)]
+        elif isinstance(value, AMFDictionary):
+            children = [part for pair in value.items() for part in pair]
+        elif isinstance(value, dict) and amf3:
+            sealed = getattr(value, 'sealed', ())
+            children = [value.get(name) for name in sealed]
+            if getattr(value, 'dynamic', True):
+                children += [item for key, item in value.items() if key not in sealed]
+        elif isinstance(value, dict):
+            children = value.values()
+        else:
+            return  # dates, byte arrays and XML hold no other values
+        for child in children:
+            self._walk_slots(child, amf3, slots, positions)
+
+    def write_entry(self, key, value, amf_version):
+        """Writes one top-level name/value pair including the trailing padding byte."""
+        if amf_version == AMF3:
+            self.write_amf3_string(key)
+            self.write_amf3(value)
+        else:
+            self.write_amf0_string(key)
+            self.write_amf0(value)
+        self.out.append(0)
+
+    # --- AMF0 ---
+    def write_amf0_string(self, value):
+        raw = value.encode('utf-8')
+        if len(raw) > 0xFFFF:
+            raise ValueError(f"Name '{value[:40]}...' is too long for AMF0.")
+        self.out += _pack_u16(len(raw)) + raw
+
+    def write_amf0(self, value):
+        out = self.out
+        if value is None:
+            out.append(0x05)
+        elif value is True or value is False:
+            out += b'\x01\x01' if value else b'\x01\x00'
+        elif isinstance(value, (int, float)):
+            out.append(0x00)
+            out += _pack_double(value)
+        elif isinstance(value, str):
+            raw = value.encode('utf-8')
+            if isinstance(value, XMLDocument):
+                out += b'\x0f' + _pack_u32(len(raw)) + raw
+            elif len(raw) > 0xFFFF:
+                out += b'\x0c' + _pack_u32(len(raw)) + raw
+            else:
+                out += b'\x02' + _pack_u16(len(raw)) + raw
+        elif isinstance(value, (list, tuple)) and not isinstance(value, AMFVector):
+            if self._object_ref(0, self.amf0_objects, value):
+                return
+            out += b'\x0a' + _pack_u32(len(value))
+            for item in value:
+                self.write_amf0(item)
+        elif isinstance(value, dict) and not isinstance(value, AMFDictionary):
+            if self._object_ref(0, self.amf0_objects, value):
+                return
+            if isinstance(value, TypedObject):
+                out.append(0x10)
+                self.write_amf0_string(value.class_name)
+            elif isinstance(value, MixedArray):
+                int_keys = [k for k in value if isinstance(k, int)]
+                out += b'\x08' + _pack_u32(max(max(int_keys, default=0), 0))
+            else:
+                out.append(0x03)
+            for key, item in value.items():
+                self.write_amf0_string(str(key))
+                self.write_amf0(item)
+            out += b'\x00\x00\x09'
+        elif isinstance(value, datetime):
+            out += b'\x0b' + _pack_double(_date_to_millis(value)) + b'\x00\x00'
+        elif isinstance(value, (bytes, bytearray, AMFVector, AMFDictionary)):
+            out.append(0x11)  # only AMF3 can express these
+            self.write_amf3(value)
+        else:
+            raise TypeError(f"Cannot encode {type(value).__name__} as AMF0.")
+
+    # --- AMF3 ---
+    def write_amf3_string(self, value):
+        if not value:
+            self.out.append(0x01)
+            return
+        index = self.amf3_strings.get(value)
+        if index is not None:
+            self.out += _encode_u29(index << 1)
+            self._note_ref(1, index)
+            return
+        self.amf3_strings[value] = self.counts[1]
+        self.counts[1] += 1
+        raw = value.encode('utf-8')
+        self.out += _encode_u29((len(raw) << 1) | 1) + raw
+
+    def write_amf3(self, value):
+        out = self.out
+        if value is None:
+            out.append(0x01)
+        elif value is True or value is False:
+            out.append(0x03 if value else 0x02)
+        elif isinstance(value, int):
+            if -0x10000000 <= value <= 0x0FFFFFFF:
+                out.append(0x04)
+                out += _encode_u29(value & 0x1FFFFFFF)
+            else:
+                out.append(0x05)
+                out += _pack_double(value)
+        elif isinstance(value, float):
+            out.append(0x05)
+            out += _pack_double(value)
+        elif isinstance(value, str):
+            if isinstance(value, XMLDocument):
+                out.append(0x0B)
+                if not self._object_ref(2, self.amf3_objects, value):
+                    raw = value.encode('utf-8')
+                    out += _encode_u29((len(raw) << 1) | 1) + raw
+            else:
+                out.append(0x06)
+                self.write_amf3_string(value)
+        elif isinstance(value, AMFVector):
+            self._write_amf3_vector(value)
+        elif isinstance(value, (list, tuple)):
+            out.append(0x09)
+            if self._object_ref(2, self.amf3_objects, value):
+                return
+            out += _encode_u29((len(value) << 1) | 1)
+            out.append(0x01)
+            for item in value:
+                self.write_amf3(item)
+        elif isinstance(value, MixedArray):
+            self._write_amf3_mixed_array(value)
+        elif isinstance(value, AMFDictionary):
+            out.append(0x11)
+            if self._object_ref(2, self.amf3_objects, value):
+                return
+            out += _encode_u29((len(value) << 1) | 1)
+            out.append(1 if value.weak_keys else 0)
+            for key, item in value.items():
+                self.write_amf3(key)
+                self.write_amf3(item)
+        elif isinstance(value, dict):
+            self._write_amf3_object(value)
+        elif isinstance(value, datetime):
+            out.append(0x08)
+            if not self._object_ref(2, self.amf3_objects, value):
+                out.append(0x01)
+                out += _pack_double(_date_to_millis(value))
+        elif isinstance(value, (bytes, bytearray)):
+            out.append(0x0C)
+            if not self._object_ref(2, self.amf3_objects, value):
+                out += _encode_u29((len(value) << 1) | 1) + value
+        else:
+            raise TypeError(f"Cannot encode {type(value).__name__} as AMF3.")
+
+    def _write_amf3_mixed_array(self, value):
+        self.out.append(0x09)
+        if self._object_ref(2, self.amf3_objects, value):
+            return
+        dense = 0
+        while dense in value:
+            dense += 1
+        self.out += _encode_u29((dense << 1) | 1)
+        for key, item in value.items():
+            if isinstance(key, int) and 0 <= key < dense:
+                continue
+            self.write_amf3_string(str(key))
+            self.write_amf3(item)
+        self.out.append(0x01)
+        for i in range(dense):
+            self.write_amf3(value[i])
+
+    def _write_amf3_object(self, value):
+        self.out.append(0x0A)
+        if self._object_ref(2, self.amf3_objects, value):
+            return
+        class_name = getattr(value, 'class_name', '')
+        sealed = getattr(value, 'sealed', ())
+        dynamic = getattr(value, 'dynamic', True)
+        if not dynamic and any(key not in sealed for key in value):
+            raise ValueError(f"'{class_name}' is a sealed class; it cannot hold extra keys.")
+        traits = (class_name, sealed, dynamic)
+        index = self.amf3_traits.get(traits)
+        if index is not None:
+            self.out += _encode_u29((index << 2) | 1)
+            self._note_ref(3, index)
+        else:
+            self.amf3_traits[traits] = self.counts[3]
+            self.counts[3] += 1
+            self.out += _encode_u29((len(sealed) << 4) | (0x08 if dynamic else 0) | 0x03)
+            self.write_amf3_string(class_name)
+            for name in sealed:
+                self.write_amf3_string(name)
+        for name in sealed:
+            self.write_amf3(value.get(name))
+        if dynamic:
+            for key, item in value.items():
+                if key in sealed:
+                    continue
+                key = str(key)
+                if not key:
+                    raise ValueError("AMF3 objects cannot have an empty key.")
+                self.write_amf3_string(key)
+                self.write_amf3(item)
+            self.out.append(0x01)
+
+    def _write_amf3_vector(self, value):
+        marker, fmt = {'int': (0x0D, '>%di'), 'uint': (0x0E, '>%dI'), 'double': (0x0F, '>%dd')}.get(value.item_type, (0x10, None))
+        self.out.append(marker)
+        if self._object_ref(2, self.amf3_objects, value):
+            return
+        self.out += _encode_u29((len(value) << 1) | 1)
+        self.out.append(1 if value.fixed else 0)
+        if fmt:
+            self.out += struct.pack(fmt % len(value), *value)
+        else:
+            self.write_amf3_string(value.class_name)
+            for item in value:
+                self.write_amf3(item)
+
+
+def _read_sol_header(buf):
+    """Validates the SOL header and returns (name, amf_version, body_offset)."""
+    if len(buf) < 18 or buf[0:2] != SOL_HEADER_VERSION:
+        raise SolFormatError("Unknown SOL version in header.")
+    if _unpack_u32(buf, 2)[0] != len(buf) - 6:
+        raise SolFormatError("Inconsistent stream header length.")
+    if buf[6:16] != SOL_HEADER_SIGNATURE:
+        raise SolFormatError("Invalid SOL signature.")
+    name_length = _unpack_u16(buf, 16)[0]
+    body = 18 + name_length + 4
+    if body > len(buf):
+        raise SolFormatError("Truncated SOL header.")
+    name = str(buf[18:18 + name_length], 'utf-8')
+    if buf[body - 4:body - 1] != b'\x00\x00\x00':
+        raise SolFormatError("Invalid SOL header padding.")
+    amf_version = buf[body - 1]
+    if amf_version not in (AMF0, AMF3):
+        raise SolFormatError(f"Unsupported AMF version {amf_version}.")
+    return name, amf_version, body
+
+
+class _SolEntry:
+    """Byte span of one top-level name/value pair and the reference tables around it.
+
+    counts/end_counts are the table sizes before and after the entry; ref_max is the
+    highest slot it references below counts (per table) and ref_internal tells whether
+    it references slots it created itself.
+    """
+    __slots__ = ('key', 'start', 'end', 'counts', 'end_counts', 'ref_max', 'ref_internal')
+
+    def __init__(self, key, start, end, counts, end_counts, ref_max, ref_internal):
+        self.key = key
+        self.start = start
+        self.end = end
+        self.counts = counts
+        self.end_counts = end_counts
+        self.ref_max = ref_max
+        self.ref_internal = ref_internal
+
+
+def _iter_sol_entries(reader, amf_version, lazy=False, end=None):
+    """Yields (entry, value) per top-level pair; with lazy=True containers yield _PENDING."""
+    buf = reader.buf
+    if amf_version == AMF3:
+        read_name, read_value, skip_value = reader.read_amf3_string, reader.read_amf3, reader.skip_amf3
+        scalar_markers = _AMF3_SCALAR_MARKERS
+    else:
+        read_name, read_value, skip_value = reader.read_amf0_string, reader.read_amf0, reader.skip_amf0
+        scalar_markers = _AMF0_SCALAR_MARKERS
+    if end is None:
+        end = len(buf)
+    try:
+        while reader.pos < end:
+            start = reader.pos
+            reader.begin_entry()
+            key = read_name()
+            if lazy and buf[reader.pos] not in scalar_markers:
+                skip_value()
+                value = _PENDING
+            else:
+                value = read_value()
+            if buf[reader.pos] != 0:
+                raise SolFormatError(f"Missing padding byte after '{key}'.")
+            reader.pos += 1
+            entry = _SolEntry(key, start, reader.pos, reader.entry_counts, reader.table_counts(),
+                              tuple(reader.ref_max), tuple(reader.ref_internal))
+            yield entry, value
+    except (IndexError, struct.error) as e:
+        raise SolFormatError("The .sol file is truncated.") from e
+
+
+def decode_sol(data, progress=None, compact=True):
+    """Decodes raw .sol bytes into a SolDocument in a single pass.
+
+    `progress(done_bytes, total_bytes)` is called after every top-level entry; an exception
+    raised by it (e.g. to cancel a superseded load) aborts the decode. `compact=False` builds
+    plain lists and uninterned keys (see sol_compact), e.g. to measure the difference.
+    """
+    buf = memoryview(data)
+    name, amf_version, body = _read_sol_header(buf)
+    document = SolDocument()
+    document.sol_name = name
+    document.amf_version = amf_version
+
+    entries = {}
+    reader = _AmfReader(buf, body)
+    reader.compact = compact
+    for entry, value in _iter_sol_entries(reader, amf_version):
+        dict.__setitem__(document, entry.key, value)
+        entries[entry.key] = entry
+        if progress is not None:
+            progress(entry.end, len(buf))
+    document._set_baseline(data, entries)
+    return document
+
+
+class LazySolDocument(SolDocument):
+    """A SolDocument over a memory-mapped .sol file whose values are decoded on first access.
+
+    Opening only indexes the top-level keys: scalars are decoded immediately, container
+    values are skipped (no objects are built) and decoded when they are first looked up.
+    Decoding, detach() and release() are serialized, so a save or export running on a
+    worker thread can share the document with the UI thread.
+    """
+
+    def __init__(self, path, progress=None):
+        super().__init__()
+        self._entries = {}
+        self._tables = None
+        self._lock = threading.RLock()
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buf = memoryview(self._mmap)
+        try:
+            self._index(progress)
+        except BaseException:
+            self.release()
+            raise
+
+    def _index(self, progress=None):
+        self.sol_name, self.amf_version, body = _read_sol_header(self._buf)
+        scanner = _AmfReader(self._buf, body)
+        for entry, value in _iter_sol_entries(scanner, self.amf_version, lazy=True):
+            dict.__setitem__(self, entry.key, value)
+            self._entries[entry.key] = entry
+            if progress is not None:
+                progress(entry.end, len(self._buf))
+        self._tables = scanner
+        self._set_baseline(self._buf, self._entries)
+
+    def _decode_entry(self, key, store=True):
+        with self._lock:
+            if store and dict.__getitem__(self, key) is not _PENDING:
+                return dict.__getitem__(self, key) # Decoded by another thread meanwhile
+            return self._decode_entry_locked(key, store)
+
+    def _decode_entry_locked(self, key, store):
+        if self._buf is None:
+            raise ValueError("The document has been closed.")
+        entry = self._entries[key]
+        tables = self._tables
+        reader = _AmfReader(self._buf, entry.start)
+        for name, count in zip(_TABLE_NAMES, entry.counts):
+            setattr(reader, name, getattr(tables, name)[:count])
+        reader.resolve_pending = self._resolve_pending
+        decoded = list(_iter_sol_entries(reader, self.amf_version, end=entry.end))
+        if len(decoded) != 1 or reader.pos != entry.end:
+            raise SolFormatError(f"The value of '{key}' does not match the indexed byte span.")
+        value = decoded[0][1]
+        # Publish the table slots this entry owns so later entries can reference them.
+        for name, count in zip(_TABLE_NAMES, entry.counts):
+            added = getattr(reader, name)[count:]
+            getattr(tables, name)[count:count + len(added)] = added
+        if store:
+            dict.__setitem__(self, key, value)
+        return value
+
+    def _resolve_pending(self, reader, table_name, index):
+        table = getattr(self._tables, table_name)
+        if table[index] is _PENDING:
+            position = _TABLE_NAMES.index(table_name)
+            owner = None
+            for entry in self._entries.values():
+                if entry.counts[position] > index:
+                    break
+                owner = entry
+            if owner is not None:
+                self._decode_entry(owner.key, store=dict.get(self, owner.key) is _PENDING)
+        if table[index] is _PENDING:
+            raise SolFormatError(f"Invalid {table_name} reference {index}.")
+        return table[index]
+
+    def is_loaded(self, key):
+        """True when the value of `key` has been decoded (or replaced)."""
+        return dict.__getitem__(self, key) is not _PENDING
+
+    def load_all(self):
+        for key in list(dict.keys(self)):
+            self[key]
+
+    def clean_baseline(self):
+        # Decodes every value first, and copies the bytes: the memory map can be released meanwhile
+        with self._lock:
+            self.load_all()
+            baseline = super().clean_baseline()
+            return baseline and (bytes(baseline[0]), baseline[1])
+
+    def close(self):
+        """Decodes any remaining values and releases the memory map."""
+        if self._buf is not None:
+            self.load_all()
+            self.release()
+
+    def detach(self):
+        """Swaps the memory map for an in-memory copy so the file can be replaced on disk."""
+        with self._lock:
+            if self._mmap is None:
+                return
+            data = memoryview(bytes(self._buf))
+            if self._baseline is self._buf:
+                self._baseline = data
+            self.release()
+            self._buf = data
+
+    def release(self):
+        """Releases the memory map; values that were never decoded become unavailable."""
+        with self._lock:
+            if self._buf is not None:
+                self._buf.release()
+                self._buf = None
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+
+    # --- dict API: make sure no _PENDING placeholder leaks out ---
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if value is _PENDING:
+            value = self._decode_entry(key)
+        return value
+
+    def __iter__(self):
+        # Overridden so dict(doc) and {**doc} go through __getitem__ instead of copying slots.
+        return dict.__iter__(self)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def items(self):
+        self.load_all()
+        return dict.items(self)
+
+    def values(self):
+        self.load_all()
+        return dict.values(self)
+
+    def pop(self, key, *default):
+        if key in self:
+            self[key]
+        return super().pop(key, *default)
+
+    def popitem(self):
+        self.load_all()
+        return super().popitem()
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+        return super().setdefault(key, default)
+
+    def copy(self):
+        document = SolDocument(self.items())
+        document.sol_name = self.sol_name
+        document.amf_version = self.amf_version
+        return document
+
+    def __eq__(self, other):
+        self.load_all()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        loaded = sum(1 for key in dict.keys(self) if self.is_loaded(key))
+        return f"<LazySolDocument '{self.sol_name}': {len(self)} keys, {loaded} decoded>"
+
+
+def _sol_header(name, amf_version, body_length):
+    raw_name = name.encode('utf-8')
+    length = len(SOL_HEADER_SIGNATURE) + 2 + len(raw_name) + 4 + body_length
+    return (SOL_HEADER_VERSION + _pack_u32(length) + SOL_HEADER_SIGNATURE + _pack_u16(len(raw_name))
+            + raw_name + b'\x00\x00\x00' + bytes((amf_version,)))
+
+
+def _can_reuse_entry(entry, counts, agreed):
+    """True when the entry's original bytes still resolve every reference it makes.
+
+    counts are the output's table sizes so far and agreed the length of the prefix of
+    each table that is identical to the original file's.
+    """
+    for i in range(4):
+        if entry.ref_max[i] >= agreed[i]:
+            return False
+        if entry.ref_internal[i] and counts[i] != entry.counts[i]:
+            return False
+    return True
+
+
+def _encode_sol_entries(data, amf_version, body_offset, baseline=None, baseline_entries=None, dirty=()):
+    """Encodes the top-level pairs, copying clean entries from `baseline` where possible.
+
+    Returns (chunks, entries) where entries describe the new byte layout.
+    """
+    chunks = []
+    entries = {}
+    counts = [0, 0, 0, 0]
+    agreed = [0, 0, 0, 0]
+    writer = _AmfWriter()
+    copied = []  # (key, start counts, end counts) of copied entries the writer has not registered
+    pos = body_offset
+    for key in data:
+        old = baseline_entries.get(key) if baseline_entries and key not in dirty else None
+        start_counts = tuple(counts)
+        if old is not None and _can_reuse_entry(old, counts, agreed):
+            chunk = baseline[old.start:old.end]
+            for i in range(4):
+                added = old.end_counts[i] - old.counts[i]
+                if agreed[i] == counts[i] == old.counts[i]:
+                    agreed[i] += added
+                counts[i] += added
+            writer.counts = list(counts)
+            ref_max, ref_internal = old.ref_max, old.ref_internal
+            copied.append((key, start_counts, tuple(counts)))
+        else:
+            value = data[key]
+            if copied and isinstance(value, (list, tuple, dict)):
+                # The value may share objects with copied entries: make them referenceable first.
+                # A lazy entry nothing has decoded yet holds no objects; decoding a later value
+                # may still resolve a reference into it, so it stays in the list.
+                pending = []
+                for copied_key, copied_counts, copied_end in copied:
+                    copied_value = dict.__getitem__(data, copied_key)
+                    if copied_value is _PENDING:
+                        pending.append((copied_key, copied_counts, copied_end))
+                    else:
+                        writer.register_copied(copied_value, amf_version, copied_counts, copied_end)
+                copied = pending
+            writer.begin_entry()
+            writer.write_entry(key, value, amf_version)
+            chunk = writer.out
+            counts = list(writer.counts)
+            ref_max, ref_internal = tuple(writer.ref_max), tuple(writer.ref_internal)
+        entry = _SolEntry(key, pos, pos + len(chunk), start_counts, tuple(counts), ref_max, ref_internal)
+        chunks.append(chunk)
+        entries[key] = entry
+        pos += len(chunk)
+    return chunks, entries
+
+
+def encode_sol(data, name='', amf_version=AMF0):
+    """Encodes a mapping of top-level names to values as a complete .sol file."""
+    header = _sol_header(name, amf_version, 0)
+    chunks, _ = _encode_sol_entries(data, amf_version, len(header))
+    body = b''.join(chunks)
+    return _sol_header(name, amf_version, len(body)) + body
+
+
+def _encode_document(document, name, amf_version, dirty):
+    """Like encode_sol, but reuses the encoded bytes of entries whose key is not in `dirty`.
+
+    Returns (payload, entries) so the caller can make the result the new baseline.
+    """
+    header = _sol_header(name, amf_version, 0)
+    baseline_entries = None
+    if document._baseline is not None and amf_version == document.amf_version:
+        baseline_entries = document._baseline_entries
+    chunks, entries = _encode_sol_entries(document, amf_version, len(header), document._baseline,
+                                          baseline_entries, dirty)
+    body_length = sum(len(chunk) for chunk in chunks)
+    payload = b''.join([_sol_header(name, amf_version, body_length)] + chunks)
+    return payload, entries
+
+
+def _read_sol_pyamf(path):
+    from pyamf import sol
+
+    with span('pyamf.load'), open(path, 'rb') as f:
+        data = f.read()
+        name, values = sol.decode(data)
+
+    with span('pyamf.convert'):
+        document = SolDocument()
+        document.sol_name = name
+        document.amf_version = _read_sol_header(memoryview(data))[1]
+        converter = _PyamfConverter()
+        for key, value in values.items():
+            dict.__setitem__(document, key, converter.convert(value))
+        document.mark_all_dirty()
+        return document
+
+
+class _PyamfConverter:
+    """Turns the values pyamf decodes into the native types, walking the whole graph once.
+
+    `memo` maps id(pyamf value) to its converted node. Containers are entered in it before
+    their items are converted, so a value that AMF references several times (or that
+    contains itself) becomes one shared node, which write_sol encodes as a reference again.
+    """
+
+    def __init__(self):
+        import pyamf
+        from pyamf import xml as amf_xml
+        self.pyamf = pyamf
+        self.amf_xml = amf_xml
+        self.memo = {}
+
+    def convert(self, value):
+        if value is None or value.__class__ in (bool, int, float, str, datetime):
+            return value
+        converted = self.memo.get(id(value))
+        if converted is not None:
+            return converted
+        pyamf = self.pyamf
+        if value is pyamf.Undefined:
+            return None
+        if isinstance(value, pyamf.MixedArray):
+            return self._convert_items(value, MixedArray(), value.items())
+        if isinstance(value, pyamf.TypedObject):
+            result = TypedObject()
+            result.class_name = value.alias or ''
+            return self._convert_items(value, result, value.items())
+        if isinstance(value, dict): # pyamf.ASObject
+            return self._convert_items(value, {}, value.items())
+        if isinstance(value, (list, tuple)):
+            result = self.memo[id(value)] = []
+            result.extend(map(self.convert, value))
+            return result
+        if self.amf_xml.is_xml(value):
+            result = XMLDocument(self.amf_xml.tostring(value).decode('utf-8'))
+        elif hasattr(value, 'getvalue'): # pyamf.amf3.ByteArray
+            result = bytes(value.getvalue())
+        elif isinstance(value, (bool, int, float, str, datetime)):
+            return value
+        elif hasattr(value, '__dict__') and not isinstance(value, type): # Instance of a registered class
+            result = TypedObject()
+            try:
+                result.class_name = pyamf.get_class_alias(type(value)).alias or ''
+            except pyamf.UnknownClassAlias:
+                result.class_name = type(value).__name__
+            attributes = [(k, v) for k, v in vars(value).items() if not k.startswith('_')]
+            return self._convert_items(value, result, attributes)
+        else:
+            return str(value) # Unknown type; shown as text like before
+        self.memo[id(value)] = result
+        return result
+
+    def _convert_items(self, value, result, items):
+        self.memo[id(value)] = result
+        for key, item in items:
+            result[key] = self.convert(item)
+        return result
+
+def read_sol(path, backend=None, lazy=False, progress=None, cache=None):
+    """Leest een .sol bestand; backend is 'native' (standaard) of 'pyamf'.
+
+    With lazy=True the native backend returns a LazySolDocument that memory-maps the
+    file and decodes each top-level value only when it is first accessed. The native
+    backend calls `progress(done_bytes, total_bytes)` after every top-level entry.
+
+    With a sol_cache.DecodeCache as `cache` the native backend looks the file's bytes up
+    first: a hit is returned without decoding (as a SolDocument, also with lazy=True). An
+    eager miss is decoded and stored; a lazy miss is not, as nothing has been decoded yet.
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend not in SOL_BACKENDS:
+        raise ValueError(f"Unknown SOL backend '{backend}'. Expected one of {SOL_BACKENDS}.")
+    if lazy and backend != 'native':
+        raise ValueError("Lazy loading is only supported by the native backend.")
     if not os.path.exists(path):
         raise FileNotFoundError(f"Bestand niet gevonden: {path}")
     if os.path.getsize(path) == 0:
         raise ValueError("Het bestand is leeg.")
-    
-    with open(path, 'rb') as f:
-        raw_lso = sol.load(f)
-    
-    # Converteer naar een standaard dict voor makkelijkere verwerking in GUI.
-    # Dit is een basisconversie; mogelijk verfijning nodig voor specifieke AMF types.
-    lso_dict = {}
-    if hasattr(raw_lso, 'items'): # Controleer of het op een dictionary lijkt
-        for k, v in raw_lso.items():
-            if hasattr(v, '__dict__') and not isinstance(v, type):
-                try:
-                    # Probeer een diepe conversie voor geneste objecten
-                    lso_dict[k] = {ki: vi for ki, vi in v.__dict__.items() if not ki.startswith('_')}
-                except Exception:
-                    lso_dict[k] = str(v) # Fallback naar string representatie
-            elif isinstance(v, list):
-                new_list = []
-                for item in v:
-                    if hasattr(item, '__dict__') and not isinstance(item, type):
-                        try:
-                            new_list.append({ki: vi for ki, vi in item.__dict__.items() if not ki.startswith('_')})
-                        except Exception:
-                            new_list.append(str(item))
-                    else:
-                        new_list.append(item)
-                lso_dict[k] = new_list
-            else:
-                lso_dict[k] = v
-    else:
-        # Als raw_lso geen items heeft (bijv. een simpele waarde of een lijst op root niveau),
-        # probeer het direct te gebruiken of als string.
-        # Dit scenario is minder gebruikelijk voor .sol bestanden die game saves bevatten.
-        if isinstance(raw_lso, list):
-            # Als het een lijst is, moeten we een manier vinden om het in de GUI te representeren.
-            # Voor nu, verpakken we het in een dict met een generieke key.
-            # Dit zou aangepast kunnen worden afhankelijk van hoe je dit wilt tonen.
-            return {'_root_list_data': raw_lso} 
-        # Mogelijk andere types hier afhandelen indien nodig
-        return {'_root_value': str(raw_lso)} # Fallback
-
-    return lso_dict
-
-def write_sol(path, data):
+
+    with span('read_sol', Path(path).name) as s:
+        s.add('bytes_read', os.path.getsize(path))
+        if backend == 'pyamf':
+            return _read_sol_pyamf(path)
+        if cache is not None:
+            with open(path, 'rb') as f:
+                data = f.read()
+            with span('decode_cache.load'):
+                document = cache.load(data)
+            if document is not None:
+                s.add('decode_cache_hits')
+                return document
+            if not lazy:
+                with span('decode_sol'):
+                    document = decode_sol(data, progress)
+                with span('decode_cache.store'):
+                    cache.store(document)
+                return document
+        if lazy:
+            with span('read_sol.index'):
+                return LazySolDocument(path, progress)
+        with open(path, 'rb') as f:
+            data = f.read()
+        with span('decode_sol'):
+            return decode_sol(data, progress)
+
+def _backup_path(path, index):
+    # "backup" in the name keeps these out of the editor's file list
+    return path.with_name(f"{path.stem}.backup{index}{path.suffix}")
+
+
+def _rotate_backups(path, count):
+    """Shifts name.backup1..N up by one and makes the current file the new backup1."""
+    if count <= 0 or not path.exists():
+        return
+    for index in range(count - 1, 0, -1):
+        older = _backup_path(path, index)
+        if older.exists():
+            os.replace(older, _backup_path(path, index + 1))
+    newest = _backup_path(path, 1)
+    staging = newest.with_name(newest.name + '.tmp')
+    if staging.exists():
+        staging.unlink()
+    try:
+        os.link(path, staging) # No copy needed: the live file is replaced, not rewritten
+    except OSError:
+        shutil.copy2(path, staging)
+    os.replace(staging, newest)
+
+
+def _fsync_directory(directory):
+    if os.name != 'posix':
+        return # Windows cannot open directories; NTFS journals the rename itself
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _file_has_contents(path, payload):
+    try:
+        if os.stat(path).st_size != len(payload):
+            return False
+        with open(path, 'rb') as f:
+            return f.read() == payload
+    except OSError:
+        return False
+
+
+def _write_atomic(path, payload, backups):
+    """Writes payload to a sibling temp file, fsyncs it and renames it over `path`.
+
+    A crash at any point leaves either the old or the new file in place, never a truncated one.
+    """
+    fd, temp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix='.tmp', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        if path.exists():
+            shutil.copymode(path, temp_name)
+        _rotate_backups(path, backups)
+        os.replace(temp_name, path)
+    except BaseException:
+        try:
+            os.unlink(temp_name)
+        except OSError:
+            pass
+        raise
+    _fsync_directory(path.parent)
+
+
+def write_sol(path, data, backups=SOL_BACKUP_COUNT):
+    """Schrijft data naar een .sol bestand.
+
+    SolDocuments keep their root name and AMF version, and only their dirty keys are
+    re-encoded; plain dicts are written as AMF0 with the file name as root name.
+    Keys modified while the write is in progress stay dirty for the next save.
+
+    The file is encoded in memory and replaced atomically, keeping `backups` rotating
+    copies of the previous versions. Returns False when the encoded bytes equal the file
+    on disk and nothing was written.
+    """
     # path is expected to be a Path object or a string path
     path_obj = Path(path)
-    sol_name = path_obj.stem  # Get filename without .sol extension
-
-    # Create an SOL object
-    # pyamf.SOL defaults to AMF0, check if your .sol files are AMF3
-    # Jacksmith .sol files are typically AMF0
-    lso = sol.SOL(sol_name) 
-
-    # Populate the SOL object with the data from the dictionary
-    for key, value in data.items():
-        lso[key] = value
-    
-    with open(path_obj, 'wb') as f:
-        sol.save(lso, f) # Save the SOL object
+    with span('write_sol', path_obj.name) as s:
+        return _write_sol(path_obj, data, backups, s)
+
+
+def write_sol_bytes(path, payload, backups=SOL_BACKUP_COUNT):
+    """Replaces `path` with an already encoded .sol file (e.g. an older version) the way write_sol does.
+
+    Returns False when the file already holds these bytes.
+    """
+    _read_sol_header(memoryview(payload)) # Never replace a save with something that is not one
+    path_obj = Path(path)
+    with span('write_sol', path_obj.name) as s:
+        if _file_has_contents(path_obj, payload):
+            return False
+        with span('write_atomic'):
+            _write_atomic(path_obj, payload, backups)
+        s.add('bytes_written', len(payload))
+        return True
+
+
+def _write_sol(path_obj, data, backups, current):
+    if not isinstance(data, SolDocument):
+        with span('encode_sol'):
+            payload = encode_sol(data, path_obj.stem, AMF0)
+        if _file_has_contents(path_obj, payload):
+            return False
+        with span('write_atomic'):
+            _write_atomic(path_obj, payload, backups)
+        current.add('bytes_written', len(payload))
+        return True
+
+    dirty = data._take_dirty()
+    current.add('dirty_keys', len(dirty))
+    try:
+        with span('encode_sol'):
+            payload, entries = _encode_document(data, data.sol_name or path_obj.stem, data.amf_version, dirty)
+        written = not _file_has_contents(path_obj, payload)
+        if written:
+            if isinstance(data, LazySolDocument):
+                # Windows refuses to replace a file that is still memory-mapped.
+                data.detach()
+            with span('write_atomic'):
+                _write_atomic(path_obj, payload, backups)
+            current.add('bytes_written', len(payload))
+    except BaseException:
+        data._dirty.update(dirty)
+        raise
+    else:
+        data._set_baseline(payload, entries)
+    finally:
+        data._saving = frozenset()
+    return written
 
 def find_jacksmith_sol_folder():
     """Zoekt naar de Jacksmith .sol bestanden map."""
@@ -0,0 +1,364 @@
+"""
+Save history: a snapshot of a .sol file before every write, restorable in constant time.
+
+Every save file gets its own history folder:
+    objects/<id>    one stored version; <id> is the BLAKE2b hash of the file's bytes
+    index.jsonl     one line per snapshot, oldest first: time, object id, size, label
+Objects are content-addressed, so a version that is already stored (the same save
+written twice, a restore of an older version) only adds an index line. A new version is
+stored as a delta against the newest keyframe, a complete zlib-compressed version: a
+restore reads at most two objects, however long the history is. Deltas grow as edits
+pile up after their keyframe, so once the deltas stored against a keyframe would add up
+to more than the keyframe itself, the version becomes the next keyframe instead; this
+keeps the total within about twice the best possible keyframe spacing.
+
+A delta cuts the new bytes into pieces of PIECE_SIZE. Each piece is looked up in the
+keyframe by its first ANCHOR_SIZE bytes, near where the previous piece was found. Pieces
+found unchanged become copies of keyframe ranges (runs of them a single copy); the others
+are compressed with the keyframe bytes around that spot as zlib preset dictionary, so a
+piece with a few edited bytes takes little more than those bytes.
+
+Only the newest `limit` snapshots of a file are kept; objects that no remaining snapshot
+needs are deleted with them. By default the history folders live in ".sol_history" next
+to the saves; the environment can move or switch them off:
+    SOL_EDITOR_HISTORY_DIR=<folder>                     (default: <save folder>/.sol_history)
+    SOL_EDITOR_HISTORY_LIMIT=500                        (snapshots per file; 0 turns history off)
+"""
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import time
+import zlib
+from bisect import bisect_right
+from datetime import datetime
+from pathlib import Path
+
+HISTORY_FOLDER_NAME = '.sol_history'
+DEFAULT_LIMIT = 500
+PRUNE_SLACK = 50 # Extra snapshots tolerated before pruning, so it does not run on every save
+PIECE_SIZE = 8192
+ANCHOR_SIZE = 48
+SEARCH_DISTANCE = 65536 # How far from the expected position a piece is looked for
+DICT_BEFORE = 1024 # Keyframe bytes before the anchor in the preset dictionary (deletions)
+DICT_SIZE = 16384 # Well inside zlib's 32 KiB window
+INDEX_NAME = 'index.jsonl'
+
+_KEYFRAME = b'F'
+_DELTA = b'D'
+_KEY_LENGTH = 40 # Hex digits of a 20-byte BLAKE2b digest
+_COPY = b'C' # Delta record: a range of the keyframe, unchanged
+_PIECE = b'Z' # Delta record: a piece compressed with part of the keyframe as dictionary
+_copy_header = struct.Struct('>II') # keyframe start, length
+_piece_header = struct.Struct('>IIII') # dictionary start, dictionary length, raw length, compressed length
+
+
+class HistoryError(Exception):
+    """Raised when a stored version is missing or does not match its hash."""
+
+
+def content_key(data):
+    """Hex BLAKE2b digest of a file's bytes."""
+    return hashlib.blake2b(data, digest_size=_KEY_LENGTH // 2).hexdigest()
+
+
+class Snapshot:
+    """One entry of a file's history: the version of the file as it was at `time`."""
+    __slots__ = ('time', 'key', 'size', 'stored', 'base', 'label')
+
+    def __init__(self, when, key, size, stored, base, label):
+        self.time = when # Seconds since the epoch
+        self.key = key
+        self.size = size
+        self.stored = stored # Bytes this snapshot added to the folder (0 when deduplicated)
+        self.base = base # Keyframe of the delta it stored; '' for keyframes and deduplicated versions
+        self.label = label
+
+    def to_json(self):
+        return json.dumps({'time': self.time, 'key': self.key, 'size': self.size,
+                           'stored': self.stored, 'base': self.base, 'label': self.label})
+
+    @classmethod
+    def from_json(cls, line):
+        fields = json.loads(line)
+        return cls(fields['time'], fields['key'], fields['size'], fields['stored'], fields['base'],
+                   fields['label'])
+
+    @property
+    def when_text(self):
+        return f"{datetime.fromtimestamp(self.time):%Y-%m-%d %H:%M:%S}"
+
+    def __str__(self):
+        return f"{self.when_text} {self.label} ({self.size} bytes)"
+
+
+def encode_delta(base, data):
+    """`data` as copies of keyframe (`base`) ranges and pieces compressed against the keyframe."""
+    base = bytes(base)
+    chunks = []
+    copy_start = copy_length = 0 # Pending copy, extended while pieces match the keyframe in sequence
+    expected = 0
+    for start in range(0, len(data), PIECE_SIZE):
+        piece = data[start:start + PIECE_SIZE]
+        anchor = _find_anchor(base, piece[:ANCHOR_SIZE], expected)
+        expected = anchor + len(piece)
+        if base.startswith(piece, anchor):
+            if copy_length and copy_start + copy_length == anchor:
+                copy_length += len(piece)
+                continue
+            if copy_length:
+                chunks.append(_COPY + _copy_header.pack(copy_start, copy_length))
+            copy_start, copy_length = anchor, len(piece)
+            continue
+        if copy_length:
+            chunks.append(_COPY + _copy_header.pack(copy_start, copy_length))
+            copy_length = 0
+        dict_start = max(0, anchor - DICT_BEFORE)
+        zdict = base[dict_start:dict_start + DICT_SIZE]
+        compressor = zlib.compressobj(9, zdict=zdict) if zdict else zlib.compressobj(9)
+        compressed = compressor.compress(piece) + compressor.flush()
+        chunks.append(_PIECE + _piece_header.pack(dict_start, len(zdict), len(piece), len(compressed)))
+        chunks.append(compressed)
+    if copy_length:
+        chunks.append(_COPY + _copy_header.pack(copy_start, copy_length))
+    return b''.join(chunks)
+
+
+def _find_anchor(base, anchor, expected):
+    """Position of `anchor` in `base` closest to `expected`, or `expected` itself when it is not found."""
+    if base.startswith(anchor, expected):
+        return expected # The usual case: nothing moved
+    after = base.find(anchor, expected, expected + SEARCH_DISTANCE)
+    before = base.rfind(anchor, max(0, expected - SEARCH_DISTANCE), expected)
+    if after < 0 and before < 0:
+        return min(expected, len(base))
+    if after < 0 or (before >= 0 and expected - before < after - expected):
+        return before
+    return after
+
+
+def decode_delta(base, delta):
+    """The bytes encode_delta(base, data) was made from."""
+    pieces = []
+    pos = 0
+    view = memoryview(delta)
+    while pos < len(view):
+        kind = view[pos:pos + 1]
+        pos += 1
+        if kind == _COPY:
+            copy_start, copy_length = _copy_header.unpack_from(view, pos)
+            pos += _copy_header.size
+            piece = base[copy_start:copy_start + copy_length]
+            if len(piece) != copy_length:
+                raise HistoryError("Delta copies bytes beyond its keyframe.")
+            pieces.append(piece)
+            continue
+        if kind != _PIECE:
+            raise HistoryError("Delta has an unknown record.")
+        dict_start, dict_length, raw_length, compressed_length = _piece_header.unpack_from(view, pos)
+        pos += _piece_header.size
+        zdict = base[dict_start:dict_start + dict_length]
+        if len(zdict) != dict_length:
+            raise HistoryError("Delta refers to bytes beyond its keyframe.")
+        decompressor = zlib.decompressobj(zdict=zdict) if dict_length else zlib.decompressobj()
+        piece = decompressor.decompress(view[pos:pos + compressed_length]) + decompressor.flush()
+        if len(piece) != raw_length:
+            raise HistoryError("Delta piece has the wrong length.")
+        pieces.append(piece)
+        pos += compressed_length
+    return b''.join(pieces)
+
+
+class SaveHistory:
+    """The snapshots of one save file, kept in `directory`."""
+
+    def __init__(self, directory, limit=DEFAULT_LIMIT):
+        self.directory = Path(directory)
+        self.limit = limit
+
+    @property
+    def _objects(self):
+        return self.directory / 'objects'
+
+    @property
+    def _index(self):
+        return self.directory / INDEX_NAME
+
+    # --- Reading ---
+    def snapshots(self):
+        """All snapshots, oldest first. Unreadable index lines are skipped."""
+        try:
+            with open(self._index, encoding='utf-8') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return []
+        snapshots = []
+        for line in lines:
+            try:
+                snapshots.append(Snapshot.from_json(line))
+            except (ValueError, KeyError, TypeError):
+                print(f"[WARN] Skipping unreadable line in {self._index}")
+        return snapshots
+
+    def snapshot_at(self, when):
+        """The newest snapshot taken at or before `when` (seconds since the epoch), or None."""
+        snapshots = self.snapshots()
+        position = bisect_right([snapshot.time for snapshot in snapshots], when)
+        return snapshots[position - 1] if position else None
+
+    def restore_bytes(self, snapshot):
+        """The file bytes of `snapshot` (or of an object key): one keyframe plus at most one delta."""
+        key = snapshot if isinstance(snapshot, str) else snapshot.key
+        kind, base_key, body = self._read_object(key)
+        if kind == _KEYFRAME:
+            data = zlib.decompress(body)
+        else:
+            base_kind, _, base_body = self._read_object(base_key)
+            if base_kind != _KEYFRAME:
+                raise HistoryError(f"Version {key} is not based on a keyframe.")
+            data = decode_delta(zlib.decompress(base_body), body)
+        if content_key(data) != key:
+            raise HistoryError(f"Version {key} is damaged.")
+        return data
+
+    def _read_object(self, key):
+        """(kind, keyframe key or None, body) of a stored object."""
+        try:
+            with open(self._objects / key, 'rb') as f:
+                payload = f.read()
+        except FileNotFoundError:
+            raise HistoryError(f"Version {key} is missing from {self.directory}.") from None
+        kind = payload[:1]
+        if kind == _KEYFRAME:
+            return kind, None, memoryview(payload)[1:]
+        if kind == _DELTA:
+            return kind, payload[1:1 + _KEY_LENGTH].decode('ascii'), memoryview(payload)[1 + _KEY_LENGTH:]
+        raise HistoryError(f"Version {key} has an unknown format.")
+
+    def _keyframe_of(self, key):
+        try:
+            with open(self._objects / key, 'rb') as f:
+                header = f.read(1 + _KEY_LENGTH)
+        except OSError:
+            return None
+        if header[:1] == _KEYFRAME:
+            return key
+        if header[:1] == _DELTA and len(header) == 1 + _KEY_LENGTH:
+            return header[1:].decode('ascii')
+        return None
+
+    # --- Writing ---
+    def snapshot(self, data, label='', when=None):
+        """Records the file bytes `data`; returns the Snapshot, or None when it equals the newest one."""
+        key = content_key(data)
+        snapshots = self.snapshots()
+        if snapshots and snapshots[-1].key == key:
+            return None # Nothing happened since the previous snapshot
+        stored, base = 0, ''
+        if not (self._objects / key).exists():
+            self._objects.mkdir(parents=True, exist_ok=True)
+            stored, base = self._store_object(key, data, snapshots)
+        snapshot = Snapshot(time.time() if when is None else when, key, len(data), stored, base, label)
+        with open(self._index, 'a', encoding='utf-8') as f:
+            f.write(snapshot.to_json() + '\n')
+        if len(snapshots) + 1 > self.limit + PRUNE_SLACK:
+            self.prune()
+        return snapshot
+
+    def snapshot_file(self, path, label=''):
+        """Records the current contents of the file `path`; None when it is missing or unchanged."""
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None # A new file: there is no earlier version to keep
+        return self.snapshot(data, label)
+
+    def _store_object(self, key, data, snapshots):
+        """Writes `data` as a delta against the newest keyframe, or as a keyframe.
+
+        Returns (bytes written, keyframe key or '').
+        """
+        payload, base = None, ''
+        base_key = self._keyframe_of(snapshots[-1].key) if snapshots else None
+        if base_key is not None:
+            _, _, base_body = self._read_object(base_key)
+            delta = encode_delta(zlib.decompress(base_body), data)
+            spent = sum(snapshot.stored for snapshot in snapshots if snapshot.base == base_key)
+            if spent + len(delta) <= len(base_body):
+                payload, base = _DELTA + base_key.encode('ascii') + delta, base_key
+        if payload is None:
+            payload = _KEYFRAME + zlib.compress(data, 6)
+        _write_file(self._objects / key, payload)
+        return len(payload), base
+
+    def prune(self):
+        """Keeps the newest `limit` snapshots and deletes the objects none of them needs."""
+        snapshots = self.snapshots()
+        kept = snapshots[-self.limit:] if self.limit > 0 else []
+        if len(kept) < len(snapshots):
+            _write_file(self._index, ''.join(snapshot.to_json() + '\n' for snapshot in kept).encode('utf-8'))
+        needed = {snapshot.key for snapshot in kept}
+        needed.update(filter(None, (self._keyframe_of(key) for key in list(needed))))
+        removed = 0
+        for path in self._objects.glob('*'):
+            if path.name not in needed and not path.name.startswith('.'):
+                _remove(path)
+                removed += 1
+        return removed
+
+    def size_bytes(self):
+        """Disk space taken by the stored versions."""
+        return sum(path.stat().st_size for path in self._objects.glob('*'))
+
+
+def _write_file(path, payload):
+    # Written next to the target and renamed, so a crash never leaves half an object or index
+    fd, temp_name = tempfile.mkstemp(prefix='.', suffix='.tmp', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(temp_name, path)
+    except BaseException:
+        _remove(Path(temp_name))
+        raise
+
+
+def _remove(path):
+    try:
+        path.unlink()
+    except OSError:
+        pass
+
+
+_history_dir = None # None: next to the saves
+_history_limit = DEFAULT_LIMIT
+
+
+def history_for(sol_path):
+    """The SaveHistory of the save file `sol_path`, or None when history is switched off."""
+    if _history_limit <= 0:
+        return None
+    sol_path = Path(sol_path)
+    if _history_dir is None:
+        return SaveHistory(sol_path.parent / HISTORY_FOLDER_NAME / sol_path.stem, _history_limit)
+    # One shared folder: saves with the same name in different folders must not mix
+    folder_key = hashlib.blake2b(str(sol_path.parent.resolve()).encode('utf-8'), digest_size=4).hexdigest()
+    return SaveHistory(_history_dir / f"{sol_path.stem}-{folder_key}", _history_limit)
+
+
+def _configure_from_environment():
+    global _history_dir, _history_limit
+    directory = os.environ.get('SOL_EDITOR_HISTORY_DIR', '').strip()
+    if directory:
+        _history_dir = Path(directory)
+    limit = os.environ.get('SOL_EDITOR_HISTORY_LIMIT', '').strip()
+    if limit:
+        try:
+            _history_limit = int(limit)
+        except ValueError:
+            print(f"[WARN] SOL_EDITOR_HISTORY_LIMIT ignored: {limit!r} is not a number")
+
+
+_configure_from_environment()
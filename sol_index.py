@@ -0,0 +1,151 @@
+"""
+Inverted index over the keys, paths and values of a decoded save, for searching the data tree.
+
+Every value in the document is a node identified by its path, e.g. ('parts', 12, 0). A node
+is indexed under up to three lower-cased terms: its dict key ('gold'), its path text
+('parts[12][0]') and, for scalars, the value as the tree shows it ('part_sword_grip_3').
+Each term maps to the set of node paths, so a prefix search is a bisect into the sorted
+terms and a regex search scans the distinct terms once instead of walking the document.
+
+Edits keep the index current with update(path, old, new), which only touches the nodes
+below `path`.
+"""
+import gc
+import re
+from bisect import bisect_left
+
+from sol_edits import MISSING, format_path
+
+PREFIX = 'prefix'
+REGEX = 'regex'
+MODES = (PREFIX, REGEX)
+
+
+def path_sort_key(path):
+    """Sorts paths in tree order (dict keys as text, list items by index)."""
+    return tuple((isinstance(key, int), key) for key in path)
+
+
+def _walk(path, value):
+    """(path, terms) of the node at `path` and of every node below it.
+
+    A container referenced more than once (AMF references can even form cycles) is only
+    walked at the first path it is found at.
+    """
+    # The path text of a child is its parent's plus one suffix, never formatted from scratch
+    stack = [(path, format_path(path).lower(), value)]
+    seen = set()
+    while stack:
+        path, text, value = stack.pop()
+        key = path[-1]
+        if isinstance(key, int):
+            terms = [text]
+        elif len(path) > 1:
+            terms = [str(key).lower(), text]
+        else: # A top-level path is its key
+            terms = [text]
+        if isinstance(value, dict):
+            if id(value) not in seen:
+                seen.add(id(value))
+                stack.extend((path + (k,), f"{text}.{k}".lower(), child) for k, child in value.items())
+        elif isinstance(value, list):
+            if id(value) not in seen:
+                seen.add(id(value))
+                stack.extend((path + (i,), f"{text}[{i}]", child) for i, child in enumerate(value))
+        else:
+            term = str(value).lower()
+            if term not in terms:
+                terms.append(term)
+        yield path, terms
+
+
+class SearchIndex:
+    """Term -> node paths for one document."""
+
+    def __init__(self):
+        self._postings = {} # term -> set of path tuples
+        self._sorted_terms = None # Built on the first prefix search after the set of terms changed
+        self.node_count = 0
+
+    @classmethod
+    def build(cls, document, check=None):
+        """Indexes every value of `document`. `check()` is called now and then, e.g. to cancel a job."""
+        index = cls()
+        # Hundreds of thousands of new tuples and sets would otherwise trigger many useless collections
+        was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for n, (key, value) in enumerate(document.items()):
+                if check is not None and n % 16 == 0:
+                    check()
+                index.add((key,), value)
+        finally:
+            if was_enabled:
+                gc.enable()
+        return index
+
+    def __len__(self):
+        return self.node_count
+
+    @property
+    def term_count(self):
+        return len(self._postings)
+
+    def add(self, path, value):
+        """Indexes the value at `path` and everything below it."""
+        postings = self._postings
+        for node_path, terms in _walk(tuple(path), value):
+            for term in terms:
+                paths = postings.get(term)
+                if paths is None:
+                    paths = postings[term] = set()
+                    self._sorted_terms = None
+                paths.add(node_path)
+            self.node_count += 1
+
+    def remove(self, path, value):
+        """Forgets the value at `path` (as it was when indexed) and everything below it."""
+        postings = self._postings
+        for node_path, terms in _walk(tuple(path), value):
+            for term in terms:
+                paths = postings.get(term)
+                if paths is None:
+                    continue
+                paths.discard(node_path)
+                if not paths:
+                    del postings[term]
+                    self._sorted_terms = None
+            self.node_count -= 1
+
+    def update(self, path, old, new):
+        """Re-indexes `path` after its value changed from `old` to `new` (either may be MISSING)."""
+        if old is not MISSING:
+            self.remove(path, old)
+        if new is not MISSING:
+            self.add(path, new)
+
+    def search(self, query, mode=PREFIX):
+        """Paths of the nodes with a term starting with `query` (PREFIX) or matching it (REGEX).
+
+        Matching ignores case. Raises re.error for an invalid regular expression.
+        """
+        if mode == REGEX:
+            pattern = re.compile(query, re.IGNORECASE)
+            terms = [term for term in self._postings if pattern.search(term)]
+        elif mode == PREFIX:
+            terms = self._prefix_terms(query.lower())
+        else:
+            raise ValueError(f"Unknown search mode '{mode}'.")
+        matches = set()
+        for term in terms:
+            matches.update(self._postings[term])
+        return matches
+
+    def _prefix_terms(self, prefix):
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self._postings)
+        terms = self._sorted_terms
+        start = stop = bisect_left(terms, prefix)
+        while stop < len(terms) and terms[stop].startswith(prefix):
+            stop += 1
+        return terms[start:stop]
@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+"""
+Streaming JSON export and import of .sol documents.
+
+Values JSON has no type for are written as tagged objects, so that importing gives back
+the same Python values and write_sol the same bytes:
+
+    {"__amf__": "date", "value": "2015-03-01T12:00:00"}
+    {"__amf__": "bytes", "value": "AAEC"}                       (base64)
+    {"__amf__": "xml", "value": "<a/>"}
+    {"__amf__": "float", "value": "nan"}                        (also "inf", "-inf")
+    {"__amf__": "typed", "class": "Weapon", "sealed": [...], "dynamic": true, "value": {...}}
+    {"__amf__": "mixed", "items": [[key, value], ...]}          (ECMA arrays, int and str keys)
+    {"__amf__": "vector", "type": "int", "fixed": false, "class": "", "items": [...]}
+    {"__amf__": "dictionary", "weak": false, "items": [[key, value], ...]}
+    {"__amf__": "object", "items": [[key, value], ...]}         (plain objects with non-text keys)
+    {"__amf__": "shared", "id": 1, "value": ...}                (first place of a value held in several)
+    {"__amf__": "ref", "id": 1}                                 (the other places)
+
+A value the save holds in several places (an AMF reference) is written once, under an id,
+and referenced elsewhere, so it is still one shared value after importing.
+
+The header (root name and AMF version) goes first, then the entries under "data". Both
+directions work entry by entry: large containers are written in batches of CHUNK_ITEMS
+items, and the importer decodes one top-level value at a time from a sliding buffer, so
+memory stays bounded by the largest batch or value instead of the whole text. Files
+exported by older versions (just the data object) can be imported too.
+
+Examples:
+    python sol_json.py export jacksmith1.sol jacksmith1.json --compact
+    python sol_json.py import jacksmith1.json jacksmith1.sol
+"""
+import argparse
+import base64
+import json
+import math
+import re
+import sys
+from collections import Counter
+from datetime import datetime
+from itertools import chain
+from pathlib import Path
+
+from sol_compact import compact
+from sol_handler import (AMF0, SOL_BACKUP_COUNT, AMFDictionary, AMFVector, MixedArray, SolDocument,
+                         TypedObject, XMLDocument, read_sol, write_sol)
+
+FORMAT_NAME = 'sol-json'
+FORMAT_VERSION = 2 # 2: shared values
+HEADER_KEY = '__sol__'
+DATA_KEY = 'data'
+TAG = '__amf__'
+DEFAULT_INDENT = 4
+CHUNK_ITEMS = 1000 # Container items encoded per json.dumps call; larger subtrees are streamed
+WRITE_BUFFER_CHARS = 1 << 16
+READ_SIZE = 1 << 20
+
+_PLAIN_SCALARS = frozenset((str, int, bool, type(None)))
+_LEAF_TYPES = _PLAIN_SCALARS | {float}
+_LIST_TYPE = frozenset((list,))
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+# --- Python values <-> tagged JSON values ---
+def to_json_value(value):
+    """The JSON-compatible (tagged) form of a decoded value. Untagged parts are shared, not copied."""
+    return _to_json(value, None, set(), _SharedValues([value]))[0]
+
+
+class _SharedValues:
+    """The values an export meets in more than one place, and the ids of those written so far."""
+
+    def __init__(self, roots):
+        self.shared = _shared_ids(roots)
+        self.ids = {} # id(value) -> id in the JSON
+
+
+def _shared_ids(roots):
+    """ids of the containers, dates, byte arrays and XML documents found more than once below `roots`."""
+    seen = set()
+    shared = set()
+    stack = list(roots)
+    while stack:
+        value = stack.pop()
+        if type(value) in _LEAF_TYPES:
+            continue
+        if id(value) in seen:
+            shared.add(id(value))
+            continue
+        if isinstance(value, (list, tuple)):
+            seen.add(id(value))
+            if _LEAF_TYPES.issuperset(map(type, value)):
+                continue
+            if _LIST_TYPE.issuperset(map(type, value)) and _LEAF_TYPES.issuperset(map(type, chain.from_iterable(value))):
+                # Lists of scalar lists (e.g. the [name, count] parts) are checked in one go
+                item_ids = set(map(id, value))
+                if len(item_ids) < len(value):
+                    counts = Counter(map(id, value))
+                    shared.update(item for item, count in counts.items() if count > 1)
+                shared.update(item_ids & seen)
+                if len(item_ids) > len(seen): # Merges the smaller set into the larger one
+                    seen, item_ids = item_ids, seen
+                seen.update(item_ids)
+            else:
+                stack.extend(value)
+        elif isinstance(value, dict):
+            seen.add(id(value))
+            stack.extend(value.keys())
+            stack.extend(value.values())
+        elif isinstance(value, (datetime, bytes, bytearray, XMLDocument)):
+            seen.add(id(value)) # The AMF3 writer references these by identity too
+    return shared
+
+
+def _to_json(value, heavy, active, refs):
+    """(json value, node count); ids of converted containers with more than CHUNK_ITEMS nodes go into `heavy`."""
+    kind = type(value)
+    if kind in _PLAIN_SCALARS:
+        return value, 1
+    if kind is float:
+        return (value, 1) if math.isfinite(value) else ({TAG: 'float', 'value': repr(value)}, 1)
+    if id(value) in refs.shared and id(value) not in active:
+        ref = refs.ids.get(id(value))
+        if ref is not None:
+            return {TAG: 'ref', 'id': ref}, 1
+        result, count = _value_to_json(value, heavy, active, refs)
+        ref = refs.ids[id(value)] = len(refs.ids) + 1
+        result = {TAG: 'shared', 'id': ref, 'value': result}
+        if heavy is not None and count > CHUNK_ITEMS:
+            heavy.add(id(result))
+        return result, count
+    return _value_to_json(value, heavy, active, refs)
+
+
+def _value_to_json(value, heavy, active, refs):
+    if isinstance(value, (list, tuple, dict)):
+        if id(value) in active:
+            raise ValueError("Cannot export a value that contains itself.")
+        active.add(id(value))
+        try:
+            result, count = _container_to_json(value, heavy, active, refs)
+        finally:
+            active.discard(id(value))
+        if heavy is not None and count > CHUNK_ITEMS:
+            heavy.add(id(result))
+        return result, count
+    if isinstance(value, str): # XMLDocument
+        return {TAG: 'xml', 'value': str(value)}, 1
+    if isinstance(value, bool) or isinstance(value, int):
+        return int(value), 1
+    if isinstance(value, float):
+        return _to_json(float(value), heavy, active, refs)
+    if isinstance(value, datetime):
+        return {TAG: 'date', 'value': value.isoformat()}, 1
+    if isinstance(value, (bytes, bytearray)):
+        return {TAG: 'bytes', 'value': base64.b64encode(value).decode('ascii')}, 1
+    raise TypeError(f"Cannot export {type(value).__name__} values.")
+
+
+def _items_to_json(items, heavy, active, refs):
+    """Converted [key, value] pairs and their node count."""
+    pairs = []
+    count = 1
+    for key, item in items:
+        json_key, key_count = _to_json(key, heavy, active, refs)
+        json_item, item_count = _to_json(item, heavy, active, refs)
+        pairs.append([json_key, json_item])
+        count += key_count + item_count
+    return pairs, count
+
+
+def _list_to_json(value, heavy, active, refs):
+    if _PLAIN_SCALARS.issuperset(map(type, value)): # Fast path, e.g. a [name, count] part
+        return (value if type(value) is list else list(value)), len(value) + 1
+    items = []
+    count = 1
+    changed = type(value) is not list
+    shared = refs.shared
+    for item in value:
+        if type(item) is list and _PLAIN_SCALARS.issuperset(map(type, item)) and id(item) not in shared:
+            items.append(item) # Saves two calls per part
+            count += len(item) + 1
+            continue
+        json_item, item_count = _to_json(item, heavy, active, refs)
+        changed = changed or json_item is not item
+        items.append(json_item)
+        count += item_count
+    return (items if changed else value), count
+
+
+def _container_to_json(value, heavy, active, refs):
+    if isinstance(value, AMFVector):
+        items, count = _list_to_json(value, heavy, active, refs)
+        return {TAG: 'vector', 'type': value.item_type, 'fixed': value.fixed, 'class': value.class_name,
+                'items': items}, count
+    if isinstance(value, (list, tuple)):
+        return _list_to_json(value, heavy, active, refs)
+    if isinstance(value, TypedObject):
+        fields, count = _container_to_json(dict(value), heavy, active, refs)
+        return {TAG: 'typed', 'class': value.class_name, 'sealed': list(value.sealed), 'dynamic': value.dynamic,
+                'value': fields}, count
+    if isinstance(value, MixedArray):
+        pairs, count = _items_to_json(value.items(), heavy, active, refs)
+        return {TAG: 'mixed', 'items': pairs}, count
+    if isinstance(value, AMFDictionary):
+        pairs, count = _items_to_json(value.items(), heavy, active, refs)
+        return {TAG: 'dictionary', 'weak': value.weak_keys, 'items': pairs}, count
+    if TAG in value or not all(type(key) is str for key in value):
+        pairs, count = _items_to_json(value.items(), heavy, active, refs)
+        return {TAG: 'object', 'items': pairs}, count
+    fields = {}
+    count = 1
+    changed = type(value) is not dict
+    for key, item in value.items():
+        json_item, item_count = _to_json(item, heavy, active, refs)
+        changed = changed or json_item is not item
+        fields[key] = json_item
+        count += item_count
+    return (fields if changed else value), count
+
+
+def _vector(obj):
+    vector = AMFVector(obj['items'])
+    vector.item_type, vector.fixed, vector.class_name = obj['type'], obj['fixed'], obj['class']
+    return vector
+
+
+def _typed(obj):
+    typed = TypedObject(obj['value'])
+    typed.class_name, typed.sealed, typed.dynamic = obj['class'], tuple(obj['sealed']), obj['dynamic']
+    return typed
+
+
+def _dictionary(obj):
+    dictionary = AMFDictionary(map(tuple, obj['items']))
+    dictionary.weak_keys = obj['weak']
+    return dictionary
+
+
+_FROM_TAG = {
+    'date': lambda obj: datetime.fromisoformat(obj['value']),
+    'bytes': lambda obj: base64.b64decode(obj['value']),
+    'xml': lambda obj: XMLDocument(obj['value']),
+    'float': lambda obj: float(obj['value']),
+    'typed': _typed,
+    'mixed': lambda obj: MixedArray(map(tuple, obj['items'])),
+    'vector': _vector,
+    'dictionary': _dictionary,
+    'object': lambda obj: dict(map(tuple, obj['items'])),
+}
+
+
+def from_json_object(obj, shared=None):
+    """json object_hook: turns tagged objects back into the AMF-specific Python values.
+
+    `shared` maps the ids of the shared values read so far to the values; use one dict
+    for all values of a file, as references can point into earlier top-level values.
+    """
+    tag = obj.get(TAG)
+    if tag is None:
+        return obj
+    if tag == 'shared':
+        # Compacted here, so every place that references it gets the same compacted value
+        value = compact(obj['value'])
+        if shared is not None:
+            shared[obj['id']] = value
+        return value
+    if tag == 'ref':
+        try:
+            return shared[obj['id']]
+        except (KeyError, TypeError):
+            raise ValueError(f"Reference to shared value {obj['id']!r} before the value itself.") from None
+    convert = _FROM_TAG.get(tag)
+    if convert is None:
+        raise ValueError(f"Unknown {TAG} tag '{tag}'.")
+    return convert(obj)
+
+
+# --- Export ---
+class _JsonWriter:
+    """Writes converted values, streaming the `heavy` containers and json.dumps-ing everything else."""
+
+    def __init__(self, write, indent):
+        self._write = write
+        self.indent = indent
+        self.key_separator = ':' if indent is None else ': '
+        self._pending = []
+        self._pending_chars = 0
+        self.chars_written = 0
+        self.heavy = set()
+
+    def emit(self, text):
+        self._pending.append(text)
+        self._pending_chars += len(text)
+        if self._pending_chars >= WRITE_BUFFER_CHARS:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self._write(''.join(self._pending))
+            self.chars_written += self._pending_chars
+            self._pending, self._pending_chars = [], 0
+
+    def _newline(self, level):
+        return '' if self.indent is None else '\n' + ' ' * (self.indent * level)
+
+    def dumps(self, value, level):
+        text = json.dumps(value, indent=self.indent, allow_nan=False,
+                          separators=(',', self.key_separator))
+        return text if self.indent is None or not level else text.replace('\n', self._newline(level))
+
+    def value(self, value, level):
+        if id(value) not in self.heavy:
+            self.emit(self.dumps(value, level))
+        elif isinstance(value, dict):
+            self._container('{', '}', value.items(), level, is_dict=True)
+        else:
+            self._container('[', ']', value, level, is_dict=False)
+
+    def _container(self, opening, closing, items, level, is_dict):
+        self.emit(opening)
+        if not is_dict and self.heavy.isdisjoint(map(id, items)): # Only light items: plain slices
+            separator = ''
+            for start in range(0, len(items), CHUNK_ITEMS):
+                separator = self._flush_run(items[start:start + CHUNK_ITEMS], level, separator, is_dict)
+            self.emit(self._newline(level) + closing)
+            return
+        run = [] # Consecutive light items, written by one json.dumps call
+        run_size = 0
+        separator = ''
+        for item in items:
+            child = item[1] if is_dict else item
+            if id(child) in self.heavy:
+                separator = self._flush_run(run, level, separator, is_dict)
+                run, run_size = [], 0
+                self.emit(separator + self._newline(level + 1))
+                if is_dict:
+                    self.emit(json.dumps(item[0]) + self.key_separator)
+                self.value(child, level + 1)
+                separator = ','
+                continue
+            run.append(item)
+            run_size += len(child) if isinstance(child, (list, dict)) else 1
+            if run_size >= CHUNK_ITEMS:
+                separator = self._flush_run(run, level, separator, is_dict)
+                run, run_size = [], 0
+        separator = self._flush_run(run, level, separator, is_dict)
+        self.emit(self._newline(level) + closing)
+
+    def _flush_run(self, run, level, separator, is_dict):
+        if not run:
+            return separator
+        text = self.dumps(dict(run) if is_dict else run, level)
+        # Strip the brackets: "[\n<pad+1>a,\n<pad+1>b\n<pad>]" -> "\n<pad+1>a,\n<pad+1>b"
+        inner = text[1:-1] if self.indent is None else text[1:-len(self._newline(level)) - 1]
+        self.emit(separator + inner)
+        return ','
+
+
+def export_json(document, target, compact=False, indent=DEFAULT_INDENT):
+    """Writes `document` (a SolDocument or mapping) as JSON to a path or text file. Returns the characters written."""
+    if not hasattr(target, 'write'):
+        with open(target, 'w', encoding='utf-8', newline='\n') as f:
+            return export_json(document, f, compact, indent)
+    writer = _JsonWriter(target.write, None if compact else indent)
+    header = {'format': FORMAT_NAME, 'version': FORMAT_VERSION,
+              'sol_name': getattr(document, 'sol_name', ''),
+              'amf_version': getattr(document, 'amf_version', AMF0)}
+    writer.emit('{' + writer._newline(1) + json.dumps(HEADER_KEY) + writer.key_separator + writer.dumps(header, 1))
+    writer.emit(',' + writer._newline(1) + json.dumps(DATA_KEY) + writer.key_separator + '{')
+    separator = ''
+    keys = list(document.keys())
+    # References span top-level values, so every value is looked at first (lazy documents decode them here)
+    refs = _SharedValues(document[key] for key in keys)
+    for key in keys:
+        value = document[key] # One top-level value converted at a time
+        writer.heavy.clear()
+        json_value, _ = _to_json(value, writer.heavy, set(), refs)
+        writer.emit(separator + writer._newline(2) + json.dumps(str(key)) + writer.key_separator)
+        writer.value(json_value, 2)
+        separator = ','
+    writer.emit((writer._newline(1) if separator else '') + '}' + writer._newline(0) + '}\n')
+    writer.flush()
+    return writer.chars_written
+
+
+# --- Import ---
+class _StreamReader:
+    """Decodes a JSON text piece by piece from a file, keeping only the unparsed rest in memory."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ''
+        self.pos = 0
+        self.offset = 0 # Characters of the file before self.buf
+        self.eof = False
+        self.shared = {} # Shared values by id, for the whole file
+        self.decoder = json.JSONDecoder(object_hook=lambda obj: from_json_object(obj, self.shared))
+
+    def _read_more(self, size=READ_SIZE):
+        data = self.f.read(size)
+        if not data:
+            self.eof = True
+        self.offset += self.pos
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+
+    def peek(self):
+        """The next non-whitespace character, or '' at the end."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or self.eof:
+                return self.buf[self.pos:self.pos + 1]
+            self._read_more()
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' at character {self.offset + self.pos} "
+                             f"but found {repr(found) if found else 'the end of the file'}.")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise ValueError(f"Invalid JSON at character {self.offset + e.pos}: {e.msg}.") from None
+            else:
+                if end < len(self.buf) or self.eof: # A number at the very end may continue
+                    self.pos = end
+                    return value
+            # Incomplete: grow the buffer fourfold, so the parses that fail add up to a third of the last one
+            self._read_more(max(READ_SIZE, 3 * (len(self.buf) - self.pos)))
+
+    def members(self):
+        """Yields (key, reader) for each member of an object; the caller reads the value."""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise ValueError("Object keys in the JSON file must be strings.")
+            self.expect(':')
+            yield key
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.expect('}')
+            return
+
+
+def import_json(source, sol_name=None, amf_version=None):
+    """Reads a JSON export (path or text file) back into a SolDocument ready for write_sol.
+
+    `sol_name` and `amf_version` override the header; files without one default to the
+    file name and AMF0, like write_sol does for plain dicts.
+    """
+    if not hasattr(source, 'read'):
+        with open(source, 'r', encoding='utf-8') as f:
+            document = import_json(f, sol_name, amf_version)
+        if not document.sol_name:
+            document.sol_name = Path(source).stem
+        return document
+    reader = _StreamReader(source)
+    document = SolDocument()
+    header = None
+    for n, key in enumerate(reader.members()):
+        if n == 0 and key == HEADER_KEY:
+            header = reader.value()
+            if not isinstance(header, dict) or header.get('format') != FORMAT_NAME:
+                raise ValueError("The JSON file has an unknown header.")
+            if header.get('version', 0) > FORMAT_VERSION:
+                raise ValueError(f"The JSON file uses format version {header['version']}; "
+                                 f"this version reads up to {FORMAT_VERSION}.")
+        elif header is not None and key == DATA_KEY:
+            for data_key in reader.members():
+                document[data_key] = compact(reader.value())
+        elif header is None: # Export without header: the top-level object is the data
+            document[key] = compact(reader.value())
+        else:
+            reader.value() # Unknown member of a newer format version
+    if reader.peek():
+        raise ValueError("Unexpected data after the JSON object.")
+    header = header or {}
+    document.sol_name = sol_name if sol_name is not None else header.get('sol_name', '')
+    document.amf_version = amf_version if amf_version is not None else header.get('amf_version', AMF0)
+    return document
+
+
+# --- Command line ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    export_parser = commands.add_parser('export', help="Write a .sol file as JSON.")
+    export_parser.add_argument('sol', help=".sol file to export.")
+    export_parser.add_argument('json', help="JSON file to write.")
+    export_parser.add_argument('--compact', action='store_true', help="No indentation or line breaks.")
+    export_parser.add_argument('--indent', type=int, default=DEFAULT_INDENT)
+    import_parser = commands.add_parser('import', help="Write a JSON export back as a .sol file.")
+    import_parser.add_argument('json', help="JSON file to import.")
+    import_parser.add_argument('sol', help=".sol file to write (replaced atomically, with backups).")
+    import_parser.add_argument('--backups', type=int, default=SOL_BACKUP_COUNT,
+                               help=f"Rotating backups to keep (default {SOL_BACKUP_COUNT}).")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'export':
+            chars = export_json(read_sol(args.sol), args.json, compact=args.compact, indent=args.indent)
+            print(f"[INFO] Exported {args.sol} to {args.json} ({chars} characters)")
+        else:
+            written = write_sol(args.sol, import_json(args.json), backups=args.backups)
+            print(f"[INFO] {'Wrote' if written else 'Unchanged:'} {args.sol}")
+    except (OSError, ValueError, TypeError) as e:
+        print(f"[ERROR] {type(e).__name__}: {e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,31 @@
+"""
+PartsTable (part_catalog) and the batch part operations that use it.
+"""
+import unittest
+
+from part_catalog import PartsTable
+from sol_cli import apply_operations
+from sol_handler import AMF3, decode_sol, encode_sol
+
+
+class FromRowsTest(unittest.TestCase):
+
+    def test_whole_float_counts(self):
+        table = PartsTable.from_rows([['part_sword_grip_2', 3.0], ['part_sword_grip_1', 1]])
+        self.assertEqual(list(table), [('part_sword_grip_1', 1), ('part_sword_grip_2', 3)])
+        self.assertIs(type(table.to_rows()[1][1]), int)
+
+    def test_non_integral_counts(self):
+        for count in (2.5, float('nan'), float('inf'), '3', None):
+            with self.subTest(count=count):
+                with self.assertRaises(ValueError):
+                    PartsTable.from_rows([['part_sword_grip_1', 1], ['part_sword_grip_2', count]])
+
+    def test_remove_category_with_double_counts(self):
+        parts = [['part_sword_grip_1', 3.0], ['part_shield_paint_1', 2.0], ['part_sword_grip_2', 1.0]]
+        document = decode_sol(encode_sol({'parts': parts}, 'savegame', AMF3))
+        self.assertIs(type(document['parts'][0][1]), float)
+        changes = apply_operations(document, [('remove_part_category', 'shield_paint')])
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(document['parts'], [['part_sword_grip_1', 3], ['part_sword_grip_2', 1]])
+
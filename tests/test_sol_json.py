@@ -0,0 +1,76 @@
+"""
+JSON export and import (sol_json) must give back the same .sol bytes, shared values included.
+"""
+import io
+import re
+from unittest import mock
+
+import sol_json
+from sol_handler import AMF0, AMF3, decode_sol, encode_sol
+from sol_json import TAG, export_json, import_json, to_json_value
+from benchmarks.synthetic import make_save_data
+from tests.test_sol_roundtrip import RoundTripCase, make_shared_data
+
+
+def _round_trip(document, **options):
+    text = io.StringIO()
+    export_json(document, text, **options)
+    return import_json(io.StringIO(text.getvalue())), text.getvalue()
+
+
+class JsonRoundTripTest(RoundTripCase):
+
+    def check(self, data, amf_version, **options):
+        blob = encode_sol(data, 'savegame', amf_version)
+        document, text = _round_trip(decode_sol(blob), **options)
+        self.assertEqual((document.sol_name, document.amf_version), ('savegame', amf_version))
+        self.assertSameTree(dict(decode_sol(blob)), dict(document))
+        self.assertEqual(encode_sol(document, 'savegame', amf_version), blob)
+        return document, text
+
+    def test_shared_values(self):
+        for amf_version in (AMF0, AMF3):
+            for compact in (False, True):
+                with self.subTest(amf=amf_version, compact=compact):
+                    data = make_shared_data(amf_version)
+                    data['numbers'] = [float(day) for day in range(20)] # Compacted to a ScalarArray on import
+                    data['same_numbers'] = data['numbers']
+                    document, text = self.check(data, amf_version, compact=compact)
+                    self.assertIs(document['again'][0], document['shared'])
+                    self.assertIs(document['same_numbers'], document['numbers'])
+                    anchors = re.findall(r'"%s": ?"shared"' % TAG, text)
+                    self.assertEqual(len(anchors), 3) # The shared object, the weapon and the numbers
+
+    def test_streamed_in_small_pieces(self):
+        # Shared values inside containers that are written in batches and read from a small buffer
+        with mock.patch.object(sol_json, 'CHUNK_ITEMS', 3), mock.patch.object(sol_json, 'READ_SIZE', 7):
+            for amf_version in (AMF0, AMF3):
+                with self.subTest(amf=amf_version):
+                    data = make_shared_data(amf_version)
+                    data['many'] = [data['shared'], data['weapons']] * 10
+                    self.check(data, amf_version)
+
+    def test_synthetic_save(self):
+        for amf_version in (AMF0, AMF3):
+            with self.subTest(amf=amf_version):
+                _, text = self.check(make_save_data(300, history_days=40), amf_version)
+                self.assertNotIn('"ref"', text)
+
+    def test_scalar_lists_shared_between_parts(self):
+        part = ['part_sword_grip_1', 3]
+        data = {'parts': [part, ['part_sword_grip_2', 1], part], 'favourite': part}
+        for amf_version in (AMF0, AMF3):
+            with self.subTest(amf=amf_version):
+                document, _ = self.check(data, amf_version)
+                self.assertIs(document['favourite'], document['parts'][0])
+
+    def test_reference_before_value(self):
+        text = '{"data": {"a": {"%s": "ref", "id": 1}, "b": {"%s": "shared", "id": 1, "value": [1]}}}' % (TAG, TAG)
+        with self.assertRaises(ValueError):
+            import_json(io.StringIO(text))
+
+    def test_to_json_value(self):
+        shared = {'level': 3}
+        self.assertEqual(to_json_value([shared, shared]),
+                         [{TAG: 'shared', 'id': 1, 'value': {'level': 3}}, {TAG: 'ref', 'id': 1}])
+        self.assertEqual(to_json_value([{'level': 3}, {'level': 3}]), [{'level': 3}, {'level': 3}])
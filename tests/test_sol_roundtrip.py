@@ -0,0 +1,273 @@
+"""
+Byte-for-byte round trips of the native .sol codec (sol_handler).
+
+Run from the repository root: python -m pytest -q (or python -m unittest discover tests).
+
+Full re-encodes must reproduce the original file exactly. Incremental saves (write_sol on
+a decoded document) copy the bytes of unchanged entries and renumber the references of
+the ones after an edit, so they are checked by decoding the result: same values, same AMF
+types and the same shared objects as the edited document. Where pyamf is installed, the
+native encoder is compared with its output as well.
+"""
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+from sol_handler import (AMF0, AMF3, AMFDictionary, AMFVector, MixedArray, TypedObject, XMLDocument,
+                         decode_sol, encode_sol, read_sol, write_sol)
+from benchmarks.synthetic import make_save_data
+
+try:
+    from pyamf import sol as pyamf_sol
+except ImportError:
+    pyamf_sol = None
+
+
+def _typed(class_name, sealed=(), dynamic=True, **values):
+    result = TypedObject(values)
+    result.class_name, result.sealed, result.dynamic = class_name, tuple(sealed), dynamic
+    return result
+
+
+def _vector(item_type, items, fixed=False, class_name=''):
+    result = AMFVector(items)
+    result.item_type, result.fixed, result.class_name = item_type, fixed, class_name
+    return result
+
+
+def make_shared_data(amf_version, amf_types=True):
+    """A save whose entries share objects, strings and (for AMF3) class traits with each other.
+
+    With amf_types=False only plain dicts and lists are used, as pyamf writes them.
+    """
+    shared = {'owner': 'alpha', 'level': 3}
+    if amf_types:
+        traits = {'sealed': ('name', 'quality'), 'dynamic': False} if amf_version == AMF3 else {} # AMF0 has no traits
+        weapon, other = (_typed('Weapon', name=name, quality=quality, **traits)
+                         for name, quality in (('Alpha', 0.5), ('Beta', 1.0)))
+    else:
+        weapon, other = {'name': 'Alpha', 'quality': 0.5}, {'name': 'Beta', 'quality': 1.0}
+    data = {
+        'first': {'tag': 'alpha', 'day': 1},
+        'shared': shared,
+        'weapons': [weapon, other, weapon],
+        'again': [shared, 'alpha', {'inner': shared}],
+        'mixed': MixedArray({'one': 'alpha', 'two': 2.0}) if amf_types else {'one': 'alpha', 'two': 2.0},
+        'history': [float(day) for day in range(12)],
+        'when': datetime(2020, 5, 1, 12, 30), # Decoded as naive UTC
+        'tail': {'note': 'beta', 'weapon': weapon, 'shared': shared},
+    }
+    if amf_version == AMF3 and amf_types:
+        data['vectors'] = [_vector('int', [1, -2, 3]), _vector('uint', [4, 5], fixed=True),
+                           _vector('double', [0.5, 1.5]), _vector('object', [shared, 'alpha'], class_name='Item')]
+        data['lookup'] = AMFDictionary({'alpha': shared})
+        data['xml'] = XMLDocument('<a>alpha</a>')
+        data['raw'] = bytearray(b'\x00\x01alpha')
+    return data
+
+
+def _shape(value):
+    """What decides how `value` is encoded, apart from its contents."""
+    if isinstance(value, TypedObject):
+        return 'typed', value.class_name, tuple(value.sealed), value.dynamic
+    if isinstance(value, AMFVector):
+        return 'vector', value.item_type, value.fixed, value.class_name
+    if isinstance(value, AMFDictionary):
+        return 'dictionary', value.weak_keys
+    for amf_type, name in ((MixedArray, 'mixed'), (XMLDocument, 'xml'), (dict, 'object'), (list, 'array'),
+                           (str, 'string'), (bool, 'bool'), ((bytes, bytearray), 'bytes')):
+        if isinstance(value, amf_type):
+            return name
+    if isinstance(value, (int, float)):
+        return 'number' # AMF0 decodes whole numbers as int; the byte comparisons check the encoding
+    return type(value).__name__
+
+
+class RoundTripCase(unittest.TestCase):
+
+    def assertSameTree(self, expected, actual, seen=None, path='root'):
+        """Equal values and AMF types, with objects shared at the same places."""
+        seen = {} if seen is None else seen
+        self.assertEqual(_shape(expected), _shape(actual), path)
+        if not isinstance(expected, (list, dict)):
+            self.assertEqual(expected, actual, path)
+            return
+        if id(expected) in seen:
+            self.assertIs(seen[id(expected)], actual, f"{path} is no longer shared")
+            return
+        self.assertNotIn(id(actual), {id(value) for value in seen.values()}, f"{path} is shared by mistake")
+        seen[id(expected)] = actual
+        self.assertEqual(len(expected), len(actual), path)
+        if isinstance(expected, list):
+            for index, (left, right) in enumerate(zip(expected, actual)):
+                self.assertSameTree(left, right, seen, f"{path}[{index}]")
+        else:
+            self.assertEqual(list(expected), list(actual), f"{path} keys")
+            for key in expected:
+                self.assertSameTree(expected[key], actual[key], seen, f"{path}.{key}")
+
+
+class FullReEncodeTest(RoundTripCase):
+    """encode_sol of a decoded file (no baseline bytes) reproduces the file."""
+
+    def check(self, data, amf_version):
+        blob = encode_sol(data, 'savegame', amf_version)
+        document = decode_sol(blob)
+        self.assertEqual(document.sol_name, 'savegame')
+        self.assertEqual(document.amf_version, amf_version)
+        self.assertSameTree(data, dict(document))
+        self.assertEqual(encode_sol(document, document.sol_name, amf_version), blob)
+
+    def test_shared_references(self):
+        for amf_version in (AMF0, AMF3):
+            with self.subTest(amf=amf_version):
+                self.check(make_shared_data(amf_version), amf_version)
+
+    def test_synthetic_save(self):
+        for amf_version in (AMF0, AMF3):
+            with self.subTest(amf=amf_version):
+                self.check(make_save_data(500, history_days=40), amf_version)
+
+    def test_uncompacted_decode(self):
+        blob = encode_sol(make_save_data(200, history_days=40), 'savegame', AMF3)
+        self.assertEqual(encode_sol(decode_sol(blob, compact=False), 'savegame', AMF3), blob)
+
+
+class EcmaArrayKeysTest(unittest.TestCase):
+    """AMF0 ECMA array keys: indices become ints in place, every other key stays text."""
+
+    def round_trip(self, keys):
+        """Encodes an array with `keys` (ints for indices) and returns the decoded keys in order."""
+        blob = encode_sol({'array': MixedArray((key, index) for index, key in enumerate(keys))}, 'savegame', AMF0)
+        document = decode_sol(blob)
+        self.assertEqual(encode_sol(document, 'savegame', AMF0), blob)
+        self.assertEqual(list(document['array'].values()), list(range(len(keys))))
+        return list(document['array'])
+
+    def test_key_order(self):
+        self.assertEqual(self.round_trip(['x', 2, 'y']), ['x', 2, 'y'])
+
+    def test_non_ascii_digit(self):
+        self.assertEqual(self.round_trip(['\u00b2', 3]), ['\u00b2', 3])
+
+    def test_leading_zero(self):
+        self.assertEqual(self.round_trip(['01', 0, 10]), ['01', 0, 10])
+
+
+class IncrementalSaveTest(RoundTripCase):
+    """write_sol after edits: copied entries still resolve their references."""
+
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = Path(folder.name)
+
+    def save(self, amf_version, edit, lazy=False):
+        """Writes a file, applies `edit` to its document, saves and returns (document, original, saved)."""
+        path = self.folder / f"save_{amf_version}.sol"
+        original = encode_sol(make_shared_data(amf_version), 'savegame', amf_version)
+        path.write_bytes(original)
+        document = read_sol(path, lazy=lazy)
+        if lazy:
+            self.addCleanup(document.release)
+        edit(document)
+        self.assertTrue(write_sol(path, document, backups=0))
+        saved = path.read_bytes()
+        self.assertSameTree(dict(document), dict(decode_sol(saved)))
+        # Whatever was copied or re-encoded, the file reads like a full encode of the document
+        self.assertSameTree(dict(decode_sol(encode_sol(document, 'savegame', amf_version))), dict(decode_sol(saved)))
+        self.assertFalse(document.dirty_keys)
+        return document, original, saved
+
+    def test_edit_before_shared_references(self):
+        # New strings, objects and traits in the first entry shift every later table index
+        def edit(document):
+            document['first'] = {'tag': 'gamma', 'extra': ['delta', 'epsilon', {'alpha': 'beta'}],
+                                 'typed': _typed('Extra', alpha='delta')}
+        for amf_version in (AMF0, AMF3):
+            with self.subTest(amf=amf_version):
+                document, _, saved = self.save(amf_version, edit)
+                reread = decode_sol(saved)
+                self.assertIs(reread['again'][0], reread['shared'])
+                self.assertIs(reread['tail']['weapon'], reread['weapons'][0])
+
+    def test_edit_inside_shared_object(self):
+        def edit(document):
+            document['shared']['level'] = 4
+            document['shared']['title'] = 'gamma'
+            document.mark_dirty('shared')
+        for amf_version in (AMF0, AMF3):
+            with self.subTest(amf=amf_version):
+                _, _, saved = self.save(amf_version, edit)
+                reread = decode_sol(saved)
+                self.assertEqual(reread['again'][2]['inner']['title'], 'gamma')
+                self.assertIs(reread['tail']['shared'], reread['shared'])
+
+    def test_edit_last_entry_copies_the_rest(self):
+        for amf_version in (AMF0, AMF3):
+            with self.subTest(amf=amf_version):
+                last = list(make_shared_data(amf_version))[-1]
+
+                def edit(document):
+                    document[last] = 'changed'
+                document, original, saved = self.save(amf_version, edit)
+                entries = document._baseline_entries
+                body_start, edited_start = entries['first'].start, entries[last].start
+                # Only the header's length field changed before the edited entry
+                self.assertEqual(saved[body_start:edited_start], original[body_start:edited_start])
+                self.assertEqual(decode_sol(saved)[last], 'changed')
+
+    def test_delete_and_add_entries(self):
+        def edit(document):
+            del document['first']
+            document['added'] = [document['shared'], 'alpha', 'zeta']
+        for amf_version in (AMF0, AMF3):
+            with self.subTest(amf=amf_version):
+                _, _, saved = self.save(amf_version, edit)
+                reread = decode_sol(saved)
+                self.assertIs(reread['added'][0], reread['shared'])
+
+    def test_lazy_document(self):
+        def edit(document):
+            document['first'] = {'tag': 'gamma', 'more': ['delta']}
+            document['weapons'][1]['name'] = 'Gamma'
+            document.mark_dirty('weapons')
+        for amf_version in (AMF0, AMF3):
+            with self.subTest(amf=amf_version):
+                self.save(amf_version, edit, lazy=True)
+
+    def test_unchanged_document_is_not_rewritten(self):
+        for amf_version in (AMF0, AMF3):
+            with self.subTest(amf=amf_version):
+                path = self.folder / f"unchanged_{amf_version}.sol"
+                original = encode_sol(make_shared_data(amf_version), 'savegame', amf_version)
+                path.write_bytes(original)
+                document = read_sol(path)
+                document.mark_all_dirty() # Forces a full re-encode instead of copying the baseline
+                self.assertFalse(write_sol(path, document, backups=0))
+                self.assertEqual(path.read_bytes(), original)
+
+
+@unittest.skipIf(pyamf_sol is None, "pyamf is not installed")
+class PyamfCompatibilityTest(RoundTripCase):
+    """The native codec writes and reads what pyamf does, for the types pyamf handles."""
+
+    def pyamf_encode(self, data, amf_version):
+        encoded = pyamf_sol.encode('savegame', data, encoding=amf_version)
+        return encoded.getvalue() if hasattr(encoded, 'getvalue') else bytes(encoded)
+
+    def test_encode_matches_pyamf(self):
+        for amf_version in (AMF0, AMF3):
+            for data in (make_save_data(300, history_days=40), make_shared_data(amf_version, amf_types=False)):
+                with self.subTest(amf=amf_version, keys=len(data)):
+                    self.assertEqual(encode_sol(data, 'savegame', amf_version), self.pyamf_encode(data, amf_version))
+
+    def test_decode_pyamf_output(self):
+        for amf_version in (AMF0, AMF3):
+            with self.subTest(amf=amf_version):
+                data = make_shared_data(amf_version, amf_types=False)
+                blob = self.pyamf_encode(data, amf_version)
+                document = decode_sol(blob)
+                self.assertSameTree(data, dict(document))
+                self.assertEqual(encode_sol(document, 'savegame', amf_version), blob)
@@ -0,0 +1,87 @@
+"""
+Editing a value as text keeps its AMF type, so the save re-encodes it the same way.
+"""
+import unittest
+
+from sol_compact import ScalarArray
+from sol_edits import like_container
+from sol_handler import AMF0, AMF3, AMFDictionary, AMFVector, MixedArray, TypedObject, decode_sol, encode_sol
+
+try:
+    from gui.app import SolEditorApp
+except ImportError: # No tkinter
+    SolEditorApp = None
+
+
+class _Feedback:
+    """Stands in for the editor window in SolEditorApp._convert_value."""
+
+    def __init__(self):
+        self.messages = []
+
+    def show_feedback(self, title, message, kind='info'):
+        self.messages.append((title, message, kind))
+
+
+def _edit(data, key, text, amf_version):
+    """Decodes `data`, replaces `key` by `text` as the editor does; returns the new value and the saved document."""
+    document = decode_sol(encode_sol(data, 'savegame', amf_version))
+    if SolEditorApp is not None:
+        value = SolEditorApp._convert_value(_Feedback(), text, document[key])
+    else:
+        import json
+        value = like_container(document[key], json.loads(text))
+    document[key] = value
+    return value, decode_sol(encode_sol(document, 'savegame', amf_version))
+
+
+class LikeContainerTest(unittest.TestCase):
+
+    def test_scalar_array(self):
+        for amf_version in (AMF0, AMF3):
+            with self.subTest(amf=amf_version):
+                data = {'history': [float(day) for day in range(10)]}
+                self.assertIsInstance(decode_sol(encode_sol(data, 'savegame', amf_version))['history'], ScalarArray)
+                value, saved = _edit(data, 'history', '[5, 6, 7]', amf_version)
+                self.assertEqual(value, [5, 6, 7])
+                self.assertEqual(list(saved['history']), [5, 6, 7])
+                numbers = [1.5, 2.5, 3.5, 4.5, 5.5, 6.5, 7.5, 8.5, 9.5]
+                value, saved = _edit(data, 'history', str(numbers), amf_version)
+                self.assertIsInstance(value, ScalarArray) # Stored compactly, like a decoded list
+                self.assertEqual(list(value), numbers)
+                self.assertEqual(list(saved['history']), numbers)
+
+    def test_typed_object(self):
+        weapon = TypedObject(name='Alpha', quality=0.5)
+        weapon.class_name, weapon.sealed, weapon.dynamic = 'Weapon', ('name', 'quality'), False
+        _, saved = _edit({'weapon': weapon}, 'weapon', '{"name": "Beta", "quality": 1}', AMF3)
+        saved = saved['weapon']
+        self.assertEqual(dict(saved), {'name': 'Beta', 'quality': 1})
+        self.assertEqual((saved.class_name, saved.sealed, saved.dynamic), ('Weapon', ('name', 'quality'), False))
+        with self.assertRaises(ValueError):
+            like_container(weapon, {'name': 'Beta', 'extra': 1})
+
+    def test_mixed_array_and_dictionary(self):
+        for amf_version, original in ((AMF0, MixedArray(one=1)), (AMF3, MixedArray(one=1)), (AMF3, AMFDictionary(one=1))):
+            with self.subTest(amf=amf_version, type=type(original).__name__):
+                _, saved = _edit({'value': original}, 'value', '{"two": 2}', amf_version)
+                saved = saved['value']
+                self.assertIs(type(saved), type(original))
+                self.assertEqual(dict(saved), {'two': 2})
+
+    def test_vector(self):
+        vector = AMFVector([1, 2])
+        vector.item_type, vector.fixed = 'int', True
+        _, saved = _edit({'vector': vector}, 'vector', '[3, -4, 5]', AMF3)
+        saved = saved['vector']
+        self.assertIsInstance(saved, AMFVector)
+        self.assertEqual((list(saved), saved.item_type, saved.fixed), ([3, -4, 5], 'int', True))
+        for items in ([1.5], ['a'], [2 ** 31]):
+            with self.assertRaises(ValueError):
+                like_container(vector, items)
+
+    def test_wrong_json_type(self):
+        with self.assertRaises(ValueError):
+            like_container([1, 2], {'a': 1})
+        with self.assertRaises(ValueError):
+            like_container(MixedArray(), [1])